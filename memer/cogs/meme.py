@@ -14,8 +14,10 @@ from typing import Optional
 from asyncprawcore import NotFound, Forbidden
 import asyncpraw
 from memer.helpers.guild_subreddits import (
+    MANDATORY,
     get_guild_subreddits,
-    DEFAULTS,
+    all_guild_subreddits,
+    on_subreddits_changed,
 )
 from memer.meme_stats import (
     update_stats,
@@ -34,6 +36,7 @@ from memer.helpers.meme_utils import (
     send_meme,
     get_reddit_url,
     extract_post_data,
+    needs_load,
 )
 from memer.helpers.meme_cache_service import MemeCacheService
 from memer.helpers.db import (
@@ -65,11 +68,28 @@ from memer.reddit_meme import (
     SubredditUnavailableError,
     start_warmup,
     stop_warmup,
+    update_warm_subreddit,
     WARM_CACHE,
+    WARM_SCHEDULE,
     ID_CACHE,
     HASH_CACHE,
+    load_dedup_snapshots,
+    dedup_snapshot_payload,
+    save_dedup_snapshots,
+    load_warm_snapshot,
+    save_warm_snapshot,
+    warm_snapshot_payload,
+    _is_repost,
+    _remember_image,
 )
 from memer.helpers.reddit_config import start_observer, stop_observer
+from memer.helpers.rate_limit import get_limiter
+from memer.helpers.image_hash import close_deduper
+from memer.helpers.candidate_pool import (
+    pop_candidate,
+    start_pool_refill,
+    stop_pool_refill,
+)
 
 class Meme(commands.Cog):
     def __init__(self, bot: commands.Bot):
@@ -87,6 +107,8 @@ class Meme(commands.Cog):
             client_secret=os.getenv("REDDIT_CLIENT_SECRET"),
             user_agent="MemeBot (by u/YourUsername)"
         )
+        # Let the shared token bucket track Reddit's X-Ratelimit headers
+        get_limiter().attach(self.reddit)
         # Inside your bot or cog class init/setup
         self.cache_service = MemeCacheService(
             reddit=self.reddit,
@@ -97,27 +119,41 @@ class Meme(commands.Cog):
         except Exception:
             log.error("[CACHE INIT ERROR]", exc_info=True)
 
+        # Remember what was already sent before the restart, then serve
+        # from the last warm buffers until the first warmup cycle lands.
+        load_dedup_snapshots()
+        load_warm_snapshot()
+
         # Start prune task
         self._prune_cache.start()
-        # Kick off warmup immediately
-        subs = DEFAULTS["sfw"] + DEFAULTS["nsfw"]
-        for mandatory in ("memes", "nsfwmeme"):
+        # Kick off warmup immediately for every guild's subreddits; subs
+        # added or removed through /memeadmin follow without a restart.
+        subs = all_guild_subreddits()
+        on_subreddits_changed(update_warm_subreddit)
+        for mandatory in MANDATORY:
             if mandatory not in subs:
                 subs.append(mandatory)
         log.debug("Scheduling warmup for subs: %s", subs)
         asyncio.create_task(start_warmup(self.reddit, subs))
+        asyncio.create_task(start_pool_refill(self.reddit))
         start_observer()
 
     def cog_unload(self):
         self._prune_cache.cancel()
+        save_dedup_snapshots()
+        save_warm_snapshot()
         asyncio.create_task(self.cache_service.close())
         asyncio.create_task(stop_warmup())
+        asyncio.create_task(stop_pool_refill())
+        asyncio.create_task(close_deduper())
         stop_observer()
         log.info("MemeBot unloaded; warmup stopped and observer shut down.")
 
     @tasks.loop(seconds=60)
     async def _prune_cache(self):
         log.debug("_prune_cache: guilds=%s", list(self.recent_ids.keys()))
+        await asyncio.to_thread(save_dedup_snapshots, dedup_snapshot_payload())
+        await asyncio.to_thread(save_warm_snapshot, warm_snapshot_payload())
 
     @commands.Cog.listener()
     async def on_ready(self):
@@ -167,7 +203,8 @@ class Meme(commands.Cog):
             ctx.channel.id,
             ctx.guild.id,
             f"https://reddit.com{permalink}",
-            post_dict["title"]
+            post_dict["title"],
+            post_id=pid,
         )
         await update_stats(ctx.author.id, keyword or "", post_dict["subreddit"], nsfw=nsfw)
 
@@ -184,14 +221,20 @@ class Meme(commands.Cog):
             for sub in subs:
                 key = f"{sub}_{listing}"
                 buf = WARM_CACHE.get(key)
-                if buf:
-                    while buf:
-                        post = buf.pop()
-                        if not post:
-                            continue
-                        data = await extract_post_data(post)
-                        await self._send_cached(ctx, data, keyword or "", "WARM CACHE", nsfw)
-                        return True
+                if not buf:
+                    continue
+                for post in buf.unread(ctx.channel.id):
+                    # same checks as fetch_meme's warm stage: buffers are
+                    # shared, so only this channel's history rules a post out
+                    buf.mark(ctx.channel.id, post.id)
+                    if await has_post_been_sent(ctx.channel.id, post.id) or await _is_repost(post):
+                        continue
+                    WARM_SCHEDULE.record_drain(sub)
+                    # warm buffers hold PostRecords: no post.load() needed
+                    data = await extract_post_data(post)
+                    _remember_image(post)
+                    await self._send_cached(ctx, data, keyword or "", "WARM CACHE", nsfw)
+                    return True
 
         # 2️⃣ Local fallback bundle
         config = getattr(self.bot.config, "MEME_CACHE", {})
@@ -235,12 +278,19 @@ class Meme(commands.Cog):
         recent_ids = await get_recent_post_ids(ctx.channel.id)
 
         if keyword is None:
-            all_subs = get_guild_subreddits(ctx.guild.id, "sfw")
-            rand_sub = random.choice(all_subs)
-            try:
-                post = await simple_random_meme(self.reddit, rand_sub)
-            except SubredditUnavailableError:
-                post = None
+            # 0️⃣ Pre-vetted guild pool: O(1), no Reddit request
+            post = pop_candidate(ctx.guild.id, nsfw=False, exclude=set(recent_ids))
+            picked_via = "pool"
+            if post:
+                rand_sub = post.subreddit_name
+            else:
+                all_subs = get_guild_subreddits(ctx.guild.id, "sfw")
+                rand_sub = random.choice(all_subs)
+                picked_via = "random"
+                try:
+                    post = await simple_random_meme(self.reddit, rand_sub)
+                except SubredditUnavailableError:
+                    post = None
             if not post:
                 if await self._try_cache_or_local(ctx, nsfw=False, keyword=keyword):
                     return
@@ -250,7 +300,7 @@ class Meme(commands.Cog):
                 )
             result = type("F", (), {})()
             result.source_subreddit = rand_sub
-            result.picked_via = "random"
+            result.picked_via = picked_via
             got_keyword = False
         else:
             result = await fetch_meme_util(
@@ -260,6 +310,7 @@ class Meme(commands.Cog):
                 keyword=keyword,
                 nsfw=False,
                 exclude_ids=recent_ids,
+                channel_id=ctx.channel.id,
             )
             post = getattr(result, "post", None)
             got_keyword = bool(keyword and result.picked_via in ("cache", "live"))
@@ -307,7 +358,7 @@ class Meme(commands.Cog):
                 "✅ No fresh memes right now—try again later!", ephemeral=True
             )
 
-        if hasattr(post, "load"):
+        if needs_load(post):
             try:
                 await post.load()
             except Exception:
@@ -377,12 +428,19 @@ class Meme(commands.Cog):
         recent_ids = await get_recent_post_ids(ctx.channel.id)
 
         if keyword is None:
-            all_subs = get_guild_subreddits(ctx.guild.id, "nsfw")
-            rand_sub = random.choice(all_subs)
-            try:
-                post = await simple_random_meme(self.reddit, rand_sub)
-            except SubredditUnavailableError:
-                post = None
+            # 0️⃣ Pre-vetted guild pool: O(1), no Reddit request
+            post = pop_candidate(ctx.guild.id, nsfw=True, exclude=set(recent_ids))
+            picked_via = "pool"
+            if post:
+                rand_sub = post.subreddit_name
+            else:
+                all_subs = get_guild_subreddits(ctx.guild.id, "nsfw")
+                rand_sub = random.choice(all_subs)
+                picked_via = "random"
+                try:
+                    post = await simple_random_meme(self.reddit, rand_sub)
+                except SubredditUnavailableError:
+                    post = None
             if not post:
                 if await self._try_cache_or_local(ctx, nsfw=True, keyword=keyword):
                     return
@@ -393,7 +451,7 @@ class Meme(commands.Cog):
                 )
             result = type("F", (), {})()
             result.source_subreddit = rand_sub
-            result.picked_via = "random"
+            result.picked_via = picked_via
             got_keyword = False
         else:
             result = await fetch_meme_util(
@@ -403,6 +461,7 @@ class Meme(commands.Cog):
                 keyword=keyword,
                 nsfw=True,
                 exclude_ids=recent_ids,
+                channel_id=ctx.channel.id,
             )
             post = getattr(result, "post", None)
             got_keyword = bool(keyword and result.picked_via in ("cache", "live"))
@@ -450,7 +509,7 @@ class Meme(commands.Cog):
                 "✅ No fresh NSFW memes right now—try again later!", ephemeral=True
             )
 
-        if hasattr(post, "load"):
+        if needs_load(post):
             try:
                 await post.load()
             except Exception:
@@ -555,6 +614,7 @@ class Meme(commands.Cog):
                     cache_mgr=cache_mgr,
                     nsfw=bool(getattr(sub, "over18", False)),
                     exclude_ids=recent_ids,
+                    channel_id=ctx.channel.id,
                 )
                 post = getattr(result, "post", None) if result else None
 
@@ -610,7 +670,7 @@ class Meme(commands.Cog):
                     f"✅ No fresh posts in r/{subreddit} right now—try again later!"
                 )
 
-            if hasattr(post, "load"):
+            if needs_load(post):
                 try:
                     await post.load()
                 except Exception:
@@ -0,0 +1,185 @@
+"""Per-guild pools of pre-vetted memes for instant ``/meme`` replies.
+
+Each ``(guild_id, nsfw)`` key holds a deque of :class:`PostRecord` objects
+drawn from the guild's configured subreddits.  Pools are topped up in the
+background, mostly from the warm cache buffers (no extra Reddit requests) and
+only fetching a listing on the warmup lane for subreddits that have no warm
+buffer yet.  ``/meme`` pops from the pool in O(1) and only falls back to a
+live fetch when the pool is empty.
+"""
+import asyncio
+import logging
+import random
+from collections import deque
+from typing import Container, Deque, Dict, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from memer.helpers.guild_subreddits import get_guild_subreddits
+from memer.helpers.image_hash import get_deduper
+from memer.helpers.post_record import PostRecord, as_record
+from memer.helpers.rate_limit import WARMUP
+from memer.helpers.reddit_config import CONFIG
+from memer.reddit_meme import (
+    HASH_CACHE,
+    ID_CACHE,
+    WARM_CACHE,
+    WARM_SCHEDULE,
+    _fetch_listing_with_retry,
+)
+
+log = logging.getLogger(__name__)
+
+PoolKey = Tuple[int, bool]
+
+POOLS: Dict[PoolKey, Deque[PostRecord]] = {}
+_refill_task: Optional[asyncio.Task] = None
+_refilling: Set[PoolKey] = set()
+_reddit = None
+
+_MEDIA_EXT = (".jpg", ".jpeg", ".png", ".gif", ".gifv", ".webm", ".mp4")
+_LISTINGS = ("hot", "new")
+
+
+def _is_candidate(record: PostRecord, nsfw: bool) -> bool:
+    if record.over_18 and not nsfw:
+        return False
+    if record.id in ID_CACHE or record.media_url in HASH_CACHE:
+        return False
+    return urlparse(record.media_url or "").path.lower().endswith(_MEDIA_EXT)
+
+
+def pop_candidate(
+    guild_id: int, nsfw: bool = False, exclude: Container[str] = ()
+) -> Optional[PostRecord]:
+    """Pop a not-yet-sent record for the guild, or ``None`` if the pool is dry.
+
+    An unknown key is registered so the background loop starts filling it.
+    """
+    key = (guild_id, nsfw)
+    pool = POOLS.get(key)
+    if pool is None:
+        POOLS[key] = deque()
+        _request_refill(key)
+        return None
+    while pool:
+        record = pool.popleft()
+        if record.id in exclude or record.id in ID_CACHE or record.media_url in HASH_CACHE:
+            continue
+        HASH_CACHE[record.media_url] = True
+        # pools are filled from warm buffers, so a pop is warm demand too
+        WARM_SCHEDULE.record_drain(record.subreddit_name)
+        deduper = get_deduper()
+        if deduper is not None:
+            deduper.remember(record)
+        if len(pool) < _target_size() // 2:
+            _request_refill(key)
+        return record
+    _request_refill(key)
+    return None
+
+
+def _target_size() -> int:
+    return CONFIG.get("pool_target_size", 20)
+
+
+async def _fetch_records(reddit, name: str, limit: int = 50):
+    sub = await reddit.subreddit(name)
+    want = name.lower()
+    records = []
+    async for p in _fetch_listing_with_retry(sub, "hot", limit, lane=WARMUP):
+        if getattr(getattr(p, "subreddit", None), "display_name", "").lower() != want:
+            continue
+        record = as_record(p)
+        if record is not None:
+            records.append(record)
+    return records
+
+
+async def refill(reddit, guild_id: int, nsfw: bool) -> int:
+    """Top up one pool to ``pool_target_size``; return how many were added."""
+    key = (guild_id, nsfw)
+    pool = POOLS.setdefault(key, deque())
+    target = _target_size()
+    need = target - len(pool)
+    if need <= 0:
+        return 0
+
+    subs = get_guild_subreddits(guild_id, "nsfw" if nsfw else "sfw")
+    candidates = []
+    cold = []
+    for name in subs:
+        bufs = [WARM_CACHE.get(f"{name}_{listing}") for listing in _LISTINGS]
+        bufs = [b for b in bufs if b]
+        if not bufs:
+            cold.append(name)
+        for buf in bufs:
+            # read-only: leave the warm buffers intact for other consumers
+            candidates.extend(buf)
+
+    if not candidates and cold and reddit is not None:
+        for name in random.sample(cold, min(3, len(cold))):
+            try:
+                candidates.extend(await _fetch_records(reddit, name))
+            except Exception as e:
+                log.debug("Pool refill fetch failed for r/%s: %s", name, e)
+
+    queued = {r.id for r in pool}
+    random.shuffle(candidates)
+    deduper = get_deduper()
+    added = 0
+    for record in candidates:
+        if added >= need:
+            break
+        if record.id in queued or not _is_candidate(record, nsfw):
+            continue
+        # Refill runs off the request path, so the slow image check lives here.
+        if deduper is not None and await deduper.is_repost(record):
+            continue
+        pool.append(record)
+        queued.add(record.id)
+        added += 1
+    log.debug("Pool %s topped up with %d posts (%d total)", key, added, len(pool))
+    return added
+
+
+async def _refill_one(key: PoolKey) -> None:
+    try:
+        await refill(_reddit, *key)
+    except Exception as e:
+        log.warning("Pool refill failed for %s: %s", key, e)
+    finally:
+        _refilling.discard(key)
+
+
+def _request_refill(key: PoolKey) -> None:
+    """Kick off a refill for ``key`` right away if the loop is running."""
+    if _refill_task is None or _refill_task.done() or key in _refilling:
+        return
+    _refilling.add(key)
+    asyncio.create_task(_refill_one(key))
+
+
+async def start_pool_refill(reddit, interval: Optional[int] = None) -> None:
+    global _refill_task, _reddit
+    if _refill_task and not _refill_task.done():
+        log.debug("Pool refill already running")
+        return
+    _reddit = reddit
+
+    async def _loop():
+        while True:
+            for key in list(POOLS):
+                if key not in _refilling:
+                    _refilling.add(key)
+                    await _refill_one(key)
+            await asyncio.sleep(CONFIG.get("pool_refill_interval", interval or 30))
+
+    _refill_task = asyncio.create_task(_loop())
+
+
+async def stop_pool_refill() -> None:
+    global _refill_task
+    if _refill_task:
+        log.info("Stopping candidate pool refill task")
+        _refill_task.cancel()
+        _refill_task = None
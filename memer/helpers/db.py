@@ -3,7 +3,8 @@ import os
 import time
 import asyncio
 import contextlib
-from typing import List, Optional
+from collections import OrderedDict
+from typing import List, Optional, Set
 
 __all__ = [
     "init",
@@ -26,6 +27,15 @@ _flusher_task: Optional[asyncio.Task] = None
 
 _FLUSH_INTERVAL = 5  # seconds
 
+# Write-through index of recently sent post IDs: an LRU of channels, each
+# holding its newest ``_MAX_IDS_PER_CHANNEL`` post IDs (oldest first).  It
+# includes records still waiting in ``_queue``, so lookups never miss a post
+# just because the flusher hasn't run yet.
+_MAX_CHANNELS = int(os.getenv("MEME_SEEN_MAX_CHANNELS", "1000"))
+_MAX_IDS_PER_CHANNEL = int(os.getenv("MEME_SEEN_MAX_IDS", "500"))
+_seen: "OrderedDict[int, OrderedDict[str, None]]" = OrderedDict()
+_loaded: Set[int] = set()
+
 
 async def init() -> None:
     """Initialize the shared aiosqlite connection and ensure tables exist."""
@@ -94,6 +104,62 @@ async def close() -> None:
         await _conn.close()
         _conn = None
 
+    _seen.clear()
+    _loaded.clear()
+
+
+def _channel_ids(channel_id: int) -> "OrderedDict[str, None]":
+    """Return (and mark most recently used) the index entry for a channel."""
+    ids = _seen.get(channel_id)
+    if ids is None:
+        ids = _seen[channel_id] = OrderedDict()
+        while len(_seen) > _MAX_CHANNELS:
+            evicted, _ = _seen.popitem(last=False)
+            _loaded.discard(evicted)
+    else:
+        _seen.move_to_end(channel_id)
+    return ids
+
+
+def _remember(channel_id: int, post_id: str) -> None:
+    ids = _channel_ids(channel_id)
+    ids[post_id] = None
+    ids.move_to_end(post_id)
+    while len(ids) > _MAX_IDS_PER_CHANNEL:
+        ids.popitem(last=False)
+
+
+async def _ensure_loaded(channel_id: int) -> "OrderedDict[str, None]":
+    """Seed a channel's index from SQLite the first time it's looked at."""
+    ids = _channel_ids(channel_id)
+    if channel_id in _loaded or _conn is None:
+        return ids
+
+    async with _conn.execute(
+        """
+          SELECT post_id
+          FROM meme_messages
+          WHERE channel_id = ? AND post_id IS NOT NULL
+          ORDER BY timestamp DESC, rowid DESC
+          LIMIT ?
+        """,
+        (channel_id, _MAX_IDS_PER_CHANNEL),
+    ) as cursor:
+        rows = await cursor.fetchall()
+
+    # stored rows are older than anything registered in memory since startup
+    merged: "OrderedDict[str, None]" = OrderedDict(
+        (r["post_id"], None) for r in reversed(rows)
+    )
+    for pid in ids:
+        merged.pop(pid, None)
+        merged[pid] = None
+    while len(merged) > _MAX_IDS_PER_CHANNEL:
+        merged.popitem(last=False)
+    _seen[channel_id] = merged
+    _loaded.add(channel_id)
+    return merged
+
 
 def register_meme_message(
     message_id: str,
@@ -118,49 +184,34 @@ def register_meme_message(
             int(time.time()),
         )
     )
+    if post_id:
+        _remember(channel_id, post_id)
 
 
 async def get_recent_post_ids(channel_id: int, limit: Optional[int] = None) -> List[str]:
-    """Return recent post IDs for the given channel."""
+    """Return recent post IDs for the given channel, newest first.
+
+    Served from the in-memory index, so it covers at most the channel's
+    newest ``_MAX_IDS_PER_CHANNEL`` posts, including unflushed ones.
+    """
     if _conn is None:
         raise RuntimeError("Database not initialized")
 
-    query = (
-        """
-          SELECT post_id
-          FROM meme_messages
-          WHERE channel_id = ?
-          ORDER BY timestamp DESC
-        """
-    )
-    params: tuple = (channel_id,)
-    if limit is not None:
-        query += " LIMIT ?"
-        params = (channel_id, limit)
-
-    async with _conn.execute(query, params) as cursor:
-        rows = await cursor.fetchall()
-
-    return [r["post_id"] for r in rows if r["post_id"]]
+    ids = await _ensure_loaded(channel_id)
+    recent = list(reversed(ids))
+    return recent[:limit] if limit is not None else recent
 
 
 async def has_post_been_sent(channel_id: int, post_id: str) -> bool:
-    """Return True if a post with ``post_id`` was sent in ``channel_id``."""
+    """Return True if a post with ``post_id`` was sent in ``channel_id``.
+
+    O(1) against the in-memory index once the channel has been seeded.
+    """
     if _conn is None:
         return False
 
-    async with _conn.execute(
-        """
-          SELECT 1
-          FROM meme_messages
-          WHERE channel_id = ? AND post_id = ?
-          LIMIT 1
-        """,
-        (channel_id, post_id),
-    ) as cursor:
-        row = await cursor.fetchone()
-
-    return row is not None
+    ids = await _ensure_loaded(channel_id)
+    return post_id in ids
 
 
 async def _flush_once() -> None:
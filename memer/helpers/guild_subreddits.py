@@ -1,10 +1,20 @@
 import os
 import json
+import logging
+from collections import Counter
+
+log = logging.getLogger(__name__)
 
 # Cache for guild subreddit data loaded from disk once at module import
 _CACHE = None
 _DIRTY = False
 
+# How many lists (DEFAULTS plus every guild's own) reference each subreddit,
+# keyed by lowercased name, so warmup can follow the union of all guilds.
+_REFCOUNTS = None
+_SPELLING = {}
+_LISTENERS = []
+
 DATA_FILE = "data/guild_subreddits.json"
 DEFAULTS = {
     "sfw": [
@@ -18,6 +28,8 @@ DEFAULTS = {
         "Rule34LoL", "funhornymemes", "spicymemes"
     ]
 }
+# Always warmed, whether or not any guild's list still has them.
+MANDATORY = ("memes", "nsfwmeme")
 
 
 def _load_from_disk():
@@ -33,6 +45,45 @@ def _ensure_loaded():
         _CACHE = _load_from_disk()
 
 
+def _build_refcounts():
+    counts = Counter()
+    for lists in [DEFAULTS] + list(_CACHE.values()):
+        for names in lists.values():
+            for name in names:
+                counts[name.lower()] += 1
+                _SPELLING.setdefault(name.lower(), name)
+    return counts
+
+
+def _ensure_refcounts():
+    global _REFCOUNTS
+    _ensure_loaded()
+    if _REFCOUNTS is None:
+        _REFCOUNTS = _build_refcounts()
+
+
+def _notify(name, added):
+    for callback in list(_LISTENERS):
+        try:
+            callback(name, added)
+        except Exception:
+            log.exception("Subreddit change listener failed for %s", name)
+
+
+def _ref(name, delta):
+    _ensure_refcounts()
+    key = name.lower()
+    before = _REFCOUNTS[key]
+    _REFCOUNTS[key] = before + delta
+    _SPELLING.setdefault(key, name)
+    if _REFCOUNTS[key] <= 0:
+        del _REFCOUNTS[key]
+        if before > 0:
+            _notify(_SPELLING.pop(key, name), False)
+    elif before <= 0:
+        _notify(name, True)
+
+
 def _save_to_disk():
     global _DIRTY
     if not _DIRTY:
@@ -55,13 +106,18 @@ def add_guild_subreddit(guild_id, name, category):
     global _DIRTY
     _ensure_loaded()
     gid = str(guild_id)
+    _ensure_refcounts()
     if gid not in _CACHE:
         _CACHE[gid] = {
             "sfw": DEFAULTS["sfw"].copy(),
             "nsfw": DEFAULTS["nsfw"].copy(),
         }
+        for names in _CACHE[gid].values():
+            for sub in names:
+                _ref(sub, +1)
     if name not in _CACHE[gid][category]:
         _CACHE[gid][category].append(name)
+        _ref(name, +1)
         _DIRTY = True
 
 
@@ -70,7 +126,9 @@ def remove_guild_subreddit(guild_id, name, category):
     _ensure_loaded()
     gid = str(guild_id)
     if gid in _CACHE and name in _CACHE[gid][category]:
+        _ensure_refcounts()
         _CACHE[gid][category].remove(name)
+        _ref(name, -1)
         _DIRTY = True
 
 
@@ -80,9 +138,35 @@ def list_guild_subreddits(guild_id, category):
 
 def refresh_cache():
     """Reload cache from disk and reset dirty flag."""
-    global _CACHE, _DIRTY
+    global _CACHE, _DIRTY, _REFCOUNTS
+    before = set(_REFCOUNTS or ())
     _CACHE = _load_from_disk()
     _DIRTY = False
+    if _REFCOUNTS is not None:
+        spelling = dict(_SPELLING)
+        _REFCOUNTS = _build_refcounts()
+        for key in before - set(_REFCOUNTS):
+            _notify(spelling.get(key, key), False)
+            _SPELLING.pop(key, None)
+        for key in set(_REFCOUNTS) - before:
+            _notify(_SPELLING[key], True)
+
+
+def all_guild_subreddits():
+    """Union of DEFAULTS and every guild's subreddits (both categories)."""
+    _ensure_refcounts()
+    return [_SPELLING[key] for key in _REFCOUNTS]
+
+
+def subreddit_refcount(name):
+    _ensure_refcounts()
+    return _REFCOUNTS.get(name.lower(), 0)
+
+
+def on_subreddits_changed(callback):
+    """Call ``callback(name, added)`` when a sub enters or leaves the union."""
+    if callback not in _LISTENERS:
+        _LISTENERS.append(callback)
 
 
 def persist_cache():
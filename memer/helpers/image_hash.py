@@ -0,0 +1,289 @@
+"""Perceptual-hash (dHash) repost detection.
+
+``HASH_CACHE`` only catches the exact same media URL.  The same meme posted
+to several subreddits gets a different ``i.redd.it`` URL each time, so this
+module compares what the images *look like* instead: a small thumbnail is
+downloaded over a pooled aiohttp session, reduced to a 64-bit difference hash
+in a process pool (off the event loop), and looked up in a BK-tree of
+recently sent hashes.  Two images within ``dup_threshold`` bits of each other
+are treated as the same meme.
+
+The stage is optional: it is off unless ``phash_enabled`` is set in
+``reddit_meme.config.yml``, and needs Pillow installed.
+"""
+import asyncio
+import io
+import logging
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from html import unescape
+from typing import Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+
+from memer.helpers.reddit_config import CONFIG
+
+try:
+    from PIL import Image
+except ImportError:  # optional dependency
+    Image = None
+
+log = logging.getLogger(__name__)
+
+PIL_AVAILABLE = Image is not None
+
+_IMAGE_EXT = (".jpg", ".jpeg", ".png", ".gif", ".webp")
+_THUMB_MIN_WIDTH = 108
+
+
+def dhash_bytes(data: bytes, hash_size: int = 8) -> int:
+    """Return the difference hash of an encoded image as an int.
+
+    Runs in a worker process, so it must stay a plain top-level function.
+    """
+    with Image.open(io.BytesIO(data)) as img:
+        small = img.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+        px = small.tobytes()
+    value = 0
+    width = hash_size + 1
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = px[row * width + col]
+            right = px[row * width + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class _Node:
+    __slots__ = ("hash", "key", "children")
+
+    def __init__(self, hash_: int, key: str):
+        self.hash = hash_
+        self.key = key
+        self.children: Dict[int, "_Node"] = {}
+
+
+class BKTree:
+    """Burkhard–Keller tree over Hamming distance for near-match lookups."""
+
+    def __init__(self):
+        self._root: Optional[_Node] = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, hash_: int, key: str) -> None:
+        if self._root is None:
+            self._root = _Node(hash_, key)
+            self._size = 1
+            return
+        node = self._root
+        while True:
+            dist = hamming(hash_, node.hash)
+            if dist == 0:
+                node.key = key
+                return
+            child = node.children.get(dist)
+            if child is None:
+                node.children[dist] = _Node(hash_, key)
+                self._size += 1
+                return
+            node = child
+
+    def search(self, hash_: int, threshold: int) -> List[Tuple[int, str]]:
+        """Return ``(distance, key)`` for every entry within ``threshold``."""
+        if self._root is None:
+            return []
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            dist = hamming(hash_, node.hash)
+            if dist <= threshold:
+                found.append((dist, node.key))
+            for d in range(max(dist - threshold, 0), dist + threshold + 1):
+                child = node.children.get(d)
+                if child is not None:
+                    stack.append(child)
+        return found
+
+
+def _post_key(post) -> Optional[str]:
+    if isinstance(post, dict):
+        return post.get("post_id")
+    return getattr(post, "id", None)
+
+
+def thumbnail_url(post) -> Optional[str]:
+    """Pick the smallest usable image for hashing ``post`` (or a cache dict)."""
+    if isinstance(post, dict):
+        url = post.get("media_url") or post.get("url")
+        return url if url and urlparse(url).path.lower().endswith(_IMAGE_EXT) else None
+
+    preview = getattr(post, "preview", None)
+    if isinstance(preview, dict):
+        images = preview.get("images") or []
+        if images:
+            for res in images[0].get("resolutions") or []:
+                if res.get("width", 0) >= _THUMB_MIN_WIDTH and res.get("url"):
+                    return unescape(res["url"])
+            source = images[0].get("source") or {}
+            if source.get("url"):
+                return unescape(source["url"])
+
+    thumb = getattr(post, "thumbnail", None)
+    if isinstance(thumb, str) and thumb.startswith("http"):
+        return thumb
+
+    url = getattr(post, "media_url", None) or getattr(post, "url", None)
+    if url and urlparse(url).path.lower().endswith(_IMAGE_EXT):
+        return url
+    return None
+
+
+class PerceptualDeduper:
+    def __init__(
+        self,
+        threshold: int = 5,
+        max_items: int = 5000,
+        workers: int = 2,
+        timeout: float = 3.0,
+        max_bytes: int = 2 * 1024 * 1024,
+    ):
+        self.threshold = threshold
+        self.max_items = max_items
+        self.workers = workers
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.tree = BKTree()
+        self.stats: Dict[str, int] = defaultdict(int)
+        self._recent: Deque[Tuple[int, str]] = deque(maxlen=max_items)
+        self._hashes: "OrderedDict[str, Optional[int]]" = OrderedDict()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._executor: Optional[Executor] = None
+
+    async def _download(self, url: str) -> Optional[bytes]:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=8),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        async with self._session.get(url) as resp:
+            if resp.status != 200:
+                return None
+            if (resp.content_length or 0) > self.max_bytes:
+                return None
+            return await resp.read()
+
+    async def _hash_bytes(self, data: bytes) -> int:
+        if self.workers <= 0:
+            return await asyncio.to_thread(dhash_bytes, data)
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, dhash_bytes, data)
+
+    async def hash_url(self, url: str) -> Optional[int]:
+        """Return the dHash for ``url``, remembering recent results."""
+        if url in self._hashes:
+            self._hashes.move_to_end(url)
+            return self._hashes[url]
+        value = None
+        try:
+            data = await self._download(url)
+            if data:
+                value = await self._hash_bytes(data)
+                self.stats["hashed"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            log.debug("Perceptual hash failed for %s: %s", url, e)
+        self._hashes[url] = value
+        while len(self._hashes) > 2048:
+            self._hashes.popitem(last=False)
+        return value
+
+    async def is_repost(self, post) -> bool:
+        """True if ``post`` looks like an image that was already sent."""
+        url = thumbnail_url(post)
+        if not url:
+            return False
+        return self._matches(post, await self.hash_url(url))
+
+    def known_repost(self, post) -> bool:
+        """Like :meth:`is_repost`, but only for images already hashed.
+
+        Never downloads, so it is cheap enough to run over a whole candidate
+        list; posts whose hash isn't known yet count as fresh.
+        """
+        url = thumbnail_url(post)
+        return bool(url) and self._matches(post, self._hashes.get(url))
+
+    def _matches(self, post, value: Optional[int]) -> bool:
+        if value is None:
+            return False
+        self.stats["checked"] += 1
+        own = _post_key(post)
+        if any(key != own for _, key in self.tree.search(value, self.threshold)):
+            self.stats["reposts"] += 1
+            return True
+        return False
+
+    def remember(self, post) -> None:
+        """Add a sent post's hash (if already computed) to the tree."""
+        url = thumbnail_url(post)
+        key = _post_key(post)
+        value = self._hashes.get(url) if url else None
+        if value is None or key is None:
+            return
+        self.tree.add(value, key)
+        self._recent.append((value, key))
+        if len(self.tree) >= 2 * self.max_items:
+            # BK-trees can't delete; rebuild from the most recent hashes.
+            self.tree = BKTree()
+            for h, k in self._recent:
+                self.tree.add(h, k)
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_deduper: Optional[PerceptualDeduper] = None
+_warned_no_pil = False
+
+
+def get_deduper() -> Optional[PerceptualDeduper]:
+    """Return the shared deduper, or ``None`` when the stage is disabled."""
+    global _deduper, _warned_no_pil
+    if not CONFIG.get("phash_enabled", False):
+        return None
+    if not PIL_AVAILABLE:
+        if not _warned_no_pil:
+            log.warning("phash_enabled is set but Pillow is not installed; skipping perceptual dedup")
+            _warned_no_pil = True
+        return None
+    if _deduper is None:
+        _deduper = PerceptualDeduper(
+            threshold=CONFIG.get("dup_threshold", 5),
+            max_items=CONFIG.get("phash_max_items", 5000),
+            workers=CONFIG.get("phash_workers", 2),
+            timeout=CONFIG.get("phash_timeout", 3),
+        )
+    return _deduper
+
+
+async def close_deduper() -> None:
+    global _deduper
+    if _deduper is not None:
+        await _deduper.close()
+    _deduper = None
@@ -0,0 +1,131 @@
+"""In-memory inverted index over the titles of cached posts.
+
+The RAM and disk caches are keyed by the exact keyword that was fetched, so
+``/meme cat`` can't reuse posts cached under ``cats`` or ``__random__`` (or
+sitting in a warm buffer) even when their titles say "cat".  Every post that
+enters one of those caches is also added here, tokenized and lightly
+stemmed, so the keyword path can find matches by title without a Reddit call.
+
+Posts are stored as :class:`PostRecord` objects and the index keeps at most
+``max_posts`` of them; the oldest additions are evicted first.
+"""
+import logging
+import re
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Union
+
+from memer.helpers.post_record import PostRecord, as_record
+from memer.helpers.reddit_config import CONFIG
+
+log = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _stem(token: str) -> str:
+    """Fold simple English plurals so "cats" and "cat" share a term."""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 4 and token.endswith(("ches", "shes", "xes", "sses")):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> Set[str]:
+    return {_stem(t) for t in _TOKEN_RE.findall((text or "").lower())}
+
+
+class KeywordIndex:
+    def __init__(self, max_posts: int = 20000):
+        self.max_posts = max_posts
+        self.postings: Dict[str, Set[str]] = {}
+        self.posts: "OrderedDict[str, PostRecord]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.posts)
+
+    def add(self, post: Union[dict, PostRecord]) -> bool:
+        """Index one post dict or record; return False if it was skipped."""
+        try:
+            record = PostRecord.from_dict(post) if isinstance(post, dict) else as_record(post)
+        except (KeyError, TypeError, ValueError):
+            return False
+        if record is None or not record.id or record.id in self.posts:
+            return False
+        self.posts[record.id] = record
+        for term in tokenize(record.title):
+            self.postings.setdefault(term, set()).add(record.id)
+        while len(self.posts) > self.max_posts:
+            self.remove(next(iter(self.posts)))
+        return True
+
+    def add_many(self, posts: Iterable[Union[dict, PostRecord]]) -> int:
+        return sum(self.add(p) for p in posts)
+
+    def remove(self, post_id: str) -> None:
+        record = self.posts.pop(post_id, None)
+        if record is None:
+            return
+        for term in tokenize(record.title):
+            ids = self.postings.get(term)
+            if ids is not None:
+                ids.discard(post_id)
+                if not ids:
+                    del self.postings[term]
+
+    def search(
+        self,
+        keyword: str,
+        nsfw: bool = False,
+        subreddits: Optional[Iterable[str]] = None,
+    ) -> List[dict]:
+        """Return cache-shaped dicts whose titles contain every keyword term."""
+        terms = tokenize(keyword)
+        if not terms:
+            return []
+        # intersect starting from the rarest term
+        sets = sorted((self.postings.get(t, set()) for t in terms), key=len)
+        ids = set(sets[0])
+        for other in sets[1:]:
+            ids &= other
+            if not ids:
+                break
+        wanted = {s.lower() for s in subreddits} if subreddits is not None else None
+        found = []
+        for pid in ids:
+            record = self.posts[pid]
+            if record.over_18 != nsfw:
+                continue
+            if wanted is not None and record.subreddit_name.lower() not in wanted:
+                continue
+            found.append(record.to_dict())
+        if found:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return found
+
+    def clear(self) -> None:
+        self.postings.clear()
+        self.posts.clear()
+        self.hits = self.misses = 0
+
+    def summary(self) -> str:
+        lookups = self.hits + self.misses
+        rate = f"{self.hits / lookups:.0%}" if lookups else "n/a"
+        return f"{len(self.posts)} posts, {len(self.postings)} terms, hit rate {rate}"
+
+
+_index: Optional[KeywordIndex] = None
+
+
+def get_keyword_index() -> KeywordIndex:
+    """Return the shared index fed by the RAM, disk and warm caches."""
+    global _index
+    if _index is None:
+        _index = KeywordIndex(max_posts=CONFIG.get("keyword_index_max_posts", 20000))
+    return _index
@@ -3,8 +3,16 @@ from discord.ext import tasks
 from discord import app_commands
 from discord.ext.commands import Context
 from .reddit_cache import RedditCacheManager
+from .refresh_planner import RefreshPlanner
 from .meme_utils import extract_post_data
+from .rate_limit import throttle, get_scheduler, REFRESH
 from memer.helpers.guild_subreddits import DEFAULTS as SUB_DEFAULTS
+from memer.reddit_meme import (
+    WARM_SCHEDULE,
+    coalesce_summary,
+    dedup_filter_summary,
+    random_capability_summary,
+)
 import yaml
 import os
 import logging
@@ -38,16 +46,28 @@ class MemeCacheService:
     def __init__(self, reddit, config=None):
         config = config or {}
 
-        self.max_ram_posts = config.get("max_ram_posts", 100)
+        self.max_ram_posts = config.get("max_ram_posts", 2000)
         self.refresh_minutes = config.get("refresh_minutes", 15)
         self.disk_file = config.get("disk_file", "cache/meme_cache.db")
 
         self.reddit = reddit
         self.cache_mgr = RedditCacheManager(
             ram_ttl=config.get("ram_cache_ttl", 900),
+            ram_hard_ttl=config.get("ram_cache_hard_ttl", 2700),
             disk_ttl=config.get("disk_cache_ttl", 3600),
             keyword_failures=config.get("keyword_disable_after", 1),
             keyword_ttl=config.get("keyword_disable_ttl", 900),
+            write_queue_size=config.get("write_queue_size", 500),
+            write_interval=config.get("write_interval", 2.0),
+            max_ram_posts=self.max_ram_posts,
+            max_ram_posts_per_keyword=config.get("max_ram_posts_per_keyword", 200),
+            ram_sweep_interval=config.get("ram_sweep_interval", 60),
+            revalidate_fn=self._fetch_keyword_posts,
+            demand=RefreshPlanner(
+                half_life=config.get("refresh_half_life", 3600),
+                top_k=config.get("refresh_top_k", 10),
+                request_budget=config.get("refresh_request_budget", 120),
+            ),
         )
         self._fetch_semaphore = asyncio.Semaphore(2)
         self._fallback_subs = SUB_DEFAULTS  # {"sfw": [...], "nsfw": [...]} 
@@ -81,19 +101,40 @@ class MemeCacheService:
             len(v["posts"]) for (k, nsfw), v in self.cache_mgr.ram_cache.items() if nsfw
         )
         async with self.cache_mgr.conn.execute(
-            "SELECT is_nsfw, COUNT(*) FROM meme_cache GROUP BY is_nsfw"
+            "SELECT is_nsfw, COUNT(*) FROM posts GROUP BY is_nsfw"
         ) as cur:
             rows = await cur.fetchall()
+        async with self.cache_mgr.conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT keyword) FROM keyword_posts"
+        ) as cur:
+            disk_links, disk_keywords = await cur.fetchone()
         disk_counts = {row[0]: row[1] for row in rows}
         disk_sfw = disk_counts.get(0, 0)
         disk_nsfw = disk_counts.get(1, 0)
         disabled = len(self.cache_mgr.disabled_keywords)
+        writes = self.cache_mgr.write_stats
+        lanes = " | ".join(
+            f"{lane} q={st.depth} (max {st.max_depth}) n={st.requests} "
+            f"avg {st.avg_wait:.2f}s max {st.max_wait:.2f}s"
+            for lane, st in get_scheduler().get_stats().items()
+        )
 
         return (
             f"🧠 RAM cache: SFW {len(ram_sfw_kw)} keywords, {ram_sfw_posts} posts | "
             f"NSFW {len(ram_nsfw_kw)} keywords, {ram_nsfw_posts} posts\n"
-            f"💾 Disk cache: SFW {disk_sfw} posts | NSFW {disk_nsfw} posts\n"
-            f"⛔ Disabled keywords: {disabled}"
+            f"🧠 RAM tier: {self.cache_mgr.ram_cache.summary()}\n"
+            f"💾 Disk cache: SFW {disk_sfw} posts | NSFW {disk_nsfw} posts | "
+            f"{disk_links} entries across {disk_keywords} keywords\n"
+            f"⛔ Disabled keywords: {disabled}\n"
+            f"✍️ Disk writes: queued {writes['queued']}, written {writes['written']} "
+            f"in {writes['batches']} batches, dropped {writes['dropped']}\n"
+            f"🚦 Reddit lanes: {lanes}\n"
+            f"🎲 .random(): {random_capability_summary()}\n"
+            f"🤝 Single-flight: {coalesce_summary()}\n"
+            f"♻️ Refresh planner: {self.cache_mgr.demand.summary()}\n"
+            f"🔥 Warmup: {WARM_SCHEDULE.summary()}\n"
+            f"🔎 Title index: {self.cache_mgr.index.summary()}\n"
+            f"🧮 Dedup filters: {dedup_filter_summary()}"
         )
 
     async def _fetch_keyword_posts(self, keyword, nsfw):
@@ -104,6 +145,7 @@ class MemeCacheService:
                 try:
                     sub = await self.reddit.subreddit(sub_name)
                     sub_results = []
+                    await throttle(REFRESH)
                     async for post in sub.hot(limit=25):
                         if (
                             keyword.lower() in (post.title or "").lower()
@@ -118,11 +160,21 @@ class MemeCacheService:
         results = await asyncio.gather(*(fetch_sub(name) for name in subs))
         return [item for sublist in results for item in sublist]
 
+    def _refresh_cost(self, key) -> int:
+        """Reddit requests one _fetch_keyword_posts call makes for ``key``."""
+        _keyword, nsfw = key
+        return len(self._fallback_subs["nsfw" if nsfw else "sfw"])
+
     @tasks.loop(seconds=600)
     async def cache_refresh_loop(self):
-        keywords = self.cache_mgr.get_all_cached_keywords()
+        # only the most in-demand keywords, within this cycle's request budget
+        keywords = self.cache_mgr.demand.plan(
+            cost=self._refresh_cost,
+            skip=lambda key: self.cache_mgr.is_disabled(*key),
+        )
         if not keywords:
             return
+        log.debug("[Refresh] planned %s", keywords)
         await self.cache_mgr.refresh_keywords(keywords, self._fetch_keyword_posts)
 
     @tasks.loop(seconds=3600)
@@ -8,6 +8,8 @@ from urllib.parse import urlparse
 import discord
 import re
 
+from memer.helpers.post_record import PostRecord
+
 log = logging.getLogger(__name__)
 
 IMAGE_EXT = (".jpg", ".jpeg", ".png", ".gif")
@@ -86,6 +88,9 @@ async def send_meme(
     return await ctx.send(content=text, embed=embed)
 
 def get_image_url(post: Submission) -> str:
+    if isinstance(post, PostRecord):
+        # resolved once when the record was created
+        return post.media_url
     url = post.url
     log.debug("get_image_url: id=%s url=%s", post.id, url)
 
@@ -174,8 +179,42 @@ def get_reddit_url(url: str) -> str:
     log.debug("get_reddit_url input=%s", url)
     return url
 
-async def extract_post_data(post):
-    if hasattr(post, "load"):
+# Listing payloads always carry these keys (``None`` when not applicable), so
+# their absence means we're looking at a lazy, never-fetched Submission.
+_MEDIA_FIELDS = ("media", "secure_media", "preview")
+
+
+def needs_load(post) -> bool:
+    """Return True if ``post`` lacks the fields :func:`get_image_url` reads.
+
+    Submissions that came from a listing or search already contain the full
+    post JSON; only bare objects (e.g. ``reddit.submission(id)``) or galleries
+    missing their ``media_metadata`` need an extra ``load()`` round trip.
+    """
+    if isinstance(post, PostRecord) or not hasattr(post, "load"):
+        return False
+    if getattr(post, "_fetched", False):
+        return False
+    attrs = getattr(post, "__dict__", {})
+    if "url" not in attrs:
+        return True
+    if attrs.get("is_gallery") and "media_metadata" not in attrs:
+        return True
+    return not any(field in attrs for field in _MEDIA_FIELDS)
+
+
+async def extract_post_data(post, load: Optional[bool] = None):
+    """Return a plain dict describing ``post`` for caching and sending.
+
+    ``load`` controls the ``post.load()`` round trip: ``None`` (default) only
+    loads when :func:`needs_load` says the listing payload is incomplete,
+    ``True`` always loads and ``False`` never does.
+    """
+    if isinstance(post, PostRecord):
+        return post.to_dict()
+    if load is None:
+        load = needs_load(post)
+    if load and hasattr(post, "load"):
         try:
             await post.load()
         except Exception as e:
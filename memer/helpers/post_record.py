@@ -0,0 +1,132 @@
+"""Compact, detached snapshots of Reddit submissions.
+
+asyncpraw ``Submission`` objects keep the whole listing JSON plus a reference
+to the Reddit client alive.  Buffers that hold thousands of posts (the warm
+cache in particular) store :class:`PostRecord` instances instead: only the
+fields the send path needs, with the media URL resolved once at ingest.
+"""
+from html import unescape
+import logging
+from typing import Optional
+
+log = logging.getLogger(__name__)
+
+
+class _SubredditName(str):
+    """``str`` that also answers ``.display_name`` like a ``Subreddit``."""
+
+    __slots__ = ()
+
+    @property
+    def display_name(self) -> str:
+        return str(self)
+
+
+class PostRecord:
+    __slots__ = (
+        "id",
+        "subreddit_name",
+        "title",
+        "url",
+        "media_url",
+        "permalink",
+        "author",
+        "over_18",
+        "created_utc",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        subreddit_name: str,
+        title: str,
+        url: str,
+        media_url: str,
+        permalink: str,
+        author: str = "[deleted]",
+        over_18: bool = False,
+        created_utc: int = 0,
+    ):
+        self.id = id
+        self.subreddit_name = subreddit_name
+        self.title = title
+        self.url = url
+        self.media_url = media_url
+        self.permalink = permalink
+        self.author = author
+        self.over_18 = over_18
+        self.created_utc = created_utc
+
+    def __repr__(self) -> str:
+        return f"PostRecord(id={self.id!r}, subreddit={self.subreddit_name!r})"
+
+    @property
+    def subreddit(self) -> _SubredditName:
+        return _SubredditName(self.subreddit_name)
+
+    @classmethod
+    def from_submission(cls, post) -> "PostRecord":
+        """Snapshot ``post`` from its listing payload (no ``load()`` call)."""
+        if isinstance(post, cls):
+            return post
+        from memer.helpers.meme_utils import get_image_url
+
+        url = getattr(post, "url", "") or ""
+        try:
+            media_url = unescape(get_image_url(post))
+        except Exception as e:
+            log.debug("Failed to resolve media_url for post.id=%s: %s", getattr(post, "id", "?"), e)
+            media_url = url
+        author = getattr(post, "author", None)
+        sub = getattr(post, "subreddit", None)
+        return cls(
+            id=post.id,
+            subreddit_name=getattr(sub, "display_name", None) or str(sub or ""),
+            title=getattr(post, "title", "") or "",
+            url=url,
+            media_url=media_url,
+            permalink=getattr(post, "permalink", "") or "",
+            author=str(author) if author else "[deleted]",
+            over_18=bool(getattr(post, "over_18", False)),
+            created_utc=int(getattr(post, "created_utc", 0) or 0),
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PostRecord":
+        """Inverse of :meth:`to_dict`."""
+        return cls(
+            id=data["post_id"],
+            subreddit_name=data.get("subreddit") or "",
+            title=data.get("title") or "",
+            url=data.get("url") or "",
+            media_url=data.get("media_url") or data.get("url") or "",
+            permalink=data.get("permalink") or "",
+            author=data.get("author") or "[deleted]",
+            over_18=bool(data.get("is_nsfw", False)),
+            created_utc=int(data.get("created_utc") or 0),
+        )
+
+    def to_dict(self) -> dict:
+        """Return the same shape as :func:`extract_post_data`."""
+        return {
+            "post_id": self.id,
+            "subreddit": self.subreddit_name,
+            "title": self.title,
+            "url": self.url,
+            "media_url": self.media_url,
+            "permalink": self.permalink,
+            "author": self.author,
+            "is_nsfw": self.over_18,
+            "created_utc": self.created_utc,
+        }
+
+
+def as_record(post) -> Optional[PostRecord]:
+    """Return ``post`` as a :class:`PostRecord`, or ``None`` if it can't be."""
+    if post is None:
+        return None
+    try:
+        return PostRecord.from_submission(post)
+    except Exception as e:
+        log.debug("Could not snapshot post %r: %s", post, e)
+        return None
@@ -0,0 +1,136 @@
+"""Bounded RAM tier for :class:`RedditCacheManager`.
+
+Entries are ``{"posts": [...], "timestamp": ...}`` dicts keyed by
+``(keyword, nsfw)``, as before, but held in LRU order with a post budget:
+
+* every entry keeps at most ``max_posts_per_key`` posts (the newest, i.e.
+  the tail of the list), so the ``__random__`` list can't grow forever;
+* the whole tier holds at most ``max_posts`` posts; the least recently
+  used entries are evicted to make room;
+* entries older than ``ttl`` (the hard TTL) are dropped on read and by
+  :meth:`sweep`, which the manager runs periodically so unread keys don't
+  linger;
+* entries older than ``soft_ttl`` are still served but reported
+  :meth:`stale`, so the manager can refresh them in the background
+  (stale-while-revalidate);
+* ``on_drop`` is called with the key of every entry evicted or expired, so
+  the owner can forget per-key state along with it.
+
+``posts`` is kept in step by ``__setitem__``/``__delitem__``/``pop``/
+``popitem``, so plain dict operations on the cache don't skew the budget.
+"""
+import time
+from collections import OrderedDict, defaultdict
+from typing import Callable, Dict, Hashable, List, Optional
+
+
+class RamCache(OrderedDict):
+    def __init__(
+        self,
+        max_posts: int = 2000,
+        max_posts_per_key: int = 200,
+        ttl: float = 900,
+        soft_ttl: Optional[float] = None,
+        on_drop: Optional[Callable[[Hashable], None]] = None,
+    ):
+        super().__init__()
+        self.max_posts = max_posts
+        self.max_posts_per_key = max_posts_per_key
+        self.ttl = ttl
+        self.soft_ttl = ttl if soft_ttl is None else min(soft_ttl, ttl)
+        self.on_drop = on_drop
+        self.posts = 0
+        self.stats: Dict[str, int] = defaultdict(int)
+
+    def __setitem__(self, key: Hashable, entry: dict) -> None:
+        old = super().get(key)
+        if old is not None:
+            self.posts -= old["size"]
+        entry["size"] = len(entry["posts"])
+        super().__setitem__(key, entry)
+        self.posts += entry["size"]
+
+    def __delitem__(self, key: Hashable) -> None:
+        entry = super().__getitem__(key)
+        super().__delitem__(key)
+        self.posts -= entry["size"]
+
+    # OrderedDict's C pop()/popitem() don't go through __delitem__
+    def pop(self, key: Hashable, *default):
+        if key not in self:
+            return super().pop(key, *default)
+        entry = super().pop(key)
+        self.posts -= entry["size"]
+        return entry
+
+    def popitem(self, last: bool = True):
+        key, entry = super().popitem(last)
+        self.posts -= entry["size"]
+        return key, entry
+
+    def put(self, key: Hashable, posts: List[dict], now: Optional[float] = None) -> None:
+        if len(posts) > self.max_posts_per_key:
+            posts = posts[-self.max_posts_per_key:]
+        self.discard(key)  # re-insert at the most recently used end
+        self[key] = {"posts": posts, "timestamp": time.time() if now is None else now}
+        while self.posts > self.max_posts and len(self) > 1:
+            evicted, _ = self.popitem(last=False)
+            self.stats["evicted"] += 1
+            self._dropped(evicted)
+
+    def lookup(self, key: Hashable, now: Optional[float] = None) -> Optional[List[dict]]:
+        """Posts for ``key`` if present and fresh; counts the hit or miss."""
+        entry = super().get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        age = (time.time() if now is None else now) - entry["timestamp"]
+        if age > self.ttl:
+            self.discard(key)
+            self.stats["expired"] += 1
+            self._dropped(key)
+            self.stats["misses"] += 1
+            return None
+        self.move_to_end(key)
+        self.stats["hits"] += 1
+        if age > self.soft_ttl:
+            self.stats["stale"] += 1
+        return entry["posts"]
+
+    def stale(self, key: Hashable, now: Optional[float] = None) -> bool:
+        """True if ``key`` is past its soft TTL (but still servable)."""
+        entry = super().get(key)
+        now = time.time() if now is None else now
+        return entry is not None and now - entry["timestamp"] > self.soft_ttl
+
+    def discard(self, key: Hashable) -> None:
+        self.pop(key, None)
+
+    def _dropped(self, key: Hashable) -> None:
+        if self.on_drop is not None:
+            self.on_drop(key)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Drop every expired entry; return how many went."""
+        cutoff = (time.time() if now is None else now) - self.ttl
+        stale = [k for k, v in self.items() if v["timestamp"] < cutoff]
+        for key in stale:
+            self.discard(key)
+            self._dropped(key)
+        self.stats["expired"] += len(stale)
+        return len(stale)
+
+    def clear(self) -> None:
+        super().clear()
+        self.posts = 0
+
+    def summary(self) -> str:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        rate = f"{self.stats['hits'] / lookups:.0%}" if lookups else "n/a"
+        return (
+            f"{self.posts}/{self.max_posts} posts, hit rate {rate} "
+            f"({self.stats['hits']} hits, {self.stats['misses']} misses), "
+            f"evicted {self.stats['evicted']}, expired {self.stats['expired']}, "
+            f"served stale {self.stats['stale']} (revalidated {self.stats['revalidated']}, "
+            f"failed {self.stats['revalidate_failed']})"
+        )
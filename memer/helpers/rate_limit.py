@@ -1,18 +1,310 @@
+"""Token-bucket rate limiting for Reddit API calls.
+
+Reddit grants OAuth clients roughly 100 requests per minute, averaged over a
+rolling window and reported back through the ``X-Ratelimit-Remaining`` and
+``X-Ratelimit-Reset`` response headers.  Rather than serialising every call
+behind a fixed one second gap, requests draw from a global token bucket sized
+to that budget, which allows short bursts while staying under the real limit.
+
+Each request also belongs to a named *budget*.  Background (warmup/refresh)
+traffic draws from its own, smaller bucket as well, so it can never consume
+the whole allowance, and must leave a small reserve of global tokens for
+interactive callers.  Interactive command traffic is only limited by the
+global bucket, so a user's request can use everything background leaves.
+
+Callers don't pick a budget directly; they ``throttle()`` on a *lane*
+(interactive, refresh or warmup).  The :class:`RequestScheduler` holds
+lower-priority lanes back while a higher-priority request is waiting, so a
+user's ``/meme`` never queues behind a warmup cycle.
+"""
 import asyncio
 import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Mapping, Optional
+
+from memer.helpers import reddit_config
 
 log = logging.getLogger(__name__)
 
-_last_request = 0.0
-_rate_lock = asyncio.Lock()
-
-async def throttle():
-    global _last_request
-    async with _rate_lock:
-        now = asyncio.get_event_loop().time()
-        elapsed = now - _last_request
-        wait = max(0, 1.0 - elapsed)
-        if wait:
-            log.debug("Throttling: sleeping %.3fs before next Reddit request", wait)
+DEFAULT_QPM = 100
+DEFAULT_BURST = 10
+DEFAULT_BACKGROUND_QPM = 60
+DEFAULT_INTERACTIVE_RESERVE = 2
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+# Lanes in priority order (highest first) and the budget each draws from.
+REFRESH = "refresh"
+WARMUP = "warmup"
+LANES = (INTERACTIVE, REFRESH, WARMUP)
+LANE_BUDGETS = {INTERACTIVE: INTERACTIVE, REFRESH: BACKGROUND, WARMUP: BACKGROUND}
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``rate`` tokens per second."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self._updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self._updated = now
+
+    def wait_time(self, now: float, need: float = 1.0) -> float:
+        """Return seconds until ``need`` tokens are available (0 if now)."""
+        self.refill(now)
+        if self.tokens >= need:
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        return (need - self.tokens) / self.rate
+
+    def take(self, n: float = 1.0) -> None:
+        self.tokens -= n
+
+
+class RedditRateLimiter:
+    """Global Reddit budget plus a capped bucket for background traffic."""
+
+    def __init__(
+        self,
+        qpm: float = DEFAULT_QPM,
+        burst: int = DEFAULT_BURST,
+        background_qpm: float = DEFAULT_BACKGROUND_QPM,
+        interactive_reserve: int = DEFAULT_INTERACTIVE_RESERVE,
+    ):
+        self.qpm = qpm
+        self.interactive_reserve = interactive_reserve
+        self.global_bucket = TokenBucket(qpm / 60.0, burst)
+        # ``None``: no cap beyond the global bucket
+        self.budgets: Dict[str, Optional[TokenBucket]] = {
+            INTERACTIVE: None,
+            BACKGROUND: TokenBucket(max(min(background_qpm, qpm), 1) / 60.0, burst),
+        }
+        self.remaining: Optional[float] = None
+        self._reset_at: Optional[float] = None
+        self.requests: Dict[str, int] = defaultdict(int)
+        self.waited: Dict[str, float] = defaultdict(float)
+
+    def _global_wait(self, now: float, budget: str) -> float:
+        if self._reset_at is not None and now >= self._reset_at:
+            # Reddit's window rolled over; go back to the configured rate.
+            self.global_bucket.rate = self.qpm / 60.0
+            self._reset_at = None
+        if self.global_bucket.rate <= 0 and self._reset_at is not None:
+            return self._reset_at - now
+        need = 1.0 if budget == INTERACTIVE else 1.0 + self.interactive_reserve
+        return self.global_bucket.wait_time(now, need)
+
+    async def acquire(
+        self,
+        budget: str = INTERACTIVE,
+        gate: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> None:
+        """Wait until a request in ``budget`` may be sent to Reddit.
+
+        ``gate`` is awaited before every attempt to take a token; the
+        scheduler uses it to park background requests behind interactive ones.
+        """
+        if budget not in self.budgets:
+            raise ValueError(f"Unknown rate limit budget: {budget!r}")
+        bucket = self.budgets[budget]
+        start = time.monotonic()
+        while True:
+            if gate is not None:
+                await gate()
+            now = time.monotonic()
+            wait = self._global_wait(now, budget)
+            if bucket is not None:
+                wait = max(wait, bucket.wait_time(now))
+            if wait <= 0:
+                self.global_bucket.take()
+                if bucket is not None:
+                    bucket.take()
+                self.requests[budget] += 1
+                self.waited[budget] += now - start
+                return
+            log.debug("Throttling %s request: sleeping %.3fs", budget, wait)
             await asyncio.sleep(wait)
-        _last_request = asyncio.get_event_loop().time()
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """Adjust the global budget from Reddit's ``X-Ratelimit-*`` headers."""
+        lowered = {k.lower(): v for k, v in headers.items()}
+        if "x-ratelimit-remaining" not in lowered:
+            return
+        try:
+            remaining = float(lowered["x-ratelimit-remaining"])
+            reset = float(lowered.get("x-ratelimit-reset", 60))
+        except (TypeError, ValueError):
+            return
+        self.observe(remaining, reset)
+
+    def observe(self, remaining: float, reset_seconds: float) -> None:
+        """Record Reddit's remaining request count and seconds until reset."""
+        now = time.monotonic()
+        bucket = self.global_bucket
+        bucket.refill(now)
+        self.remaining = remaining
+        self._reset_at = now + max(reset_seconds, 0)
+        bucket.tokens = min(bucket.tokens, max(remaining, 0))
+        if remaining <= 0:
+            bucket.rate = 0.0
+            log.warning("Reddit rate limit exhausted; pausing %.0fs", reset_seconds)
+            return
+        # Never exceed the configured rate, but slow down if what's left of
+        # Reddit's window wouldn't cover it until the reset.
+        bucket.rate = min(self.qpm / 60.0, remaining / max(reset_seconds, 1.0))
+
+    def attach(self, reddit) -> bool:
+        """Feed response headers seen by an asyncpraw client into this limiter.
+
+        asyncprawcore parses the ``X-Ratelimit-*`` headers in
+        ``RateLimiter.update``; wrap that method on each of the client's
+        sessions so every response also updates our buckets.
+        """
+        attached = False
+        for attr in ("_core", "_read_only_core", "_authorized_core"):
+            core = getattr(reddit, attr, None)
+            core_limiter = getattr(core, "_rate_limiter", None)
+            if core_limiter is None or getattr(core_limiter, "_memer_attached", False):
+                continue
+            original = core_limiter.update
+
+            def update(*args, _original=original, **kwargs):
+                _original(*args, **kwargs)
+                headers = kwargs.get("response_headers", args[0] if args else None)
+                if headers is not None:
+                    self.update_from_headers(headers)
+
+            core_limiter.update = update
+            core_limiter._memer_attached = True
+            attached = True
+        return attached
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            name: {
+                "requests": self.requests[name],
+                "avg_wait": self.waited[name] / self.requests[name] if self.requests[name] else 0.0,
+                "tokens": (bucket or self.global_bucket).tokens,
+            }
+            for name, bucket in self.budgets.items()
+        }
+
+
+@dataclass
+class LaneStats:
+    depth: int = 0
+    max_depth: int = 0
+    requests: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    @property
+    def avg_wait(self) -> float:
+        return self.total_wait / self.requests if self.requests else 0.0
+
+
+class RequestScheduler:
+    """Priority lanes in front of :class:`RedditRateLimiter`.
+
+    A request in a lane only competes for tokens while no request in a
+    higher-priority lane is waiting; otherwise it parks until those drain.
+    """
+
+    def __init__(self, limiter: RedditRateLimiter):
+        self.limiter = limiter
+        self.lanes: Dict[str, LaneStats] = {lane: LaneStats() for lane in LANES}
+        self._parked: Dict[str, List[asyncio.Future]] = {lane: [] for lane in LANES}
+
+    def _higher_waiting(self, lane: str) -> bool:
+        for other in LANES:
+            if other == lane:
+                return False
+            if self.lanes[other].depth:
+                return True
+        return False
+
+    async def _gate(self, lane: str) -> None:
+        while self._higher_waiting(lane):
+            fut = asyncio.get_running_loop().create_future()
+            self._parked[lane].append(fut)
+            try:
+                await fut
+            finally:
+                if fut in self._parked[lane]:
+                    self._parked[lane].remove(fut)
+
+    def _wake_parked(self) -> None:
+        for lane in LANES:
+            if self._higher_waiting(lane):
+                continue
+            for fut in self._parked[lane]:
+                if not fut.done():
+                    fut.set_result(None)
+
+    async def acquire(self, lane: str = INTERACTIVE) -> None:
+        """Wait for a Reddit request slot in ``lane``."""
+        if lane not in self.lanes:
+            raise ValueError(f"Unknown request lane: {lane!r}")
+        stats = self.lanes[lane]
+        stats.depth += 1
+        stats.max_depth = max(stats.max_depth, stats.depth)
+        start = time.monotonic()
+        try:
+            await self.limiter.acquire(LANE_BUDGETS[lane], gate=lambda: self._gate(lane))
+        finally:
+            stats.depth -= 1
+            self._wake_parked()
+        waited = time.monotonic() - start
+        stats.requests += 1
+        stats.total_wait += waited
+        stats.max_wait = max(stats.max_wait, waited)
+
+    def get_stats(self) -> Dict[str, LaneStats]:
+        return dict(self.lanes)
+
+
+_limiter: Optional[RedditRateLimiter] = None
+_scheduler: Optional[RequestScheduler] = None
+
+
+def get_limiter() -> RedditRateLimiter:
+    """Return the shared limiter, creating it from ``reddit_meme`` config."""
+    global _limiter
+    if _limiter is None:
+        cfg = reddit_config.CONFIG
+        _limiter = RedditRateLimiter(
+            qpm=cfg.get("rate_limit_qpm", DEFAULT_QPM),
+            burst=cfg.get("rate_limit_burst", DEFAULT_BURST),
+            background_qpm=cfg.get("background_qpm", DEFAULT_BACKGROUND_QPM),
+            interactive_reserve=cfg.get("interactive_reserve", DEFAULT_INTERACTIVE_RESERVE),
+        )
+    return _limiter
+
+
+def get_scheduler() -> RequestScheduler:
+    """Return the shared lane scheduler wrapping :func:`get_limiter`."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = RequestScheduler(get_limiter())
+    return _scheduler
+
+
+def reset_limiter() -> None:
+    """Drop the shared limiter so the next call rebuilds it from config."""
+    global _limiter, _scheduler
+    _limiter = None
+    _scheduler = None
+
+
+async def throttle(lane: str = INTERACTIVE) -> None:
+    await get_scheduler().acquire(lane)
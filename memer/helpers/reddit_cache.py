@@ -1,60 +1,266 @@
 import os
+import re
+import json
+import random
 import asyncio
+import contextlib
 import time
-from typing import Dict, List, Optional, Tuple
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
 from collections import defaultdict
 
 import aiosqlite
 import logging
 
+from memer.helpers.keyword_index import KeywordIndex, get_keyword_index
+from memer.helpers.ram_cache import RamCache
+from memer.helpers.refresh_planner import RefreshPlanner, is_sentinel
+
 log = logging.getLogger(__name__)
 
 DB_PATH = os.getenv("MEME_CACHE_DB", "data/meme_cache.db")
 
+RevalidateFn = Callable[[str, bool], Awaitable[List[dict]]]
+
+_FTS_TOKEN_RE = re.compile(r"\w+")
+
+# One row per post, however many keywords it was cached under; the join
+# table says which (keyword, nsfw) caches hold it and when each was saved.
+# ``rand`` is a random 63-bit key fixed at insert; indexed per cache, it lets
+# sample_from_disk() jump to a random spot instead of loading every row.
+# ``id`` is an INTEGER PRIMARY KEY so VACUUM can't renumber the rowids the
+# FTS index points at.
+_SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS posts (
+        id INTEGER PRIMARY KEY,
+        post_id TEXT NOT NULL UNIQUE,
+        subreddit TEXT NOT NULL,
+        title TEXT,
+        url TEXT,
+        media_url TEXT,
+        author TEXT,
+        is_nsfw BOOLEAN,
+        created_utc INTEGER
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS keyword_posts (
+        keyword TEXT NOT NULL,
+        nsfw BOOLEAN NOT NULL,
+        post_id TEXT NOT NULL REFERENCES posts(post_id),
+        cached_at INTEGER,
+        rand INTEGER,
+        PRIMARY KEY (keyword, nsfw, post_id)
+    ) WITHOUT ROWID
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_keyword_posts_post ON keyword_posts(post_id)",
+    "CREATE INDEX IF NOT EXISTS idx_keyword_posts_cached_at ON keyword_posts(cached_at)",
+)
+
+_RAND_INDEX = "CREATE INDEX IF NOT EXISTS idx_keyword_posts_rand ON keyword_posts(keyword, nsfw, rand)"
+
+# External-content FTS5 index over posts.title, kept in sync by triggers.
+_FTS_SCHEMA = (
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+        title, content='posts', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS posts_fts_ai AFTER INSERT ON posts BEGIN
+        INSERT INTO posts_fts(rowid, title) VALUES (new.id, new.title);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS posts_fts_ad AFTER DELETE ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title) VALUES ('delete', old.id, old.title);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS posts_fts_au AFTER UPDATE OF title ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title) VALUES ('delete', old.id, old.title);
+        INSERT INTO posts_fts(rowid, title) VALUES (new.id, new.title);
+    END
+    ''',
+)
+
+# Rows shaped like the old single-table cache, which callers still expect.
+_SELECT_POSTS = (
+    "SELECT k.keyword, p.subreddit, p.post_id, p.title, p.url, p.media_url, "
+    "p.author, p.is_nsfw, p.created_utc, k.cached_at "
+    "FROM keyword_posts k JOIN posts p ON p.post_id = k.post_id"
+)
+
+_UPSERT_POST = '''
+    INSERT INTO posts (post_id, subreddit, title, url, media_url, author, is_nsfw, created_utc)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(post_id) DO UPDATE SET
+        subreddit = excluded.subreddit,
+        title = excluded.title,
+        url = excluded.url,
+        media_url = excluded.media_url,
+        author = excluded.author,
+        is_nsfw = excluded.is_nsfw,
+        created_utc = excluded.created_utc
+'''
+
+_UPSERT_KEYWORD = '''
+    INSERT INTO keyword_posts (keyword, nsfw, post_id, cached_at, rand)
+    VALUES (?, ?, ?, ?, abs(random()))
+    ON CONFLICT(keyword, nsfw, post_id) DO UPDATE SET cached_at = excluded.cached_at
+'''
+
 
 class RedditCacheManager:
-    def __init__(self, ram_ttl=900, disk_ttl=3600, keyword_failures=1, keyword_ttl=900):
+    def __init__(
+        self,
+        ram_ttl=900,
+        disk_ttl=3600,
+        keyword_failures=1,
+        keyword_ttl=900,
+        write_queue_size=500,
+        write_interval=2.0,
+        index: Optional[KeywordIndex] = None,
+        max_ram_posts=2000,
+        max_ram_posts_per_keyword=200,
+        ram_sweep_interval=60.0,
+        ram_hard_ttl=None,
+        revalidate_fn: Optional[RevalidateFn] = None,
+        demand: Optional[RefreshPlanner] = None,
+    ):
         self.ram_ttl = ram_ttl
         self.disk_ttl = disk_ttl
         self.keyword_failures = keyword_failures
         self.keyword_ttl = keyword_ttl
-
-        self.ram_cache: Dict[Tuple[str, bool], Dict] = {}
+        self.write_queue_size = write_queue_size
+        self.write_interval = write_interval
+        self.ram_sweep_interval = ram_sweep_interval
+        # RAM entries past ram_ttl are served stale and refreshed through
+        # revalidate_fn until ram_hard_ttl; without a hard TTL they just expire
+        self.revalidate_fn = revalidate_fn
+        self._revalidating: Dict[Tuple[str, bool], asyncio.Task] = {}
+        self._revalidated_at: Dict[Tuple[str, bool], float] = {}
+        # decayed per-keyword lookup counts that rank the periodic refresh
+        self.demand = demand if demand is not None else RefreshPlanner()
+        # title index shared with the warm buffers, queried across keywords
+        self.index = index if index is not None else get_keyword_index()
+
+        self.ram_cache = RamCache(
+            max_ram_posts,
+            max_ram_posts_per_keyword,
+            ttl=max(ram_hard_ttl or ram_ttl, ram_ttl),
+            soft_ttl=ram_ttl,
+            # an evicted or expired key starts over with a fresh entry
+            on_drop=lambda key: self._revalidated_at.pop(key, None),
+        )
         self.disabled_keywords: Dict[Tuple[str, bool], float] = {}
         self.failed_count: Dict[Tuple[str, bool], int] = defaultdict(int)
         self.lock = asyncio.Lock()
         self.conn: Optional[aiosqlite.Connection] = None
+        self.fts_enabled = False
+
+        # write-behind queue for saves coming from the interaction path
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self.write_stats: Dict[str, int] = defaultdict(int)
+        self._sweeper_task: Optional[asyncio.Task] = None
 
     async def init(self):
         self.conn = await aiosqlite.connect(DB_PATH)
         self.conn.row_factory = aiosqlite.Row
         await self._setup_db()
+        self._write_queue = asyncio.Queue(maxsize=self.write_queue_size)
+        self._writer_task = asyncio.create_task(self._writer())
+        self._sweeper_task = asyncio.create_task(self._sweeper())
 
     async def close(self):
+        for task in list(self._revalidating.values()):
+            task.cancel()
+        if self._revalidating:
+            await asyncio.gather(*self._revalidating.values(), return_exceptions=True)
+        if self._sweeper_task is not None:
+            self._sweeper_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._sweeper_task
+            self._sweeper_task = None
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._writer_task
+            self._writer_task = None
+        if self._write_queue is not None:
+            await self._flush_writes()
+            self._write_queue = None
         if self.conn:
             await self.conn.close()
             self.conn = None
 
     async def _setup_db(self):
+        for stmt in _SCHEMA:
+            await self.conn.execute(stmt)
+        await self._ensure_rand_column()
+        await self.conn.execute(_RAND_INDEX)
+        await self._migrate_legacy()
+        await self._setup_fts()
+        await self.conn.commit()
+
+    async def _ensure_rand_column(self):
+        async with self.conn.execute("PRAGMA table_info(keyword_posts)") as cur:
+            columns = {row[1] for row in await cur.fetchall()}
+        if "rand" not in columns:
+            await self.conn.execute("ALTER TABLE keyword_posts ADD COLUMN rand INTEGER")
+            await self.conn.execute("UPDATE keyword_posts SET rand = abs(random())")
+
+    async def _migrate_legacy(self):
+        """Move rows from the old one-row-per-post ``meme_cache`` table.
+
+        That table keyed rows by ``post_id`` alone, so only the last keyword
+        a post was saved under survived; what is left carries straight over.
+        """
+        async with self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'meme_cache'"
+        ) as cur:
+            if await cur.fetchone() is None:
+                return
         await self.conn.execute(
             '''
-                CREATE TABLE IF NOT EXISTS meme_cache (
-                    keyword TEXT NOT NULL,
-                    subreddit TEXT NOT NULL,
-                    post_id TEXT PRIMARY KEY,
-                    title TEXT,
-                    url TEXT,
-                    media_url TEXT,
-                    author TEXT,
-                    is_nsfw BOOLEAN,
-                    created_utc INTEGER,
-                    cached_at INTEGER
-                )
+            INSERT OR IGNORE INTO posts
+            (post_id, subreddit, title, url, media_url, author, is_nsfw, created_utc)
+            SELECT post_id, subreddit, title, url, media_url, author, is_nsfw, created_utc
+            FROM meme_cache
             '''
         )
-        await self.conn.execute("CREATE INDEX IF NOT EXISTS idx_keyword ON meme_cache(keyword)")
-        await self.conn.execute("CREATE INDEX IF NOT EXISTS idx_cached_at ON meme_cache(cached_at)")
-        await self.conn.commit()
+        await self.conn.execute(
+            '''
+            INSERT OR IGNORE INTO keyword_posts (keyword, nsfw, post_id, cached_at, rand)
+            SELECT keyword, is_nsfw, post_id, cached_at, abs(random()) FROM meme_cache
+            '''
+        )
+        for name in ("meme_cache_fts_ai", "meme_cache_fts_ad", "meme_cache_fts_au"):
+            await self.conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        await self.conn.execute("DROP TABLE IF EXISTS meme_cache_fts")
+        await self.conn.execute("DROP TABLE meme_cache")
+        async with self.conn.execute("SELECT COUNT(*) FROM keyword_posts") as cur:
+            (count,) = await cur.fetchone()
+        log.info("[cache:DISK] migrated %d cached posts to the keyword_posts schema", count)
+
+    async def _setup_fts(self):
+        async with self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'posts_fts'"
+        ) as cur:
+            existed = await cur.fetchone() is not None
+        try:
+            for stmt in _FTS_SCHEMA:
+                await self.conn.execute(stmt)
+        except aiosqlite.OperationalError as e:
+            log.warning("SQLite FTS5 unavailable (%s); title search falls back to LIKE", e)
+            self.fts_enabled = False
+            return
+        if not existed:
+            # backfill posts that were stored (or migrated) before the index
+            await self.conn.execute("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')")
+        self.fts_enabled = True
 
     def is_disabled(self, keyword: str, nsfw: bool = False) -> bool:
         key = (keyword, nsfw)
@@ -68,28 +274,67 @@ class RedditCacheManager:
         self.disabled_keywords[(keyword, nsfw)] = time.time()
 
     def cache_to_ram(self, keyword: str, posts: List[dict], nsfw: bool = False):
-        self.ram_cache[(keyword, nsfw)] = {
-            "posts": posts,
-            "timestamp": time.time()
-        }
+        self.ram_cache.put((keyword, nsfw), posts)
+        self.index.add_many(posts)
+
+    def search_index(
+        self, keyword: str, nsfw: bool = False, subreddits: Optional[List[str]] = None
+    ) -> List[dict]:
+        """Cached posts (from any keyword or warm buffer) whose titles match."""
+        posts = self.index.search(keyword, nsfw=nsfw, subreddits=subreddits)
+        log.debug(f"[cache:INDEX] {len(posts)} matches for {keyword!r}")
+        return posts
+
+    def record_demand(self, keyword: str, nsfw: bool = False) -> None:
+        """Count a user lookup of ``keyword`` for the refresh planner."""
+        self.demand.record(keyword, nsfw)
 
     def get_from_ram(self, keyword: str, nsfw: bool = False) -> Optional[List[dict]]:
-        entry = self.ram_cache.get((keyword, nsfw))
-        if entry:
-            age = time.time() - entry["timestamp"]
-            if age <= self.ram_ttl:
-                log.debug(f"[cache:RAM] HIT for {keyword!r} (age={age:.0f}s)")
-                return entry["posts"]
-            else:
-                log.debug(f"[cache:RAM] EXPIRED for {keyword!r} (age={age:.0f}s)")
-                del self.ram_cache[(keyword, nsfw)]
-        else:
+        posts = self.ram_cache.lookup((keyword, nsfw))
+        if posts is None:
             log.debug(f"[cache:RAM] MISS for {keyword!r}")
-        return None
+        elif self.ram_cache.stale((keyword, nsfw)):
+            log.debug(f"[cache:RAM] STALE HIT for {keyword!r}")
+            self._revalidate(keyword, nsfw)
+        else:
+            log.debug(f"[cache:RAM] HIT for {keyword!r}")
+        return posts
+
+    def _revalidate(self, keyword: str, nsfw: bool) -> None:
+        """Start one background refresh of a stale RAM entry (deduplicated)."""
+        key = (keyword, nsfw)
+        if self.revalidate_fn is None or key in self._revalidating or is_sentinel(keyword):
+            return
+        now = time.time()
+        # at most one attempt per soft-TTL period, even if the last one failed
+        if now - self._revalidated_at.get(key, 0) < self.ram_ttl:
+            return
+        try:
+            task = asyncio.get_running_loop().create_task(self._refresh_entry(keyword, nsfw))
+        except RuntimeError:
+            return
+        self._revalidated_at[key] = now
+        self._revalidating[key] = task
+        task.add_done_callback(lambda _t: self._revalidating.pop(key, None))
+
+    async def _refresh_entry(self, keyword: str, nsfw: bool) -> None:
+        try:
+            posts = await self.revalidate_fn(keyword, nsfw)
+        except Exception as e:
+            self.ram_cache.stats["revalidate_failed"] += 1
+            log.warning("[cache:RAM] revalidating %r failed: %s", keyword, e)
+            return
+        if not posts:
+            # keep serving the stale entry until its hard TTL
+            self.ram_cache.stats["revalidate_failed"] += 1
+            return
+        self.cache_to_ram(keyword, posts, nsfw=nsfw)
+        self.queue_save(keyword, posts, nsfw=nsfw)
+        self.ram_cache.stats["revalidated"] += 1
 
     async def get_from_disk(self, keyword: str, nsfw: bool = False) -> Optional[List[dict]]:
         async with self.conn.execute(
-            "SELECT * FROM meme_cache WHERE keyword = ? AND is_nsfw = ?",
+            f"{_SELECT_POSTS} WHERE k.keyword = ? AND k.nsfw = ?",
             (keyword, int(nsfw)),
         ) as cursor:
             rows = await cursor.fetchall()
@@ -103,12 +348,88 @@ class RedditCacheManager:
             log.debug(f"[cache:DISK] MISS for {keyword!r}")
         return None
 
-    async def save_to_disk(self, keyword: str, posts: List[dict], nsfw: bool = False):
-        now = int(time.time())
+    async def sample_from_disk(
+        self,
+        keyword: str,
+        nsfw: bool = False,
+        k: int = 8,
+        exclude_ids: Iterable[str] = (),
+    ) -> List[dict]:
+        """Up to ``k`` random posts cached under ``keyword``, skipping ``exclude_ids``.
+
+        Seeks the ``(keyword, nsfw, rand)`` index to a random pivot and reads
+        forward (wrapping once), so the cost doesn't grow with the cache.
+        Unlike :meth:`get_from_disk` nothing is copied into RAM, and rows
+        older than ``disk_ttl`` are skipped even before the flush drops them.
+        """
+        if self.conn is None or k <= 0:
+            return []
+        pivot = random.getrandbits(63)
+        excluded = json.dumps(list(exclude_ids))
+        cutoff = int(time.time()) - self.disk_ttl
+        rows: list = []
+        for op in (">=", "<"):
+            async with self.conn.execute(
+                f"{_SELECT_POSTS} WHERE k.keyword = ? AND k.nsfw = ? AND k.rand {op} ? "
+                "AND k.cached_at >= ? "
+                "AND k.post_id NOT IN (SELECT value FROM json_each(?)) "
+                "ORDER BY k.rand LIMIT ?",
+                (keyword, int(nsfw), pivot, cutoff, excluded, k - len(rows)),
+            ) as cursor:
+                rows.extend(await cursor.fetchall())
+            if len(rows) >= k:
+                break
+        log.debug(f"[cache:DISK] sampled {len(rows)} posts for {keyword!r}")
+        return [dict(row) for row in rows]
+
+    async def search_disk(
+        self,
+        query: str,
+        nsfw: bool = False,
+        subreddits: Optional[List[str]] = None,
+        limit: int = 25,
+    ) -> List[dict]:
+        """Best ``limit`` disk posts whose titles match every word of ``query``.
+
+        Ranked by bm25 over the whole disk corpus, not just rows cached under
+        ``query``; callers sample from the result.  Posts no keyword has
+        cached within ``disk_ttl`` are skipped even before the flush drops them.
+        """
+        terms = _FTS_TOKEN_RE.findall(query or "")
+        if not terms or self.conn is None:
+            return []
+        sub_clause = (
+            " AND EXISTS (SELECT 1 FROM keyword_posts k"
+            " WHERE k.post_id = p.post_id AND k.cached_at >= ?)"
+        )
+        params: list = [int(time.time()) - self.disk_ttl]
+        if subreddits:
+            names = [s.lower() for s in subreddits]
+            sub_clause += f" AND lower(p.subreddit) IN ({','.join('?' * len(names))})"
+            params += names
+        if self.fts_enabled:
+            match = " ".join('"' + t.replace('"', '""') + '"' for t in terms)
+            sql = (
+                "SELECT p.* FROM posts_fts f JOIN posts p ON p.id = f.rowid "
+                f"WHERE posts_fts MATCH ? AND p.is_nsfw = ?{sub_clause} "
+                "ORDER BY bm25(posts_fts) LIMIT ?"
+            )
+            args = [match, int(nsfw), *params, limit]
+        else:
+            likes = " AND ".join("p.title LIKE ?" for _ in terms)
+            sql = (
+                f"SELECT p.* FROM posts p WHERE {likes} AND p.is_nsfw = ?{sub_clause} "
+                "ORDER BY p.id DESC LIMIT ?"
+            )
+            args = [*(f"%{t}%" for t in terms), int(nsfw), *params, limit]
+        async with self.conn.execute(sql, args) as cursor:
+            rows = await cursor.fetchall()
+        log.debug(f"[cache:FTS] {len(rows)} matches for {query!r}")
+        return [dict(row) for row in rows]
 
-        rows = []
-        for post in posts:
-            rows.append((
+    def _rows_for(self, keyword: str, posts: List[dict], nsfw: bool, now: int) -> List[tuple]:
+        return [
+            (
                 keyword,
                 post.get("subreddit"),
                 post.get("post_id"),
@@ -118,37 +439,91 @@ class RedditCacheManager:
                 post.get("author"),
                 int(post.get("is_nsfw", nsfw)),
                 int(post.get("created_utc", now)),
-                now
-            ))
+                now,
+            )
+            for post in posts
+        ]
 
+    async def _write_rows(self, rows: List[tuple]):
+        posts = [(r[2], r[1], r[3], r[4], r[5], r[6], r[7], r[8]) for r in rows]
+        links = [(r[0], r[7], r[2], r[9]) for r in rows]
         cur = await self.conn.cursor()
         try:
-            await cur.executemany(
-                '''
-                INSERT OR REPLACE INTO meme_cache
-                (keyword, subreddit, post_id, title, url, media_url, author, is_nsfw, created_utc, cached_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''',
-                rows,
-            )
+            await cur.executemany(_UPSERT_POST, posts)
+            await cur.executemany(_UPSERT_KEYWORD, links)
             await self.conn.commit()
         except Exception as e:
             log.warning("Bulk insert failed: %s; retrying individually", e)
             await self.conn.rollback()
-            for row in rows:
+            for post, link in zip(posts, links):
                 try:
-                    await cur.execute(
-                        '''
-                        INSERT OR REPLACE INTO meme_cache
-                        (keyword, subreddit, post_id, title, url, media_url, author, is_nsfw, created_utc, cached_at)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        ''',
-                        row,
-                    )
+                    await cur.execute(_UPSERT_POST, post)
+                    await cur.execute(_UPSERT_KEYWORD, link)
                 except Exception as ex:
-                    log.error("Failed to cache post %s: %s", row[2], ex)
+                    log.error("Failed to cache post %s: %s", post[0], ex)
             await self.conn.commit()
 
+    async def save_to_disk(self, keyword: str, posts: List[dict], nsfw: bool = False):
+        self.index.add_many(posts)
+        await self._write_rows(self._rows_for(keyword, posts, nsfw, int(time.time())))
+
+    def queue_save(self, keyword: str, posts: List[dict], nsfw: bool = False) -> bool:
+        """Hand ``posts`` to the write-behind queue without touching disk.
+
+        Returns False (and counts the posts as dropped) when the queue is
+        full or the manager isn't initialised.
+        """
+        if not posts:
+            return True
+        self.index.add_many(posts)
+        if self._write_queue is None:
+            self.write_stats["dropped"] += len(posts)
+            return False
+        try:
+            self._write_queue.put_nowait((keyword, posts, nsfw, int(time.time())))
+        except asyncio.QueueFull:
+            self.write_stats["dropped"] += len(posts)
+            log.warning("[cache:DISK] write queue full; dropped %d posts for %r", len(posts), keyword)
+            return False
+        self.write_stats["queued"] += len(posts)
+        return True
+
+    async def _flush_writes(self):
+        """Persist everything currently queued in a single transaction."""
+        if self._write_queue is None or self.conn is None:
+            return
+        rows: List[tuple] = []
+        while True:
+            try:
+                keyword, posts, nsfw, queued_at = self._write_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            rows.extend(self._rows_for(keyword, posts, nsfw, queued_at))
+            self._write_queue.task_done()
+        if not rows:
+            return
+        await self._write_rows(rows)
+        self.write_stats["written"] += len(rows)
+        self.write_stats["batches"] += 1
+        log.debug("[cache:DISK] wrote %d queued posts", len(rows))
+
+    async def _writer(self):
+        """Background task that periodically flushes the write queue."""
+        while True:
+            await asyncio.sleep(self.write_interval)
+            try:
+                await self._flush_writes()
+            except Exception as e:
+                log.error("[cache:DISK] write-behind flush failed: %s", e)
+
+    async def _sweeper(self):
+        """Background task that drops expired RAM entries nobody reads."""
+        while True:
+            await asyncio.sleep(self.ram_sweep_interval)
+            dropped = self.ram_cache.sweep()
+            if dropped:
+                log.debug("[cache:RAM] swept %d expired entries", dropped)
+
     def record_failure(self, keyword: str, nsfw: bool = False) -> bool:
         key = (keyword, nsfw)
         self.failed_count[key] += 1
@@ -168,7 +543,11 @@ class RedditCacheManager:
         cutoff = now - ttl
 
         cur = await self.conn.cursor()
-        await cur.execute("DELETE FROM meme_cache WHERE cached_at < ?", (cutoff,))
+        await cur.execute("DELETE FROM keyword_posts WHERE cached_at < ?", (cutoff,))
+        # a post lives on while any keyword still caches it
+        await cur.execute(
+            "DELETE FROM posts WHERE post_id NOT IN (SELECT post_id FROM keyword_posts)"
+        )
         await self.conn.commit()  # ✅ commit delete transaction first
 
         # Now we can VACUUM
@@ -205,9 +584,6 @@ class RedditCacheManager:
 
             self.clear_disabled()
 
-    def get_all_cached_keywords(self) -> List[Tuple[str, bool]]:
-        return list(self.ram_cache.keys())
-
 
 class NoopCacheManager:
     """Minimal cache manager that effectively disables caching.
@@ -226,15 +602,30 @@ class NoopCacheManager:
     async def get_from_disk(self, *args, **kwargs):
         return None
 
+    async def sample_from_disk(self, *args, **kwargs):
+        return []
+
+    async def search_disk(self, *args, **kwargs):
+        return []
+
     def is_disabled(self, *args, **kwargs):
         return False
 
     def cache_to_ram(self, *args, **kwargs):
         return None
 
+    def search_index(self, *args, **kwargs):
+        return []
+
+    def record_demand(self, *args, **kwargs):
+        return None
+
     async def save_to_disk(self, *args, **kwargs):
         return None
 
+    def queue_save(self, *args, **kwargs):
+        return True
+
     def record_failure(self, *args, **kwargs):
         return False
 
@@ -246,6 +637,3 @@ class NoopCacheManager:
 
     async def refresh_keywords(self, *args, **kwargs):  # pragma: no cover
         return None
-
-    def get_all_cached_keywords(self):
-        return []
@@ -0,0 +1,102 @@
+"""Decide which keyword caches the periodic refresh should spend Reddit calls on.
+
+Every keyword lookup bumps a counter that decays exponentially with
+``half_life`` seconds, so a score reflects both how often and how recently
+a keyword was asked for.  Each refresh cycle :meth:`RefreshPlanner.plan`
+ranks the tracked keywords by score and picks at most ``top_k`` of them
+whose combined cost (Reddit requests) fits ``request_budget``.  One-off
+lookups decay below ``min_score`` and are forgotten when a plan is made;
+sentinel keys such as ``__random__`` are never tracked.
+"""
+import heapq
+import math
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+Key = Tuple[str, bool]
+
+
+def is_sentinel(keyword: str) -> bool:
+    """Internal cache keys like ``__random__`` that aren't search terms."""
+    return len(keyword) > 4 and keyword.startswith("__") and keyword.endswith("__")
+
+
+class RefreshPlanner:
+    def __init__(
+        self,
+        half_life: float = 3600,
+        top_k: int = 10,
+        request_budget: int = 120,
+        min_score: float = 0.05,
+        max_keys: int = 5000,
+    ):
+        self.half_life = half_life
+        self.top_k = top_k
+        self.request_budget = request_budget
+        self.min_score = min_score
+        self.max_keys = max_keys
+        # key -> (score, time the score was last brought up to date)
+        self.scores: Dict[Key, Tuple[float, float]] = {}
+        self.last_plan: List[Key] = []
+        self.last_spent = 0
+
+    def _decayed(self, score: float, since: float, now: float) -> float:
+        return score * math.pow(0.5, max(now - since, 0) / self.half_life)
+
+    def record(self, keyword: str, nsfw: bool = False, now: Optional[float] = None) -> None:
+        if not keyword or is_sentinel(keyword):
+            return
+        now = time.time() if now is None else now
+        key = (keyword, nsfw)
+        score, since = self.scores.get(key, (0.0, now))
+        self.scores[key] = (self._decayed(score, since, now) + 1, now)
+        # plan() prunes every cycle; this only bounds a burst of new keywords,
+        # and waiting for the table to double keeps the cost amortised
+        if len(self.scores) > 2 * self.max_keys:
+            self._prune(now)
+
+    def score(self, keyword: str, nsfw: bool = False, now: Optional[float] = None) -> float:
+        entry = self.scores.get((keyword, nsfw))
+        if entry is None:
+            return 0.0
+        return self._decayed(entry[0], entry[1], time.time() if now is None else now)
+
+    def _prune(self, now: float) -> None:
+        ranked = heapq.nlargest(
+            self.max_keys, ((self._decayed(s, t, now), k) for k, (s, t) in self.scores.items())
+        )
+        self.scores = {k: self.scores[k] for score, k in ranked if score >= self.min_score}
+
+    def plan(
+        self,
+        cost: Callable[[Key], int],
+        skip: Callable[[Key], bool] = lambda key: False,
+        now: Optional[float] = None,
+    ) -> List[Key]:
+        """Keys to refresh this cycle, hottest first, within the request budget."""
+        now = time.time() if now is None else now
+        self._prune(now)
+        ranked = sorted(self.scores, key=lambda k: self.score(*k, now=now), reverse=True)
+        picked: List[Key] = []
+        spent = 0
+        for key in ranked:
+            if len(picked) >= self.top_k:
+                break
+            if skip(key):
+                continue
+            c = cost(key)
+            if spent + c > self.request_budget:
+                continue
+            picked.append(key)
+            spent += c
+        self.last_plan, self.last_spent = picked, spent
+        return picked
+
+    def summary(self, now: Optional[float] = None) -> str:
+        now = time.time() if now is None else now
+        top = heapq.nlargest(3, self.scores, key=lambda k: self.score(*k, now=now))
+        hot = ", ".join(f"{kw}{' (nsfw)' if nsfw else ''} {self.score(kw, nsfw, now):.1f}" for kw, nsfw in top)
+        return (
+            f"{len(self.scores)} keywords tracked, last cycle refreshed {len(self.last_plan)} "
+            f"using {self.last_spent}/{self.request_budget} requests; hottest: {hot or 'none'}"
+        )
@@ -0,0 +1,211 @@
+"""Rotating, time-windowed Bloom filter for "already seen" dedup.
+
+The bot only needs to answer "have we sent this post id / media URL
+recently?", and a small false-positive rate (occasionally skipping a fresh
+post) is an acceptable price for not keeping every URL string in memory.
+
+:class:`RotatingBloomFilter` splits its TTL into ``generations`` windows.
+New items go into the newest generation; lookups check all of them.  When
+the newest window has been open for ``ttl / generations`` seconds, or has
+taken ``capacity`` items, a fresh generation is started and the oldest one
+dropped, so an item is remembered for between ``ttl * (g-1)/g`` and ``ttl``
+seconds.  Unlike a size-capped ``TTLCache``, a burst of traffic rotates the
+filter early instead of silently evicting recent entries.
+
+A lookup ORs across every live generation, so each one is sized for
+``fp_rate / generations`` to keep the combined false-positive rate at
+``fp_rate``.
+
+The filter keeps the ``item in f`` / ``f[item] = True`` / ``f.clear()``
+surface of the dicts it replaces, and can be snapshotted to disk so dedup
+survives restarts.
+"""
+import base64
+import hashlib
+import json
+import logging
+import math
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional
+
+log = logging.getLogger(__name__)
+
+_SNAPSHOT_VERSION = 1
+
+
+class _Generation:
+    __slots__ = ("bits", "count", "started")
+
+    def __init__(self, num_bits: int, started: float, bits: Optional[bytearray] = None, count: int = 0):
+        self.bits = bits if bits is not None else bytearray((num_bits + 7) // 8)
+        self.count = count
+        self.started = started
+
+
+class RotatingBloomFilter:
+    def __init__(
+        self,
+        capacity: int = 10000,
+        ttl: float = 6 * 3600,
+        fp_rate: float = 0.001,
+        generations: int = 4,
+    ):
+        if not 0 < fp_rate < 1:
+            raise ValueError(f"fp_rate must be between 0 and 1, got {fp_rate!r}")
+        self.capacity = max(1, int(capacity))
+        self.ttl = float(ttl)
+        self.fp_rate = fp_rate
+        self.generations = max(2, int(generations))
+        self.window = self.ttl / self.generations
+        # Standard sizing for one generation holding ``capacity`` items, at
+        # the per-generation rate that keeps the union of all of them at fp_rate.
+        gen_fp = fp_rate / self.generations
+        self.num_bits = max(64, math.ceil(-self.capacity * math.log(gen_fp) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.rotations = 0
+        self._gens: Deque[_Generation] = deque()
+        self.clear()
+
+    # --- dict-like surface -------------------------------------------------
+
+    def __contains__(self, item) -> bool:
+        if not item:
+            return False
+        self._rotate(time.time())
+        positions = self._positions(item)
+        return any(self._has(gen, positions) for gen in self._gens)
+
+    def __setitem__(self, item, _value) -> None:
+        self.add(item)
+
+    def __len__(self) -> int:
+        """Approximate number of items remembered (adds, not distinct)."""
+        return sum(gen.count for gen in self._gens)
+
+    def add(self, item) -> None:
+        if not item:
+            return
+        now = time.time()
+        self._rotate(now)
+        gen = self._gens[-1]
+        for pos in self._positions(item):
+            gen.bits[pos >> 3] |= 1 << (pos & 7)
+        gen.count += 1
+
+    def clear(self) -> None:
+        self._gens = deque([_Generation(self.num_bits, time.time())])
+
+    # --- internals ---------------------------------------------------------
+
+    def _positions(self, item) -> List[int]:
+        # Kirsch–Mitzenmacher double hashing off one 128-bit digest.
+        digest = hashlib.blake2b(str(item).encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    @staticmethod
+    def _has(gen: _Generation, positions: Iterable[int]) -> bool:
+        bits = gen.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in positions)
+
+    def _rotate(self, now: float) -> None:
+        current = self._gens[-1]
+        if now - current.started < self.window and current.count < self.capacity:
+            return
+        self._gens.append(_Generation(self.num_bits, now))
+        self.rotations += 1
+        while len(self._gens) > self.generations:
+            self._gens.popleft()
+        # A long idle gap can leave generations older than the whole TTL.
+        while len(self._gens) > 1 and now - self._gens[0].started >= self.ttl:
+            self._gens.popleft()
+
+    # --- reporting & persistence ------------------------------------------
+
+    def memory_bytes(self) -> int:
+        return sum(len(gen.bits) for gen in self._gens)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "items": len(self),
+            "generations": len(self._gens),
+            "memory_bytes": self.memory_bytes(),
+            "fp_rate": self.fp_rate,
+            "rotations": self.rotations,
+        }
+
+    def snapshot_data(self) -> dict:
+        """Copy the generations into a JSON-ready dict (call on the event loop)."""
+        return {
+            "version": _SNAPSHOT_VERSION,
+            "num_bits": self.num_bits,
+            "num_hashes": self.num_hashes,
+            "generations": [
+                {
+                    "started": gen.started,
+                    "count": gen.count,
+                    "bits": base64.b64encode(bytes(gen.bits)).decode("ascii"),
+                }
+                for gen in self._gens
+            ],
+        }
+
+    def snapshot(self, path: str) -> None:
+        """Atomically write the filter's generations to ``path``."""
+        write_snapshot(path, self.snapshot_data())
+
+    def load(self, path: str) -> bool:
+        """Restore generations from ``path``; return ``False`` if unusable.
+
+        Snapshots taken with different sizing (capacity or false-positive
+        rate changed in config) can't be merged and are ignored.
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            log.warning("Could not read dedup snapshot %s: %s", path, e)
+            return False
+        if (
+            data.get("version") != _SNAPSHOT_VERSION
+            or data.get("num_bits") != self.num_bits
+            or data.get("num_hashes") != self.num_hashes
+        ):
+            log.info("Ignoring dedup snapshot %s: filter sizing changed", path)
+            return False
+
+        now = time.time()
+        gens = deque()
+        for entry in data.get("generations", []):
+            if now - entry["started"] >= self.ttl:
+                continue
+            bits = bytearray(base64.b64decode(entry["bits"]))
+            if len(bits) != (self.num_bits + 7) // 8:
+                continue
+            gens.append(_Generation(self.num_bits, entry["started"], bits, entry["count"]))
+        if not gens:
+            return False
+        while len(gens) > self.generations:
+            gens.popleft()
+        self._gens = gens
+        self._rotate(now)
+        return True
+
+
+def write_snapshot(path: str, data: dict) -> None:
+    """Atomically write :meth:`RotatingBloomFilter.snapshot_data` output to ``path``.
+
+    Only touches ``data``, so it is safe to run in a worker thread.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
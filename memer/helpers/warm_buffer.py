@@ -0,0 +1,63 @@
+"""Shared warm buffers that readers don't drain for each other.
+
+A :class:`WarmBuffer` is the bounded deque of :class:`PostRecord` objects
+warmup keeps per ``{sub}_{listing}``; the newest entries are on the left
+and the oldest fall off the right.  Readers no longer ``pop()`` from it.
+Each consumer (normally a Discord channel) instead keeps its own set of
+post ids it has already taken, so many guilds can draw from one fetched
+listing without emptying it for everyone else, and a post one channel
+rejects is still there for the next.
+"""
+from collections import OrderedDict, deque
+from typing import Hashable, Iterable, List, Optional, Set
+
+from memer.helpers.post_record import PostRecord
+
+# Consumers tracked per buffer; the least recently active are forgotten
+# (and would see the buffer afresh).
+MAX_CONSUMERS = 512
+
+SHARED = "*"
+
+
+class WarmBuffer(deque):
+    def __init__(self, iterable: Iterable[PostRecord] = (), maxlen: Optional[int] = None):
+        super().__init__(iterable, maxlen)
+        self._consumed: "OrderedDict[Hashable, Set[str]]" = OrderedDict()
+
+    def _seen(self, consumer: Hashable) -> Set[str]:
+        seen = self._consumed.get(consumer)
+        if seen is None:
+            seen = self._consumed[consumer] = set()
+            while len(self._consumed) > MAX_CONSUMERS:
+                self._consumed.popitem(last=False)
+        else:
+            self._consumed.move_to_end(consumer)
+        return seen
+
+    def unread(self, consumer: Hashable = SHARED) -> List[PostRecord]:
+        """Records ``consumer`` hasn't taken, oldest first (old ``pop()`` order).
+
+        Returns a list, so callers may await while walking it even if warmup
+        merges into the buffer meanwhile.
+        """
+        seen = self._consumed.get(consumer, ())
+        return [r for r in reversed(self) if r.id not in seen]
+
+    def mark(self, consumer: Hashable, post_id: str) -> None:
+        seen = self._seen(consumer)
+        seen.add(post_id)
+        if len(seen) > 2 * (self.maxlen or len(self)):
+            # drop ids that have already rotated out of the buffer
+            seen.intersection_update(r.id for r in self)
+
+    def take(self, consumer: Hashable = SHARED) -> Optional[PostRecord]:
+        """Return and mark the oldest record ``consumer`` hasn't taken yet."""
+        unread = self.unread(consumer)
+        if not unread:
+            return None
+        self.mark(consumer, unread[0].id)
+        return unread[0]
+
+    def consumers(self) -> int:
+        return len(self._consumed)
@@ -0,0 +1,120 @@
+"""Per-subreddit warmup periods driven by activity and demand.
+
+A fixed ``warmup_interval`` spends as many requests on a dead niche sub as on
+r/memes.  :class:`WarmupSchedule` gives every subreddit its own refresh
+period instead, shortened by three signals:
+
+* how many new posts each refresh found (post velocity),
+* how fast its warm buffers are being consumed (drain rate), and
+* how often memes from it are sent, from ``meme_stats.subreddit_counts``.
+
+``warmup_interval`` is the period of a sub whose activity matches
+``warmup_target_posts`` per interval; quieter subs back off towards
+``warmup_max_interval`` and busy ones speed up to ``warmup_min_interval``.
+"""
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional
+
+from memer.helpers.reddit_config import CONFIG
+
+log = logging.getLogger(__name__)
+
+_ALPHA = 0.5  # EWMA weight of the latest observation
+
+
+@dataclass
+class SubSchedule:
+    period: float
+    next_due: float = 0.0
+    last_refresh: float = 0.0
+    refreshes: int = 0
+    new_rate: float = 0.0  # posts/sec found by refreshes
+    drain_rate: float = 0.0  # posts/sec taken out of the warm buffers
+
+
+class WarmupSchedule:
+    def __init__(self):
+        self.subs: Dict[str, SubSchedule] = {}
+        self._drained: Dict[str, int] = defaultdict(int)
+        # share of sends relative to the busiest sub, by lowercased name
+        self.demand: Dict[str, float] = {}
+
+    def _state(self, name: str) -> SubSchedule:
+        key = name.lower()
+        state = self.subs.get(key)
+        if state is None:
+            state = self.subs[key] = SubSchedule(period=CONFIG.get("warmup_interval", 300))
+        return state
+
+    def forget(self, name: str) -> None:
+        self.subs.pop(name.lower(), None)
+        self._drained.pop(name.lower(), None)
+
+    def record_drain(self, name: str, n: int = 1) -> None:
+        """Note that ``n`` posts of ``name`` were consumed from warm buffers."""
+        self._drained[name.lower()] += n
+
+    def set_demand(self, counts: Mapping[str, int]) -> None:
+        """Weight subs by how often they are sent (``subreddit_counts``)."""
+        top = max(counts.values(), default=0)
+        self.demand = {
+            name.lower(): count / top for name, count in counts.items() if top
+        }
+
+    def is_full_refresh(self, name: str, full_every: int) -> bool:
+        return self._state(name).refreshes % max(full_every, 1) == 0
+
+    def due(self, names: Iterable[str], now: Optional[float] = None) -> List[str]:
+        now = time.monotonic() if now is None else now
+        return [n for n in names if self._state(n).next_due <= now]
+
+    def next_due(self, names: Iterable[str]) -> float:
+        return min((self._state(n).next_due for n in names), default=float("inf"))
+
+    def record_refresh(self, name: str, added: int, now: Optional[float] = None) -> float:
+        """Fold a refresh result into the rates and schedule the next one."""
+        now = time.monotonic() if now is None else now
+        state = self._state(name)
+        drained = self._drained.pop(name.lower(), 0)
+        if state.last_refresh:
+            elapsed = max(now - state.last_refresh, 1.0)
+            state.new_rate += _ALPHA * (added / elapsed - state.new_rate)
+            state.drain_rate += _ALPHA * (drained / elapsed - state.drain_rate)
+        state.last_refresh = now
+        state.refreshes += 1
+        state.period = self._period(state, self.demand.get(name.lower(), 0.0))
+        state.next_due = now + state.period
+        return state.period
+
+    def record_failure(self, name: str, now: Optional[float] = None) -> None:
+        """Retry a failed refresh after the base interval, keeping the rates."""
+        now = time.monotonic() if now is None else now
+        self._state(name).next_due = now + CONFIG.get("warmup_interval", 300)
+
+    def _period(self, state: SubSchedule, demand: float) -> float:
+        base = CONFIG.get("warmup_interval", 300)
+        lo = CONFIG.get("warmup_min_interval", 60)
+        hi = CONFIG.get("warmup_max_interval", 3600)
+        if state.refreshes < 2:
+            return base  # no rate observed yet
+        # Posts expected per base interval; consumption counts double since
+        # an empty buffer sends /meme down the slow live path.
+        activity = (state.new_rate + 2 * state.drain_rate) * base
+        pressure = activity / max(CONFIG.get("warmup_target_posts", 10), 1)
+        pressure += demand * CONFIG.get("warmup_demand_weight", 1.0)
+        if pressure <= 0:
+            return hi
+        return min(max(base / pressure, lo), hi)
+
+    def summary(self) -> str:
+        if not self.subs:
+            return "idle"
+        periods = sorted(s.period for s in self.subs.values())
+        fastest = min(self.subs, key=lambda k: self.subs[k].period)
+        return (
+            f"{len(periods)} subs, period {periods[0]:.0f}s–{periods[-1]:.0f}s "
+            f"(median {periods[len(periods) // 2]:.0f}s, fastest r/{fastest})"
+        )
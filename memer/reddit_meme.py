@@ -1,26 +1,62 @@
+import os
+import json
 import random
+import time
 import asyncio
 import logging
 import inspect
+from collections import defaultdict
 from typing import Optional, Callable, Sequence, List, Union, Dict, AsyncIterator, Tuple
 from dataclasses import dataclass
-from cachetools import TTLCache
+from contextlib import aclosing
 from asyncio import Semaphore
-from collections import deque
 from asyncpraw import Reddit
 from asyncpraw.models import Subreddit, Submission
 from asyncprawcore import NotFound, Forbidden, BadRequest
-from memer.helpers.rate_limit import throttle
+from memer.helpers.rate_limit import throttle, INTERACTIVE, WARMUP
 from memer.helpers.reddit_config import CONFIG
+from memer.helpers.post_record import PostRecord, as_record
+from memer.helpers.seen_filter import RotatingBloomFilter, write_snapshot
+from memer.helpers.image_hash import get_deduper
+from memer.helpers.warmup_schedule import WarmupSchedule
+from memer.helpers.warm_buffer import SHARED, WarmBuffer
+from memer.helpers.keyword_index import get_keyword_index
+from memer.helpers.guild_subreddits import MANDATORY
 
 log = logging.getLogger(__name__)
 log.setLevel(logging.INFO)  # or INFO in prod
 
 # --- Caches & Buffers ---
-ID_CACHE = TTLCache(maxsize=CONFIG.get('id_cache_maxsize', 10000), ttl=CONFIG.get('id_cache_ttl', 6*3600))
-HASH_CACHE = TTLCache(maxsize=CONFIG.get('hash_cache_maxsize', 10000), ttl=CONFIG.get('hash_cache_ttl', 6*3600))
-WARM_CACHE: Dict[str, deque] = {}
+# "Recently sent" post ids and media URLs live in rotating Bloom filters:
+# fixed memory, no silent eviction under load, small false-positive rate.
+ID_CACHE = RotatingBloomFilter(
+    capacity=CONFIG.get('id_cache_maxsize', 10000),
+    ttl=CONFIG.get('id_cache_ttl', 6*3600),
+    fp_rate=CONFIG.get('dedup_fp_rate', 0.001),
+    generations=CONFIG.get('dedup_generations', 4),
+)
+HASH_CACHE = RotatingBloomFilter(
+    capacity=CONFIG.get('hash_cache_maxsize', 10000),
+    ttl=CONFIG.get('hash_cache_ttl', 6*3600),
+    fp_rate=CONFIG.get('dedup_fp_rate', 0.001),
+    generations=CONFIG.get('dedup_generations', 4),
+)
+# Warm buffers hold compact PostRecord snapshots, not full Submissions.
+# Readers take from them per channel instead of popping (see WarmBuffer).
+WARM_CACHE: Dict[str, WarmBuffer] = {}
+# Newest fullname seen per "{sub}_new" buffer, used as a ``before`` cursor.
+WARM_CURSORS: Dict[str, str] = {}
+WARM_SCHEDULE = WarmupSchedule()
+# Subreddits the warmup loop keeps warm, by lowercased name.  Values start as
+# the name and are swapped for a Subreddit object once the loop resolves it.
+WARM_SUBREDDITS: Dict[str, Union[str, Subreddit]] = {}
+_warm_wakeup = asyncio.Event()
 _warmup_task: Optional[asyncio.Task] = None
+_background_tasks: set = set()
+# Live keyword fetches in progress, by (keyword, nsfw, subreddit set).  Identical
+# requests arriving meanwhile wait for the first one instead of hitting Reddit.
+_INFLIGHT: Dict[Tuple[str, bool, frozenset], asyncio.Event] = {}
+COALESCE_STATS: Dict[str, int] = defaultdict(int)
 
 # --- Exceptions ---
 class RedditMemeError(Exception):
@@ -58,7 +94,10 @@ async def _fetch_listing_with_retry(
     limit: int,
     retries: int = 3,
     backoff: int = 1,
+    lane: str = INTERACTIVE,
+    params: Optional[dict] = None,
 ) -> AsyncIterator[Submission]:
+    extra = {"params": params} if params else {}
     for attempt in range(1, retries + 1):
         try:
             log.debug(
@@ -68,9 +107,9 @@ async def _fetch_listing_with_retry(
                 limit,
                 attempt,
             )
-            await throttle()
+            await throttle(lane)
             count = 0
-            async for p in getattr(subreddit, listing)(limit=limit):
+            async for p in getattr(subreddit, listing)(limit=limit, **extra):
                 count += 1
                 yield p
             log.debug(
@@ -104,6 +143,7 @@ async def _search_with_retry(
     *,
     sort: str = "new",
     time_filter: str = "all",
+    lane: str = INTERACTIVE,
     **search_kwargs,
 ) -> AsyncIterator[Submission]:
     """Search a subreddit for keyword with retry/backoff."""
@@ -116,7 +156,7 @@ async def _search_with_retry(
                 limit,
                 attempt,
             )
-            await throttle()
+            await throttle(lane)
             count = 0
             try:
                 async for p in subreddit.search(
@@ -162,6 +202,7 @@ async def _fetch_concurrent(
     listing: str,
     limit: int,
     max_concurrent: int = 5,
+    lane: str = INTERACTIVE,
 ) -> Dict[str, List[Submission]]:
     log.debug(
         "Starting concurrent fetch for listing=%s across %d subreddits",
@@ -172,7 +213,9 @@ async def _fetch_concurrent(
 
     async def fetch_one(sub: Subreddit):
         async with sem:
-            posts = [p async for p in _fetch_listing_with_retry(sub, listing, limit)]
+            posts = [
+                p async for p in _fetch_listing_with_retry(sub, listing, limit, lane=lane)
+            ]
             return sub.display_name, posts
 
     tasks = [fetch_one(sub) for sub in subreddits]
@@ -189,7 +232,197 @@ async def _fetch_concurrent(
     )
     return posts_by_sub
 
+async def _merge_concurrent(
+    subreddits: Sequence[Subreddit],
+    open_stream: Callable[[Subreddit], AsyncIterator[Submission]],
+    max_concurrent: int = 5,
+) -> AsyncIterator[Submission]:
+    """Run ``open_stream(sub)`` for every subreddit at once, yielding posts
+    as they arrive.
+
+    Streams run under a bounded semaphore and a failing subreddit is skipped.
+    Closing the generator early (e.g. once the caller has enough posts)
+    cancels the streams still in flight, so wrap it in
+    :func:`contextlib.aclosing` when breaking out.
+    """
+    sem = Semaphore(CONFIG.get("max_concurrent", max_concurrent))
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    async def run_one(sub: Subreddit):
+        try:
+            async with sem:
+                async for p in open_stream(sub):
+                    queue.put_nowait(p)
+        except Exception as e:
+            # if one sub fails (or doesn't support search), the others still count
+            log.debug("Concurrent fetch failed in r/%s: %s", sub.display_name, e)
+        finally:
+            queue.put_nowait(done)
+
+    tasks = [asyncio.create_task(run_one(sub)) for sub in subreddits]
+    pending = len(tasks)
+    try:
+        while pending:
+            item = await queue.get()
+            if item is done:
+                pending -= 1
+                continue
+            yield item
+    finally:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _search_concurrent(
+    subreddits: Sequence[Subreddit],
+    keyword: str,
+    limit: int,
+    max_concurrent: int = 5,
+    lane: str = INTERACTIVE,
+) -> AsyncIterator[Submission]:
+    """Search all ``subreddits`` for ``keyword`` concurrently."""
+    return _merge_concurrent(
+        subreddits,
+        lambda sub: _search_with_retry(sub, keyword, limit, lane=lane),
+        max_concurrent,
+    )
+
+
+def _listing_concurrent(
+    subreddits: Sequence[Subreddit],
+    listing: str,
+    limit: int,
+    max_concurrent: int = 5,
+    lane: str = INTERACTIVE,
+) -> AsyncIterator[Submission]:
+    """Stream ``listing`` from all ``subreddits`` concurrently."""
+    return _merge_concurrent(
+        subreddits,
+        lambda sub: _fetch_listing_with_retry(sub, listing, limit, lane=lane),
+        max_concurrent,
+    )
+
+
+async def _drain_to_cache(
+    candidates: AsyncIterator[Tuple[Submission, dict]],
+    cache_mgr,
+    keyword: str,
+    nsfw: bool,
+    first_batch: List[dict],
+    timeout: float,
+) -> None:
+    """Keep consuming ``candidates`` after a meme was returned and cache them."""
+    extra: List[dict] = []
+
+    async def consume():
+        async for _, data in candidates:
+            extra.append(data)
+
+    try:
+        await asyncio.wait_for(consume(), timeout)
+    except asyncio.TimeoutError:
+        log.debug("Candidate drain for '%s' timed out after %ss", keyword, timeout)
+    except Exception as e:
+        log.warning("Candidate drain for '%s' failed: %s", keyword, e)
+    finally:
+        await candidates.aclose()
+    if extra:
+        log.debug("Background fill cached %d more posts for '%s'", len(extra), keyword)
+        cache_mgr.cache_to_ram(keyword, first_batch + extra, nsfw=nsfw)
+        _persist(cache_mgr, keyword, extra, nsfw)
+
+
+def _spawn_background(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+def _persist(cache_mgr, keyword: str, posts: List[dict], nsfw: bool) -> None:
+    """Hand posts to the cache's write-behind queue; never awaits disk I/O."""
+    queue_save = getattr(cache_mgr, "queue_save", None)
+    if queue_save is not None:
+        queue_save(keyword, posts, nsfw=nsfw)
+    else:
+        _spawn_background(cache_mgr.save_to_disk(keyword, posts, nsfw=nsfw))
+
 # --- Warmup Buffers ---
+def _fullname(post) -> str:
+    return getattr(post, "fullname", None) or f"t3_{post.id}"
+
+
+def _merge_into_buffer(key: str, posts: Sequence[Submission], limit: int, rerank: bool = False) -> int:
+    """Merge listing ``posts`` into ``WARM_CACHE[key]``; return how many were new.
+
+    Only unseen posts are snapshotted.  New posts go on the left, in listing
+    order.  With ``rerank`` the buffer is rebuilt in listing order instead,
+    reusing the existing records and keeping leftovers behind them.
+    Nothing is written if the subreddit stopped being warmed meanwhile.
+    """
+    if key.rsplit("_", 1)[0].lower() not in WARM_SUBREDDITS:
+        # removed while its listing was in flight: don't bring the buffer back
+        return 0
+    buf = WARM_CACHE.get(key)
+    known = {r.id: r for r in buf} if buf else {}
+    fresh = []
+    ordered = []
+    for p in posts:
+        pid = getattr(p, "id", None)
+        record = known.pop(pid, None)
+        if record is None:
+            record = as_record(p)
+            if record is None:
+                continue
+            fresh.append(record)
+        ordered.append(record)
+    get_keyword_index().add_many(fresh)
+    if buf is None:
+        WARM_CACHE[key] = WarmBuffer(ordered[:limit], maxlen=limit)
+    elif rerank:
+        # in place, so readers' per-channel progress survives the re-rank
+        items = (ordered + list(known.values()))[: buf.maxlen or limit]
+        buf.clear()
+        buf.extend(items)
+    else:
+        buf.extendleft(reversed(fresh))
+    return len(fresh)
+
+
+async def _refresh_subreddit(sub: Subreddit, listings: Sequence[str], limit: int, full: bool) -> int:
+    """Refresh one subreddit's warm buffers; return how many posts were new.
+
+    ``new`` is fetched incrementally with a ``before`` cursor.  If that shows
+    nothing was posted since the last cycle, the other listings are skipped:
+    they can only have re-ranked.  ``full`` cycles refetch everything and
+    reset the cursor (it stops working once its post is removed).
+    """
+    name = sub.display_name
+    added = 0
+    quiet = False
+    for listing in sorted(listings, key=lambda l: l != "new"):
+        key = f"{name}_{listing}"
+        incremental = not full and key in WARM_CACHE
+        params = None
+        if listing == "new" and incremental and key in WARM_CURSORS:
+            params = {"before": WARM_CURSORS[key]}
+        elif incremental and quiet:
+            continue
+        posts = [
+            p async for p in _fetch_listing_with_retry(sub, listing, limit, lane=WARMUP, params=params)
+        ]
+        new = _merge_into_buffer(key, posts, limit, rerank=params is None)
+        if listing == "new":
+            if posts and key in WARM_CACHE:
+                WARM_CURSORS[key] = _fullname(posts[0])
+            quiet = params is not None and new == 0
+        added += new
+        log.debug("Warmed buffer r/%s[%s]: %d new of %d fetched", name, listing, new, len(posts))
+    return added
+
+
 async def start_warmup(
     reddit: Reddit,
     subreddits: Sequence[Union[str, Subreddit]],
@@ -198,39 +431,104 @@ async def start_warmup(
     interval: int = 600,
 ):
     global _warmup_task
+    for sub in subreddits:
+        add_warm_subreddit(sub.display_name if isinstance(sub, Subreddit) else sub)
     if _warmup_task and not _warmup_task.done():
         log.debug("Warmup already running, skipping start_warmup call")
         return
-    log.info("Starting warmup task for %d subreddits every %ds", len(subreddits), interval)
-    # Ensure we create actual Subreddit objects instead of un-awaited
-    # coroutines. asyncpraw's ``reddit.subreddit`` returns a coroutine
-    # (via ``SubredditHelper.__call__``) that must be awaited to produce
-    # the ``Subreddit`` instance. The previous implementation stored the
-    # coroutine objects directly in ``subs`` which triggered
-    # ``RuntimeWarning: coroutine 'SubredditHelper.__call__' was never
-    # awaited`` at runtime.  Gather all Subreddit objects up front so the
-    # warmup loop works with real instances.
-    names = [
-        sub.display_name if isinstance(sub, Subreddit) else sub
-        for sub in subreddits
-    ]
-    subs: List[Subreddit] = await asyncio.gather(
-        *(reddit.subreddit(name) for name in names)
+    log.info(
+        "Starting warmup task for %d subreddits (base interval %ds)",
+        len(WARM_SUBREDDITS),
+        CONFIG.get("warmup_interval", interval),
     )
+    sem = Semaphore(CONFIG.get("max_concurrent", 5))
+
+    async def _refresh(sub: Subreddit) -> None:
+        name = sub.display_name
+        full = WARM_SCHEDULE.is_full_refresh(name, CONFIG.get("warmup_full_every", 6))
+        try:
+            async with sem:
+                added = await _refresh_subreddit(sub, listings, limit, full)
+        except Exception as e:
+            log.warning("Warmup fetch error for r/%s: %s", name, e)
+            WARM_SCHEDULE.record_failure(name)
+            return
+        period = WARM_SCHEDULE.record_refresh(name, added)
+        log.debug("Warmed r/%s (full=%s): %d new posts, next in %.0fs", name, full, added, period)
+
     async def _loop():
+        demand_at = 0.0
         while True:
-            tasks = [_fetch_concurrent(subs, listing, limit) for listing in listings]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            for listing, res in zip(listings, results):
-                if isinstance(res, dict):
-                    for name, posts in res.items():
-                        WARM_CACHE[f"{name}_{listing}"] = deque(posts, maxlen=limit)
-                        log.debug("Warmed buffer r/%s[%s] with %d items", name, listing, len(posts))
-                else:
-                    log.warning("Warmup fetch error for %s: %s", listing, res)
-            await asyncio.sleep(CONFIG.get("warmup_interval", interval))
+            _warm_wakeup.clear()
+            now = time.monotonic()
+            if now >= demand_at:
+                await _refresh_demand()
+                demand_at = now + CONFIG.get("warmup_demand_interval", 900)
+            # Resolve newly added names into actual Subreddit objects;
+            # asyncpraw's ``reddit.subreddit`` is a coroutine that must be
+            # awaited (storing it un-awaited triggers a RuntimeWarning).
+            for key, sub in list(WARM_SUBREDDITS.items()):
+                if isinstance(sub, str):
+                    resolved = await reddit.subreddit(sub)
+                    if key in WARM_SUBREDDITS:
+                        WARM_SUBREDDITS[key] = resolved
+            by_name = {
+                sub.display_name: sub
+                for sub in WARM_SUBREDDITS.values()
+                if not isinstance(sub, str)
+            }
+            due = WARM_SCHEDULE.due(by_name, now)
+            if due:
+                await asyncio.gather(*(_refresh(by_name[name]) for name in due))
+            wait = WARM_SCHEDULE.next_due(by_name) - time.monotonic()
+            try:
+                await asyncio.wait_for(
+                    _warm_wakeup.wait(),
+                    min(max(wait, 1.0), CONFIG.get("warmup_min_interval", 60)),
+                )
+            except asyncio.TimeoutError:
+                pass
     _warmup_task = asyncio.create_task(_loop())
 
+
+def add_warm_subreddit(name: str) -> None:
+    """Start keeping ``name`` warm; a running loop picks it up right away."""
+    key = name.lower()
+    if key not in WARM_SUBREDDITS:
+        WARM_SUBREDDITS[key] = name
+        _warm_wakeup.set()
+
+
+def remove_warm_subreddit(name: str) -> None:
+    """Stop warming ``name`` and free its buffers (never a ``MANDATORY`` sub)."""
+    key = name.lower()
+    if key in MANDATORY or WARM_SUBREDDITS.pop(key, None) is None:
+        return
+    for store in (WARM_CACHE, WARM_CURSORS):
+        for buf_key in [k for k in store if k.rsplit("_", 1)[0].lower() == key]:
+            del store[buf_key]
+    WARM_SCHEDULE.forget(name)
+
+
+def update_warm_subreddit(name: str, added: bool) -> None:
+    """Listener for guild subreddit changes (see ``on_subreddits_changed``)."""
+    if added:
+        add_warm_subreddit(name)
+    else:
+        remove_warm_subreddit(name)
+
+
+async def _refresh_demand() -> None:
+    """Feed send counts per subreddit from meme_stats into the schedule."""
+    from memer import meme_stats
+
+    try:
+        counts = dict(await meme_stats.get_top_subreddits(limit=500))
+    except Exception as e:
+        log.debug("Warmup demand unavailable: %s", e)
+        return
+    WARM_SCHEDULE.set_demand(counts)
+
 async def stop_warmup():
     global _warmup_task
     if _warmup_task:
@@ -238,6 +536,273 @@ async def stop_warmup():
         _warmup_task.cancel()
         _warmup_task = None
 
+# --- Perceptual repost check (optional) ---
+async def _is_repost(post) -> bool:
+    deduper = get_deduper()
+    return deduper is not None and await deduper.is_repost(post)
+
+
+def _remember_image(post) -> None:
+    deduper = get_deduper()
+    if deduper is not None:
+        deduper.remember(post)
+
+
+async def _pick_fresh(candidates: list, post_of: Callable = lambda c: c):
+    """``random.choice`` that skips perceptual reposts when that check is on.
+
+    Candidates are screened against hashes the deduper already knows; only
+    the pick itself may be downloaded, for at most ``phash_pick_timeout``
+    seconds.  If it turns out to be a repost the next screened candidate is
+    returned unchecked rather than waiting on another download.
+    """
+    if not candidates:
+        return None
+    deduper = get_deduper()
+    if deduper is None:
+        return random.choice(candidates)
+    fresh = [
+        c
+        for c in random.sample(candidates, len(candidates))
+        if not deduper.known_repost(post_of(c))
+    ]
+    if not fresh:
+        return None
+    try:
+        repost = await asyncio.wait_for(
+            deduper.is_repost(post_of(fresh[0])), CONFIG.get("phash_pick_timeout", 1)
+        )
+    except asyncio.TimeoutError:
+        repost = False
+    if not repost:
+        return fresh[0]
+    return fresh[1] if len(fresh) > 1 else None
+
+
+def _cached_result(chosen: dict, listing: str, keywords: List[str]) -> MemeResult:
+    """Wrap a cached post dict as a MemeResult and mark it sent."""
+    class Cached:
+        title = chosen["title"]
+        permalink = f"/r/{chosen['subreddit']}/comments/{chosen['post_id']}/"
+        url = chosen["media_url"]
+        id = chosen["post_id"]
+        author = chosen.get("author") or "[deleted]"
+
+    HASH_CACHE[chosen["media_url"]] = True
+    _remember_image(chosen)
+    return MemeResult(Cached, chosen.get("subreddit"), listing, keywords, [], "cache", chosen)
+
+# --- Random cache sampling ---
+async def _sample_random_cache(cache_mgr, keyword: str, nsfw: bool, exclude: set) -> List[dict]:
+    """Unsent posts drawn from random spots in the disk cache for ``keyword``.
+
+    ``exclude`` (sent and already-considered ids) is filtered in SQL; the
+    Bloom filters can't be, so sampled posts they reject are excluded too
+    and another spot is tried, up to ``random_sample_rounds`` times.
+    """
+    sample = getattr(cache_mgr, "sample_from_disk", None)
+    if sample is None:
+        return []
+    size = CONFIG.get("random_sample_size", 8)
+    for _ in range(CONFIG.get("random_sample_rounds", 3)):
+        rows = await sample(keyword, nsfw=nsfw, k=size, exclude_ids=exclude)
+        fresh = [p for p in rows if p.get("media_url") and p["media_url"] not in HASH_CACHE]
+        if fresh or len(rows) < size:
+            return fresh
+        exclude |= {p["post_id"] for p in rows}
+    return []
+
+
+# --- Single-flight keyword fetches ---
+def coalesce_summary() -> str:
+    """One-line single-flight summary for Cache Info."""
+    fetches = COALESCE_STATS["fetches"]
+    waited = COALESCE_STATS["coalesced"]
+    total = fetches + waited
+    rate = f"{waited / total:.0%}" if total else "n/a"
+    return (
+        f"{fetches} live keyword fetches, {waited} coalesced ({rate}); "
+        f"{COALESCE_STATS['shared_hits']} served from a shared fetch"
+    )
+
+# --- Dedup filter snapshots ---
+def _dedup_snapshot_paths() -> Dict[str, Tuple[RotatingBloomFilter, str]]:
+    base = CONFIG.get("snapshot_dir", "data")
+    return {
+        "ids": (ID_CACHE, os.path.join(base, "seen_ids.bloom.json")),
+        "urls": (HASH_CACHE, os.path.join(base, "seen_urls.bloom.json")),
+    }
+
+
+def load_dedup_snapshots() -> None:
+    """Restore ID_CACHE/HASH_CACHE from disk so dedup survives restarts."""
+    for name, (flt, path) in _dedup_snapshot_paths().items():
+        if flt.load(path):
+            log.info("Restored %s dedup filter (~%d entries) from %s", name, len(flt), path)
+
+
+def dedup_snapshot_payload() -> Dict[str, Tuple[str, dict]]:
+    """Copy the dedup filters into JSON-ready dicts (call on the event loop)."""
+    return {
+        name: (path, flt.snapshot_data())
+        for name, (flt, path) in _dedup_snapshot_paths().items()
+    }
+
+
+def save_dedup_snapshots(payload: Optional[Dict[str, Tuple[str, dict]]] = None) -> None:
+    """Write the dedup filters to disk; safe to run in a worker thread."""
+    if payload is None:
+        payload = dedup_snapshot_payload()
+    for name, (path, data) in payload.items():
+        try:
+            write_snapshot(path, data)
+        except OSError as e:
+            log.warning("Failed to snapshot %s dedup filter to %s: %s", name, path, e)
+
+
+def dedup_filter_summary() -> str:
+    """One-line summary of the dedup filters for Cache Info."""
+    parts = []
+    for name, (flt, _) in _dedup_snapshot_paths().items():
+        parts.append(
+            f"{name} ~{len(flt)} in {flt.memory_bytes() / 1024:.0f} KiB"
+        )
+    fp = CONFIG.get("dedup_fp_rate", 0.001)
+    return f"{', '.join(parts)} (fp ≤ {fp:.2%})"
+
+# --- Warm cache snapshot ---
+_WARM_SNAPSHOT_VERSION = 1
+
+
+def _warm_snapshot_path() -> str:
+    return os.path.join(CONFIG.get("snapshot_dir", "data"), "warm_cache.json")
+
+
+def warm_snapshot_payload() -> dict:
+    """Copy WARM_CACHE into a JSON-ready dict (call on the event loop)."""
+    return {
+        "version": _WARM_SNAPSHOT_VERSION,
+        "saved_at": time.time(),
+        "buffers": {
+            key: {"maxlen": buf.maxlen, "records": [r.to_dict() for r in buf]}
+            for key, buf in WARM_CACHE.items()
+            if buf
+        },
+    }
+
+
+def save_warm_snapshot(payload: Optional[dict] = None) -> None:
+    """Write the warm buffers to disk; safe to run in a worker thread."""
+    if payload is None:
+        payload = warm_snapshot_payload()
+    path = _warm_snapshot_path()
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp, path)
+    except OSError as e:
+        log.warning("Failed to snapshot warm cache to %s: %s", path, e)
+
+
+def load_warm_snapshot() -> int:
+    """Seed empty WARM_CACHE buffers from the last snapshot.
+
+    Snapshots older than ``warm_snapshot_max_age`` are ignored, and records
+    already sent (per ID_CACHE/HASH_CACHE) are skipped.  Returns the number
+    of records loaded.
+    """
+    path = _warm_snapshot_path()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return 0
+    except (OSError, ValueError) as e:
+        log.warning("Could not read warm cache snapshot %s: %s", path, e)
+        return 0
+    if data.get("version") != _WARM_SNAPSHOT_VERSION:
+        return 0
+    age = time.time() - data.get("saved_at", 0)
+    if age > CONFIG.get("warm_snapshot_max_age", 3600):
+        log.info("Ignoring warm cache snapshot: %.0fs old", age)
+        return 0
+
+    loaded = 0
+    for key, entry in data.get("buffers", {}).items():
+        if WARM_CACHE.get(key):
+            continue
+        records = []
+        for item in entry.get("records", []):
+            try:
+                record = PostRecord.from_dict(item)
+            except (KeyError, TypeError, ValueError):
+                continue
+            if record.id in ID_CACHE or record.media_url in HASH_CACHE:
+                continue
+            records.append(record)
+        WARM_CACHE[key] = WarmBuffer(records, maxlen=entry.get("maxlen"))
+        get_keyword_index().add_many(records)
+        loaded += len(records)
+    log.info("Restored %d warm cache records from %s (%.0fs old)", loaded, path, age)
+    return loaded
+
+# --- .random() capability cache ---
+@dataclass
+class RandomCapability:
+    attempts: int = 0
+    successes: int = 0
+    broken_until: float = 0.0
+
+    @property
+    def success_rate(self) -> float:
+        return self.successes / self.attempts if self.attempts else 0.0
+
+
+RANDOM_CAPABILITY: Dict[str, RandomCapability] = {}
+
+
+def _random_supported(name: str) -> bool:
+    cap = RANDOM_CAPABILITY.get(name)
+    if cap is None or not cap.broken_until:
+        return True
+    if time.time() >= cap.broken_until:
+        # TTL expired: give .random() another chance with a clean slate
+        RANDOM_CAPABILITY.pop(name, None)
+        return True
+    return False
+
+
+def _record_random(name: str, ok: bool, broken: bool = False) -> None:
+    """Track .random() outcomes; mark the sub broken on a 400 or a poor record."""
+    cap = RANDOM_CAPABILITY.setdefault(name, RandomCapability())
+    cap.attempts += 1
+    if ok:
+        cap.successes += 1
+        return
+    min_attempts = CONFIG.get("random_min_attempts", 3)
+    if broken or (
+        cap.attempts >= min_attempts
+        and cap.success_rate < CONFIG.get("random_min_success_rate", 0.25)
+    ):
+        ttl = CONFIG.get("random_broken_ttl", 6 * 3600)
+        cap.broken_until = time.time() + ttl
+        log.debug("Marking .random() broken for r/%s for %ds", name, ttl)
+
+
+def random_capability_summary() -> str:
+    """One-line summary of the .random() capability cache for Cache Info."""
+    broken = sorted(n for n in list(RANDOM_CAPABILITY) if not _random_supported(n))
+    attempts = sum(c.attempts for c in RANDOM_CAPABILITY.values())
+    successes = sum(c.successes for c in RANDOM_CAPABILITY.values())
+    rate = f"{successes / attempts:.0%}" if attempts else "n/a"
+    names = f" ({', '.join(broken[:10])}{', …' if len(broken) > 10 else ''})" if broken else ""
+    return (
+        f"{len(RANDOM_CAPABILITY)} subs tracked, {len(broken)} skipped{names}, "
+        f"success {rate}"
+    )
+
 # --- Main Fetch Function ---
 async def simple_random_meme(reddit: Reddit, subreddit_name: str) -> Optional[Submission]:
     """
@@ -254,26 +819,34 @@ async def simple_random_meme(reddit: Reddit, subreddit_name: str) -> Optional[Su
 
     want = subreddit_name.lower()
 
-    # 1️⃣ Try the true random endpoint
-    try:
-        p = await sub.random()  # this will 400 on many subs
-        if p and getattr(getattr(p, "subreddit", None), "display_name", "").lower() == want:
-            log.debug("simple_random_meme: got %s via .random() on r/%s", p.id, subreddit_name)
-            return p
-    except BadRequest as e:
-        log.debug(
-            "simple_random_meme: .random() bad request for r/%s: %s",
-            subreddit_name,
-            e,
-        )
-    except (NotFound, Forbidden) as e:
-        raise SubredditUnavailableError(subreddit_name) from e
-    except Exception as e:
-        log.debug(
-            "simple_random_meme: .random() failed for r/%s: %s",
-            subreddit_name,
-            e,
-        )
+    # 1️⃣ Try the true random endpoint, unless we already know it's broken here
+    if _random_supported(want):
+        try:
+            await throttle()
+            p = await sub.random()  # this will 400 on many subs
+            if p and getattr(getattr(p, "subreddit", None), "display_name", "").lower() == want:
+                log.debug("simple_random_meme: got %s via .random() on r/%s", p.id, subreddit_name)
+                _record_random(want, True)
+                return p
+            _record_random(want, False)
+        except BadRequest as e:
+            log.debug(
+                "simple_random_meme: .random() bad request for r/%s: %s",
+                subreddit_name,
+                e,
+            )
+            _record_random(want, False, broken=True)
+        except (NotFound, Forbidden) as e:
+            raise SubredditUnavailableError(subreddit_name) from e
+        except Exception as e:
+            log.debug(
+                "simple_random_meme: .random() failed for r/%s: %s",
+                subreddit_name,
+                e,
+            )
+            _record_random(want, False)
+    else:
+        log.debug("simple_random_meme: skipping .random() for r/%s (known broken)", subreddit_name)
 
     # 2️⃣ Fallback → .hot()
     try:
@@ -316,10 +889,16 @@ async def fetch_meme(
     filters: Optional[Sequence[Callable[[Submission], bool]]] = None,
     nsfw: bool = False,
     exclude_ids: Optional[Sequence[str]] = None,
+    enough_posts: Optional[int] = None,
+    channel_id: Optional[int] = None,
 ) -> MemeResult:
     from memer.helpers.meme_utils import extract_post_data
     extract_fn = extract_fn or extract_post_data
     is_async_extract = inspect.iscoroutinefunction(extract_fn)
+    if keyword:
+        # one spelling for every cache tier and the single-flight key, so
+        # "Cats" and "cats" share entries and in-flight fetches
+        keyword = keyword.lower()
 
     regex = keyword is not None
     subreddit_names = {
@@ -328,29 +907,36 @@ async def fetch_meme(
     }
 
     RAND_SENTINEL = "__random__"
+    consumer = channel_id if channel_id is not None else SHARED
     ram_random: List[dict] = []
-    disk_random: List[dict] = []
     ram_random_ids: set = set()
-    disk_random_ids: set = set()
     random_cache_ids: set = set()
     random_cache_urls: set = set()
     if not keyword:
         ram_random = cache_mgr.get_from_ram(RAND_SENTINEL, nsfw=nsfw) or []
         ram_random_ids = {p.get("post_id") for p in ram_random if p.get("post_id")}
-        disk_random = await cache_mgr.get_from_disk(RAND_SENTINEL, nsfw=nsfw) or []
-        disk_random_ids = {p.get("post_id") for p in disk_random if p.get("post_id")}
-        combined_random = ram_random + [p for p in disk_random if p.get("post_id") not in ram_random_ids]
-        random_cache_ids = ram_random_ids | disk_random_ids
+        disk_random = await _sample_random_cache(
+            cache_mgr, RAND_SENTINEL, nsfw, set(exclude_ids or ()) | ram_random_ids
+        )
+        combined_random = ram_random + disk_random
+        random_cache_ids = ram_random_ids | {p.get("post_id") for p in disk_random}
         random_cache_urls = {p.get("media_url") for p in combined_random if p.get("media_url")}
     else:
         combined_random = []
 
-    def is_valid_post(p: Submission) -> bool:
+    channel_sent = set(exclude_ids or ())
+
+    def is_valid_post(p: Submission, warm: bool = False) -> bool:
         if not p or not getattr(p, "url", None):
             return False
         pid = getattr(p, "id", None)
         url = getattr(p, "url", None)
-        if url and url in HASH_CACHE:
+        if warm:
+            # warm buffers are shared by every guild: only this channel's
+            # history rules a post out (the buffer tracks what it has read)
+            if pid in channel_sent:
+                return False
+        elif url and url in HASH_CACHE:
             return False
         if not keyword:
             if pid and pid in random_cache_ids:
@@ -365,6 +951,10 @@ async def fetch_meme(
 
     # ─── keyword path ─────────────────────────────────────
     if keyword:
+        record_demand = getattr(cache_mgr, "record_demand", None)
+        if record_demand is not None:
+            record_demand(keyword, nsfw=nsfw)
+
         # (1) RAM cache
         posts = cache_mgr.get_from_ram(keyword, nsfw=nsfw)
         if posts:
@@ -374,26 +964,9 @@ async def fetch_meme(
                 if p.get("media_url")
                 and p.get("subreddit", "").lower() in subreddit_names
             ]
-            if valid:
-                chosen = random.choice(valid)
-                class Cached:
-                    title = chosen["title"]
-                    permalink = f"/r/{chosen['subreddit']}/comments/{chosen['post_id']}/"
-                    url = chosen["media_url"]
-                    id = chosen["post_id"]
-                    author = chosen.get("author") or "[deleted]"
-
-                if chosen.get("media_url"):
-                    HASH_CACHE[chosen["media_url"]] = True
-                return MemeResult(
-                    Cached,
-                    chosen.get("subreddit"),
-                    "cache_ram",
-                    [keyword],
-                    [],
-                    "cache",
-                    chosen,
-                )
+            chosen = await _pick_fresh(valid)
+            if chosen:
+                return _cached_result(chosen, "cache_ram", [keyword])
 
         # (2) Disk cache
         posts = await cache_mgr.get_from_disk(keyword, nsfw=nsfw)
@@ -404,87 +977,156 @@ async def fetch_meme(
                 if p.get("media_url")
                 and p.get("subreddit", "").lower() in subreddit_names
             ]
-            if valid:
-                chosen = random.choice(valid)
-                class Cached:
-                    title = chosen["title"]
-                    permalink = f"/r/{chosen['subreddit']}/comments/{chosen['post_id']}/"
-                    url = chosen["media_url"]
-                    id = chosen["post_id"]
-                    author = chosen.get("author") or "[deleted]"
-
-                if chosen.get("media_url"):
-                    HASH_CACHE[chosen["media_url"]] = True
-                return MemeResult(
-                    Cached,
-                    chosen["subreddit"],
-                    "cache_disk",
-                    [keyword],
-                    [],
-                    "cache",
-                    chosen,
-                )
+            chosen = await _pick_fresh(valid)
+            if chosen:
+                return _cached_result(chosen, "cache_disk", [keyword])
+
+        # (2b) Title index: posts cached under other keywords, the random
+        # pool or a warm buffer whose titles match.
+        # (2c) Full-text search: bm25-ranked title matches from the whole
+        # disk cache, whatever keyword they were stored under.
+        title_sources = (
+            ("cache_index", getattr(cache_mgr, "search_index", None), {}),
+            (
+                "cache_fts",
+                getattr(cache_mgr, "search_disk", None),
+                {"limit": CONFIG.get("fts_result_limit", 25)},
+            ),
+        )
+        excluded = set(exclude_ids or ())
+        for listing, search, extra in title_sources:
+            if search is None:
+                continue
+            matches = search(keyword, nsfw=nsfw, subreddits=subreddit_names, **extra)
+            if inspect.isawaitable(matches):
+                matches = await matches
+            valid = [
+                p
+                for p in matches
+                if p.get("media_url")
+                and p["media_url"] not in HASH_CACHE
+                and p.get("post_id") not in excluded
+            ]
+            chosen = await _pick_fresh(valid)
+            if chosen:
+                cache_mgr.cache_to_ram(keyword, valid, nsfw=nsfw)
+                return _cached_result(chosen, listing, [keyword])
 
         # (3) Disabled?
         if cache_mgr.is_disabled(keyword, nsfw=nsfw):
             return MemeResult(None, None, None, [keyword], ["disabled"], "fallback")
 
         # (4) Live Reddit fetch across all provided subreddits
-        posts: List[Tuple[Submission, dict]] = []
-        listing_used: Optional[str] = None
-        try:
-            # create subreddit objects (concurrently)
-            sub_objs = await asyncio.gather(
-                *(reddit.subreddit(s) for s in subreddits)
-            )
+        flight_key = (keyword, nsfw, frozenset(subreddit_names))
+        while (flight := _INFLIGHT.get(flight_key)) is not None:
+            # an identical fetch is running: wait for it to fill the RAM cache
+            # and pick our own post from what it found
+            COALESCE_STATS["coalesced"] += 1
+            await flight.wait()
+            excluded = set(exclude_ids or ())
+            valid = [
+                p
+                for p in cache_mgr.get_from_ram(keyword, nsfw=nsfw) or []
+                if p.get("media_url")
+                and p["media_url"] not in HASH_CACHE
+                and p.get("post_id") not in excluded
+                and p.get("subreddit", "").lower() in subreddit_names
+            ]
+            chosen = await _pick_fresh(valid)
+            if chosen:
+                COALESCE_STATS["shared_hits"] += 1
+                return _cached_result(chosen, "coalesced", [keyword])
+            # the shared fetch failed or its posts are used up: fetch ourselves
+            # unless it already gave up on the keyword, or another waiter woke
+            # first and is already fetching again
+            if cache_mgr.is_disabled(keyword, nsfw=nsfw):
+                return MemeResult(None, None, None, [keyword], ["disabled"], "fallback")
 
-            # search each subreddit for the keyword first
-            for sub_obj in sub_objs:
-                try:
-                    async for post in _search_with_retry(sub_obj, keyword, limit):
+        COALESCE_STATS["fetches"] += 1
+        flight = _INFLIGHT[flight_key] = asyncio.Event()
+        try:
+            async def valid_candidates(source: AsyncIterator[Submission]):
+                async with aclosing(source):
+                    async for post in source:
                         if is_valid_post(post):
                             data = await extract_fn(post) if is_async_extract else extract_fn(post)
-                            posts.append((post, data))
-                except Exception:
-                    # if search isn't supported or fails, skip to listings
-                    continue
-
-            if not posts:
-                # fallback to listings if search yielded nothing
-                for listing_choice in listings:
-                    posts = []
-                    posts_by_sub = await _fetch_concurrent(sub_objs, listing_choice, limit)
-                    for sub_name, post_list in posts_by_sub.items():
-                        for post in post_list:
-                            if is_valid_post(post):
-                                data = await extract_fn(post) if is_async_extract else extract_fn(post)
-                                posts.append((post, data))
+                            yield post, data
+
+            posts: List[Tuple[Submission, dict]] = []
+            chosen: Optional[Tuple[Submission, dict]] = None
+            listing_used: Optional[str] = None
+            try:
+                # create subreddit objects (concurrently)
+                sub_objs = await asyncio.gather(
+                    *(reddit.subreddit(s) for s in subreddits)
+                )
+
+                # Stream candidates from a concurrent search first, then each
+                # listing in turn if search yielded nothing.  Reservoir-sample the
+                # pick and stop once we have "enough"; the rest of the stage keeps
+                # filling the cache in the background.
+                enough = enough_posts if enough_posts is not None else CONFIG.get("keyword_enough_posts", 15)
+                stages = [("search", lambda: _search_concurrent(sub_objs, keyword, limit))]
+                stages += [
+                    (listing_choice, lambda l=listing_choice: _listing_concurrent(sub_objs, l, limit))
+                    for listing_choice in listings
+                ]
+                for stage, open_stage in stages:
+                    candidates = valid_candidates(open_stage())
+                    exhausted = True
+                    async for item in candidates:
+                        posts.append(item)
+                        if random.randrange(len(posts)) == 0:
+                            chosen = item
+                        if enough and len(posts) >= enough:
+                            exhausted = False
+                            break
+                    if exhausted:
+                        await candidates.aclose()
                     if posts:
-                        listing_used = listing_choice
+                        listing_used = stage
+                        if not exhausted:
+                            _spawn_background(
+                                _drain_to_cache(
+                                    candidates,
+                                    cache_mgr,
+                                    keyword,
+                                    nsfw,
+                                    [d for _, d in posts],
+                                    CONFIG.get("candidate_drain_timeout", 30),
+                                )
+                            )
                         break
-            else:
-                listing_used = "search"
-        except Exception:
-            posts = []
+            except Exception:
+                posts = []
 
-        if posts:
-            cache_posts = [d for _, d in posts]
-            cache_mgr.cache_to_ram(keyword, cache_posts, nsfw=nsfw)
-            await cache_mgr.save_to_disk(keyword, cache_posts, nsfw=nsfw)
-            chosen_post, chosen_data = random.choice(posts)
-            url = getattr(chosen_post, "url", None)
-            if url:
-                HASH_CACHE[url] = True
-            return MemeResult(
-                chosen_post,
-                chosen_data.get("subreddit"),
-                listing_used,
-                [keyword],
-                [],
-                "live",
-                chosen_data,
-            )
-        else:
+            if chosen and await _is_repost(chosen[0]):
+                chosen = await _pick_fresh(
+                    [item for item in posts if item is not chosen], post_of=lambda item: item[0]
+                )
+            if posts:
+                # cache what was found even if every post was a repost:
+                # the keyword itself is fine and shouldn't count as failing
+                cache_posts = [d for _, d in posts]
+                cache_mgr.cache_to_ram(keyword, cache_posts, nsfw=nsfw)
+                _persist(cache_mgr, keyword, cache_posts, nsfw)
+            if chosen:
+                chosen_post, chosen_data = chosen
+                url = getattr(chosen_post, "url", None)
+                if url:
+                    HASH_CACHE[url] = True
+                _remember_image(chosen_post)
+                return MemeResult(
+                    chosen_post,
+                    chosen_data.get("subreddit"),
+                    listing_used,
+                    [keyword],
+                    [],
+                    "live",
+                    chosen_data,
+                )
+            if posts:
+                return MemeResult(None, None, None, [keyword], ["only reposts"], "fallback")
             cache_mgr.record_failure(keyword, nsfw=nsfw)
             return MemeResult(
                 None,
@@ -494,6 +1136,10 @@ async def fetch_meme(
                 ["no valid posts"],
                 "fallback",
             )
+        finally:
+            if _INFLIGHT.get(flight_key) is flight:
+                del _INFLIGHT[flight_key]
+            flight.set()
 
     # ─── no-keyword fallback ──────────────────────────────
     tried: List[str] = []
@@ -508,26 +1154,13 @@ async def fetch_meme(
             if p.get("media_url")
             and p.get("media_url") not in HASH_CACHE
         ]
-        if valid:
-            chosen = random.choice(valid)
-            class Cached:
-                title = chosen["title"]
-                permalink = f"/r/{chosen['subreddit']}/comments/{chosen['post_id']}/"
-                url = chosen["media_url"]
-                id = chosen["post_id"]
-                author = chosen.get("author") or "[deleted]"
-
-            if chosen.get("media_url"):
-                HASH_CACHE[chosen["media_url"]] = True
+        chosen = await _pick_fresh(valid)
+        if chosen:
             source_listing = "cache_ram" if chosen["post_id"] in ram_random_ids else "cache_disk"
-            return MemeResult(
-                Cached,
-                chosen.get("subreddit"),
+            return _cached_result(
+                chosen,
                 source_listing,
                 [chosen.get("subreddit")] if chosen.get("subreddit") else [],
-                [],
-                "cache",
-                chosen,
             )
 
     # 1️⃣ Check warm cache buffers first
@@ -536,18 +1169,21 @@ async def fetch_meme(
             key = f"{name}_{listing_choice}"
             buf = WARM_CACHE.get(key)
             if buf:
-                while buf:
-                    post = buf.pop()
-                    if post and is_valid_post(post):
+                for post in buf.unread(consumer):
+                    # rejected posts are only skipped for this channel
+                    buf.mark(consumer, post.id)
+                    if is_valid_post(post, warm=True) and not await _is_repost(post):
+                        WARM_SCHEDULE.record_drain(name)
                         data = await extract_fn(post) if is_async_extract else extract_fn(post)
                         existing_rand = cache_mgr.get_from_ram(RAND_SENTINEL, nsfw=nsfw) or []
                         if data.get("post_id") not in {p.get("post_id") for p in existing_rand}:
                             existing_rand.append(data)
                         cache_mgr.cache_to_ram(RAND_SENTINEL, existing_rand, nsfw=nsfw)
-                        await cache_mgr.save_to_disk(RAND_SENTINEL, [data], nsfw=nsfw)
+                        _persist(cache_mgr, RAND_SENTINEL, [data], nsfw)
                         url = getattr(post, "url", None)
                         if url:
                             HASH_CACHE[url] = True
+                        _remember_image(post)
                         return MemeResult(post, name, listing_choice, [name], [], "warm", data)
 
     # 2️⃣ Live fetch
@@ -563,19 +1199,23 @@ async def fetch_meme(
                     count += 1
                     if random.randrange(count) == 0:
                         choice_post = post
-            if choice_post:
+            if choice_post and not await _is_repost(choice_post):
                 data = await extract_fn(choice_post) if is_async_extract else extract_fn(choice_post)
                 key = f"{name}_{listing_choice}"
-                buf = WARM_CACHE.setdefault(key, deque(maxlen=limit))
-                buf.appendleft(choice_post)
+                buf = WARM_CACHE.setdefault(key, WarmBuffer(maxlen=limit))
+                record = as_record(choice_post)
+                if record is not None:
+                    buf.appendleft(record)
+                    get_keyword_index().add(record)
                 existing_rand = cache_mgr.get_from_ram(RAND_SENTINEL, nsfw=nsfw) or []
                 if data.get("post_id") not in {p.get("post_id") for p in existing_rand}:
                     existing_rand.append(data)
                 cache_mgr.cache_to_ram(RAND_SENTINEL, existing_rand, nsfw=nsfw)
-                await cache_mgr.save_to_disk(RAND_SENTINEL, [data], nsfw=nsfw)
+                _persist(cache_mgr, RAND_SENTINEL, [data], nsfw)
                 url = getattr(choice_post, "url", None)
                 if url:
                     HASH_CACHE[url] = True
+                _remember_image(choice_post)
                 return MemeResult(choice_post, name, listing_choice, tried, [], "fallback", data)
         except Exception:
             continue
@@ -584,16 +1224,17 @@ async def fetch_meme(
     raw = subreddits[0]
     chosen_sub = raw.display_name if hasattr(raw, "display_name") else str(raw)
     post = await simple_random_meme(reddit, chosen_sub)
-    if post and is_valid_post(post):
+    if post and is_valid_post(post) and not await _is_repost(post):
         data = await extract_fn(post) if is_async_extract else extract_fn(post)
         existing_rand = cache_mgr.get_from_ram(RAND_SENTINEL, nsfw=nsfw) or []
         if data.get("post_id") not in {p.get("post_id") for p in existing_rand}:
             existing_rand.append(data)
         cache_mgr.cache_to_ram(RAND_SENTINEL, existing_rand, nsfw=nsfw)
-        await cache_mgr.save_to_disk(RAND_SENTINEL, [data], nsfw=nsfw)
+        _persist(cache_mgr, RAND_SENTINEL, [data], nsfw)
         url = getattr(post, "url", None)
         if url:
             HASH_CACHE[url] = True
+        _remember_image(post)
         return MemeResult(post, chosen_sub, "random", tried, [], "random", data)
 
     # ─── total failure ────────────────────────────────────
@@ -0,0 +1,134 @@
+"""Compare the old single-table disk cache with the keyword_posts schema.
+
+Saves ``POSTS`` posts under ``KEYWORDS`` keywords, where each post matches
+1-``MAX_KEYWORDS_PER_POST`` of them (plus ``__random__`` for a share), then
+reports how many of the saved (keyword, post) entries each layout can still
+serve from disk and how big the database file ends up.
+
+The old layout keyed rows by ``post_id`` alone and used INSERT OR REPLACE, so
+a post saved under a second keyword vanished from the first.
+"""
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from memer.helpers import reddit_cache
+from memer.helpers.keyword_index import KeywordIndex
+from memer.helpers.reddit_cache import RedditCacheManager
+
+POSTS = 5000
+KEYWORDS = 200
+MAX_KEYWORDS_PER_POST = 3
+RANDOM_SHARE = 0.3
+
+LEGACY_SCHEMA = """
+    CREATE TABLE meme_cache (
+        keyword TEXT NOT NULL,
+        subreddit TEXT NOT NULL,
+        post_id TEXT PRIMARY KEY,
+        title TEXT,
+        url TEXT,
+        media_url TEXT,
+        author TEXT,
+        is_nsfw BOOLEAN,
+        created_utc INTEGER,
+        cached_at INTEGER
+    )
+"""
+
+
+def workload(seed=1):
+    rng = random.Random(seed)
+    keywords = [f"kw{i}" for i in range(KEYWORDS)]
+    saves = {}
+    for i in range(POSTS):
+        post = {
+            "post_id": f"p{i}",
+            "subreddit": "memes",
+            "title": f"meme number {i} " + " ".join(rng.sample(keywords, 2)),
+            "url": f"https://i.redd.it/p{i}.jpg",
+            "media_url": f"https://i.redd.it/p{i}.jpg",
+            "author": "someone",
+            "is_nsfw": False,
+            "created_utc": 1700000000 + i,
+        }
+        matched = rng.sample(keywords, rng.randint(1, MAX_KEYWORDS_PER_POST))
+        if rng.random() < RANDOM_SHARE:
+            matched.append("__random__")
+        for kw in matched:
+            saves.setdefault(kw, []).append(post)
+    return saves
+
+
+def run_legacy(path, saves):
+    conn = sqlite3.connect(path)
+    conn.execute(LEGACY_SCHEMA)
+    conn.execute("CREATE INDEX idx_keyword ON meme_cache(keyword)")
+    conn.execute("CREATE INDEX idx_cached_at ON meme_cache(cached_at)")
+    now = int(time.time())
+    for kw, posts in saves.items():
+        conn.executemany(
+            "INSERT OR REPLACE INTO meme_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (kw, p["subreddit"], p["post_id"], p["title"], p["url"], p["media_url"],
+                 p["author"], 0, p["created_utc"], now)
+                for p in posts
+            ],
+        )
+    conn.commit()
+    served = sum(
+        conn.execute(
+            "SELECT COUNT(*) FROM meme_cache WHERE keyword = ? AND is_nsfw = 0",
+            (kw,),
+        ).fetchone()[0]
+        for kw in saves
+    )
+    conn.execute("VACUUM")
+    conn.close()
+    return served
+
+
+async def run_normalized(path, saves):
+    reddit_cache.DB_PATH = path
+    mgr = RedditCacheManager(index=KeywordIndex(max_posts=1))
+    await mgr.init()
+    try:
+        for kw, posts in saves.items():
+            await mgr.save_to_disk(kw, posts)
+        served = 0
+        for kw in saves:
+            served += len(await mgr.get_from_disk(kw) or ())
+        await mgr.conn.execute("VACUUM")
+    finally:
+        await mgr.close()
+    return served
+
+
+def report(label, path, saved, served):
+    size = os.path.getsize(path) / 1024
+    print(
+        f"{label}: disk hit rate {served / saved:.1%} ({served}/{saved} entries), "
+        f"{size:.0f} KiB ({size * 1024 / served:.0f} B per servable entry)"
+    )
+
+
+def main():
+    saves = workload()
+    saved = sum(len(posts) for posts in saves.values())
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = os.path.join(tmp, "legacy.db")
+        report("Old meme_cache table", legacy, saved, run_legacy(legacy, saves))
+        normalized = os.path.join(tmp, "normalized.db")
+        report(
+            "posts + keyword_posts (incl. FTS)",
+            normalized,
+            saved,
+            asyncio.run(run_normalized(normalized, saves)),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Compare Reddit requests per keyword fetch with and without post.load().
+
+Simulates a keyword search returning ``limit`` listing posts, all of which
+already carry their media fields, plus a handful of bare posts that really
+do need a ``load()``.  Each ``load()`` sleeps for ``LATENCY`` to stand in for
+an HTTP round trip.
+"""
+import asyncio
+import time
+
+from memer.helpers.meme_utils import extract_post_data
+
+LATENCY = 0.01
+
+
+class FakeSubreddit:
+    display_name = "memes"
+
+
+class FakeSubmission:
+    def __init__(self, i, stats, listing=True):
+        self._stats = stats
+        self.id = f"p{i}"
+        self.title = f"cat meme {i}"
+        self.subreddit = FakeSubreddit()
+        self.permalink = f"/r/memes/comments/p{i}/"
+        self.author = "someone"
+        self.over_18 = False
+        self.created_utc = 1700000000
+        if listing:
+            self._fill()
+
+    def _fill(self):
+        self.url = f"https://i.redd.it/{self.id}.jpg"
+        self.media = None
+        self.secure_media = None
+        self.preview = {"images": [{"source": {"url": self.url}, "variants": {}}]}
+
+    async def load(self):
+        self._stats["requests"] += 1
+        await asyncio.sleep(LATENCY)
+        self._fill()
+
+
+async def run(load, limit=75, bare=3):
+    stats = {"requests": 0}
+    posts = [FakeSubmission(i, stats) for i in range(limit - bare)]
+    posts += [FakeSubmission(limit + i, stats, listing=False) for i in range(bare)]
+    start = time.perf_counter()
+    for post in posts:
+        await extract_post_data(post, load=load)
+    return stats["requests"], time.perf_counter() - start
+
+
+async def main():
+    old_requests, t_old = await run(load=True)
+    new_requests, t_new = await run(load=None)
+    print(f"Always load: {old_requests} requests, {t_old:.4f}s")
+    print(f"Load only when needed: {new_requests} requests, {t_new:.4f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
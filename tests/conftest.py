@@ -110,6 +110,8 @@ sys.modules.setdefault("discord.app_commands", discord_stub.app_commands)
 # Ensure global caches are clean for each test
 import pytest
 from memer import reddit_meme as meme_mod
+from memer.helpers import candidate_pool, rate_limit
+from memer.helpers.keyword_index import get_keyword_index
 
 
 @pytest.fixture(autouse=True)
@@ -117,3 +119,13 @@ def _clear_caches():
     meme_mod.ID_CACHE.clear()
     meme_mod.HASH_CACHE.clear()
     meme_mod.WARM_CACHE.clear()
+    meme_mod.WARM_CURSORS.clear()
+    meme_mod.WARM_SUBREDDITS.clear()
+    meme_mod.RANDOM_CAPABILITY.clear()
+    candidate_pool.POOLS.clear()
+    get_keyword_index().clear()
+
+    meme_mod._INFLIGHT.clear()
+    meme_mod.COALESCE_STATS.clear()
+    # a fresh token bucket, so earlier tests' fetches don't throttle this one
+    rate_limit.reset_limiter()
@@ -0,0 +1,112 @@
+import os
+import sys
+import asyncio
+from collections import deque
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import memer.cogs.meme as meme_mod
+from memer.cogs.meme import Meme
+from memer.helpers import candidate_pool
+from memer.helpers.post_record import PostRecord
+from memer.reddit_meme import WARM_CACHE, HASH_CACHE, ID_CACHE
+
+
+def _record(pid, sub="memes", over_18=False, ext=".jpg"):
+    url = f"https://i.redd.it/{pid}{ext}"
+    return PostRecord(
+        id=pid,
+        subreddit_name=sub,
+        title=f"meme {pid}",
+        url=url,
+        media_url=url,
+        permalink=f"/r/{sub}/comments/{pid}/",
+        author="someone",
+        over_18=over_18,
+    )
+
+
+def test_refill_from_warm_cache_vets_posts(monkeypatch):
+    monkeypatch.setattr(candidate_pool, "get_guild_subreddits", lambda gid, cat: ["memes"])
+    WARM_CACHE["memes_hot"] = deque([
+        _record("a"),
+        _record("nsfw", over_18=True),
+        _record("text", ext=".html"),
+        _record("sent"),
+    ])
+    HASH_CACHE["https://i.redd.it/sent.jpg"] = True
+
+    added = asyncio.run(candidate_pool.refill(None, 1, False))
+
+    assert added == 1
+    assert [r.id for r in candidate_pool.POOLS[(1, False)]] == ["a"]
+    # warm buffer is read, not drained
+    assert len(WARM_CACHE["memes_hot"]) == 4
+
+
+def test_pop_skips_excluded_and_marks_sent():
+    candidate_pool.POOLS[(1, False)] = deque([_record("recent"), _record("fresh")])
+
+    record = candidate_pool.pop_candidate(1, False, exclude={"recent"})
+
+    assert record.id == "fresh"
+    assert record.media_url in HASH_CACHE
+    assert candidate_pool.pop_candidate(1, False) is None
+
+
+def test_pop_skips_ids_sent_since_the_pool_was_filled():
+    candidate_pool.POOLS[(1, False)] = deque([_record("sent"), _record("fresh")])
+    ID_CACHE["sent"] = True  # e.g. sent from a cache tier under another URL
+
+    assert candidate_pool.pop_candidate(1, False).id == "fresh"
+
+
+def test_pop_unknown_guild_registers_pool():
+    assert candidate_pool.pop_candidate(42, True) is None
+    assert (42, True) in candidate_pool.POOLS
+
+
+def test_meme_serves_from_pool_without_reddit(monkeypatch):
+    meme_cog = Meme.__new__(Meme)
+    meme_cog.cache_service = SimpleNamespace(cache_mgr=None)
+    meme_cog.reddit = SimpleNamespace()
+    candidate_pool.POOLS[(1, False)] = deque([_record("pooled")])
+
+    async def fail_simple_random_meme(reddit, sub):
+        raise AssertionError("live fetch should not run")
+
+    async def fake_get_recent_post_ids(*a, **k):
+        return []
+
+    async def fake_update_stats(*a, **k):
+        pass
+
+    captured = {}
+
+    async def fake_send_meme(ctx, url, content=None, embed=None):
+        captured["url"] = url
+        captured["embed"] = embed
+        return SimpleNamespace(id=1)
+
+    monkeypatch.setattr(meme_mod, "simple_random_meme", fail_simple_random_meme)
+    monkeypatch.setattr(meme_mod, "get_recent_post_ids", fake_get_recent_post_ids)
+    monkeypatch.setattr(meme_mod, "register_meme_message", lambda *a, **k: None)
+    monkeypatch.setattr(meme_mod, "update_stats", fake_update_stats)
+    monkeypatch.setattr(meme_mod, "send_meme", fake_send_meme)
+
+    async def fake_defer():
+        pass
+
+    ctx = SimpleNamespace(
+        guild=SimpleNamespace(id=1),
+        author=SimpleNamespace(id=2),
+        channel=SimpleNamespace(id=3),
+        interaction=None,
+        defer=fake_defer,
+    )
+
+    asyncio.run(Meme.meme(meme_cog, ctx))
+
+    assert captured["url"] == "https://i.redd.it/pooled.jpg"
+    assert captured["embed"].footer.text == "via POOL"
@@ -0,0 +1,63 @@
+import os
+import sys
+import asyncio
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from memer.helpers import db
+
+
+def test_unflushed_sends_are_seen_immediately(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "memes.db"))
+
+    async def _run():
+        await db.init()
+        try:
+            db.register_meme_message("m1", 10, 1, "u", "t", post_id="p1")
+            # flusher runs every few seconds; the index must not wait for it
+            sent = await db.has_post_been_sent(10, "p1")
+            other_channel = await db.has_post_been_sent(11, "p1")
+            recent = await db.get_recent_post_ids(10)
+        finally:
+            await db.close()
+        return sent, other_channel, recent
+
+    sent, other_channel, recent = asyncio.run(_run())
+
+    assert sent is True
+    assert other_channel is False
+    assert recent == ["p1"]
+
+
+def test_index_is_seeded_from_disk_and_capped(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "memes.db"))
+    monkeypatch.setattr(db, "_MAX_IDS_PER_CHANNEL", 3)
+
+    async def _run():
+        await db.init()
+        for i in range(4):
+            db.register_meme_message(f"m{i}", 10, 1, "u", "t", post_id=f"p{i}")
+        await db.close()  # flushes to disk and drops the index
+
+        await db.init()
+        try:
+            db.register_meme_message("m9", 10, 1, "u", "t", post_id="p9")
+            return await db.get_recent_post_ids(10)
+        finally:
+            await db.close()
+
+    assert asyncio.run(_run()) == ["p9", "p3", "p2"]
+
+
+def test_channel_lru_evicts_least_recent(monkeypatch):
+    monkeypatch.setattr(db, "_MAX_CHANNELS", 2)
+    db._seen.clear()
+    db._loaded.clear()
+
+    db._remember(1, "a")
+    db._remember(2, "b")
+    db._remember(1, "c")
+    db._remember(3, "d")
+
+    assert list(db._seen) == [1, 3]
+    db._seen.clear()
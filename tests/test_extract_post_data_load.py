@@ -0,0 +1,65 @@
+import os
+import sys
+import asyncio
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from memer.helpers.meme_utils import extract_post_data, needs_load
+
+
+class Post(SimpleNamespace):
+    def __init__(self, **kwargs):
+        super().__init__(
+            id="abc",
+            title="t",
+            subreddit=SimpleNamespace(display_name="memes"),
+            permalink="/r/memes/comments/abc/",
+            author="me",
+            over_18=False,
+            created_utc=1,
+            **kwargs,
+        )
+        self.loads = 0
+
+    async def load(self):
+        self.loads += 1
+        self.url = "https://i.redd.it/abc.jpg"
+        self.media = None
+        self.secure_media = None
+        self.preview = {}
+
+
+def test_listing_post_is_not_loaded():
+    post = Post(url="https://i.redd.it/abc.jpg", media=None, secure_media=None)
+    assert needs_load(post) is False
+
+    data = asyncio.run(extract_post_data(post))
+
+    assert post.loads == 0
+    assert data["media_url"] == "https://i.redd.it/abc.jpg"
+
+
+def test_bare_post_falls_back_to_load():
+    post = Post()
+    assert needs_load(post) is True
+
+    data = asyncio.run(extract_post_data(post))
+
+    assert post.loads == 1
+    assert data["url"] == "https://i.redd.it/abc.jpg"
+
+
+def test_gallery_without_metadata_is_loaded():
+    post = Post(url="https://reddit.com/gallery/abc", media=None, is_gallery=True)
+    assert needs_load(post) is True
+
+
+def test_explicit_modes_override_detection():
+    post = Post(url="https://i.redd.it/abc.jpg", media=None)
+    asyncio.run(extract_post_data(post, load=True))
+    assert post.loads == 1
+
+    bare = Post(url="https://i.redd.it/abc.jpg")
+    asyncio.run(extract_post_data(bare, load=False))
+    assert bare.loads == 0
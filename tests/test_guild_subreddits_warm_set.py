@@ -0,0 +1,82 @@
+import os
+import sys
+from collections import deque
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from memer import reddit_meme as rm
+from memer.helpers import guild_subreddits as gs
+
+
+@pytest.fixture(autouse=True)
+def _fresh_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(gs, "DATA_FILE", str(tmp_path / "guild_subreddits.json"))
+    monkeypatch.setattr(gs, "_CACHE", None)
+    monkeypatch.setattr(gs, "_REFCOUNTS", None)
+    monkeypatch.setattr(gs, "_SPELLING", {})
+    monkeypatch.setattr(gs, "_LISTENERS", [])
+
+
+def _recorder():
+    events = []
+    gs.on_subreddits_changed(lambda name, added: events.append((name, added)))
+    return events
+
+
+def test_union_includes_defaults_and_guild_additions():
+    gs.add_guild_subreddit(1, "ProgrammerHumor", "sfw")
+    names = {n.lower() for n in gs.all_guild_subreddits()}
+
+    assert "memes" in names
+    assert "programmerhumor" in names
+
+
+def test_refcounted_add_and_remove_notify_on_transitions():
+    events = _recorder()
+    gs.add_guild_subreddit(1, "ProgrammerHumor", "sfw")
+    gs.add_guild_subreddit(2, "programmerhumor", "sfw")
+    assert gs.subreddit_refcount("PROGRAMMERHUMOR") == 2
+
+    gs.remove_guild_subreddit(1, "ProgrammerHumor", "sfw")
+    assert events == [("ProgrammerHumor", True)]
+
+    gs.remove_guild_subreddit(2, "programmerhumor", "sfw")
+    assert events == [("ProgrammerHumor", True), ("ProgrammerHumor", False)]
+
+
+def test_removing_a_default_from_one_guild_keeps_it_warm():
+    events = _recorder()
+    gs.remove_guild_subreddit(1, "funny", "sfw")  # guild has no custom list yet
+    gs.add_guild_subreddit(1, "x", "sfw")
+    gs.remove_guild_subreddit(1, "funny", "sfw")
+
+    assert gs.subreddit_refcount("funny") == 1
+    assert ("funny", False) not in events
+
+
+def test_mandatory_subreddits_stay_warm_when_no_list_has_them():
+    rm.add_warm_subreddit("memes")
+    rm.WARM_CACHE["memes_hot"] = deque([object()])
+
+    # e.g. the last list referencing it was edited by an admin
+    rm.update_warm_subreddit("Memes", False)
+
+    assert "memes" in rm.WARM_SUBREDDITS
+    assert "memes_hot" in rm.WARM_CACHE
+
+
+def test_warm_set_follows_guild_changes():
+    gs.on_subreddits_changed(rm.update_warm_subreddit)
+    gs.add_guild_subreddit(1, "ProgrammerHumor", "sfw")
+    assert rm.WARM_SUBREDDITS["programmerhumor"] == "ProgrammerHumor"
+
+    rm.WARM_CACHE["ProgrammerHumor_hot"] = deque([object()])
+    rm.WARM_CURSORS["ProgrammerHumor_new"] = "t3_abc"
+    rm.WARM_CACHE["memes_hot"] = deque([object()])
+    gs.remove_guild_subreddit(1, "ProgrammerHumor", "sfw")
+
+    assert "programmerhumor" not in rm.WARM_SUBREDDITS
+    assert "ProgrammerHumor_hot" not in rm.WARM_CACHE
+    assert "ProgrammerHumor_new" not in rm.WARM_CURSORS
+    assert "memes_hot" in rm.WARM_CACHE
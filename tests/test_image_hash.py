@@ -0,0 +1,226 @@
+import os
+import sys
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from memer.helpers.image_hash import (
+    BKTree,
+    PerceptualDeduper,
+    hamming,
+    thumbnail_url,
+)
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "images")
+
+
+def _read(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+def _local_deduper(**kwargs):
+    """Deduper that reads "URLs" from the fixture directory and hashes inline."""
+    deduper = PerceptualDeduper(workers=0, **kwargs)
+
+    async def _download(url):
+        return _read(url.rsplit("/", 1)[-1])
+
+    deduper._download = _download
+    return deduper
+
+
+def _post(pid, name):
+    return SimpleNamespace(id=pid, url=f"https://i.redd.it/{name}")
+
+
+def test_bktree_finds_neighbours_within_threshold():
+    tree = BKTree()
+    tree.add(0b0000, "a")
+    tree.add(0b0111, "b")
+    tree.add(0b1111_1111, "c")
+
+    found = sorted(key for _, key in tree.search(0b0001, 3))
+
+    assert found == ["a", "b"]
+    assert len(tree) == 3
+    assert hamming(0b1010, 0b0101) == 4
+
+
+def test_thumbnail_prefers_small_preview():
+    post = SimpleNamespace(
+        id="x",
+        url="https://i.redd.it/big.png",
+        preview={
+            "images": [
+                {
+                    "source": {"url": "https://preview.redd.it/src.png", "width": 1200},
+                    "resolutions": [
+                        {"url": "https://preview.redd.it/64.png", "width": 64},
+                        {"url": "https://preview.redd.it/108.png?a=1&amp;b=2", "width": 108},
+                    ],
+                }
+            ]
+        },
+    )
+
+    assert thumbnail_url(post) == "https://preview.redd.it/108.png?a=1&b=2"
+    assert thumbnail_url({"media_url": "https://v.redd.it/clip.mp4"}) is None
+
+
+def test_crosspost_of_same_image_is_a_repost():
+    pytest.importorskip("PIL")
+    deduper = _local_deduper(threshold=5)
+    original = _post("a1", "meme.png")
+    crosspost = _post("b2", "meme_repost.jpg")
+    different = _post("c3", "other.png")
+
+    async def _run():
+        assert await deduper.is_repost(original) is False
+        deduper.remember(original)
+        return await deduper.is_repost(crosspost), await deduper.is_repost(different)
+
+    assert asyncio.run(_run()) == (True, False)
+    assert deduper.stats["reposts"] == 1
+
+
+def test_post_is_not_a_repost_of_itself():
+    pytest.importorskip("PIL")
+    deduper = _local_deduper()
+    post = _post("a1", "meme.png")
+
+    async def _run():
+        await deduper.is_repost(post)
+        deduper.remember(post)
+        return await deduper.is_repost(post)
+
+    assert asyncio.run(_run()) is False
+
+
+def test_download_failure_is_not_a_repost():
+    deduper = PerceptualDeduper(workers=0)
+
+    async def _download(url):
+        raise OSError("boom")
+
+    deduper._download = _download
+
+    assert asyncio.run(deduper.is_repost(_post("a1", "meme.png"))) is False
+    assert deduper.stats["errors"] == 1
+
+
+def test_known_repost_only_uses_cached_hashes():
+    pytest.importorskip("PIL")
+    deduper = _local_deduper()
+    original = _post("a1", "meme.png")
+    crosspost = _post("b2", "meme_repost.jpg")
+
+    async def _run():
+        await deduper.is_repost(original)
+        deduper.remember(original)
+        before = deduper.known_repost(crosspost)  # not hashed yet
+        await deduper.is_repost(crosspost)
+        return before, deduper.known_repost(crosspost)
+
+    assert asyncio.run(_run()) == (False, True)
+
+
+def test_pick_fresh_downloads_at_most_one_image(monkeypatch):
+    pytest.importorskip("PIL")
+    from memer import reddit_meme as rm
+
+    deduper = _local_deduper()
+    downloads = []
+    read = deduper._download
+
+    async def _download(url):
+        downloads.append(url)
+        return await read(url)
+
+    deduper._download = _download
+    monkeypatch.setattr(rm, "get_deduper", lambda: deduper)
+    original = {"post_id": "a1", "media_url": "https://i.redd.it/meme.png"}
+    candidates = [
+        {"post_id": f"r{i}", "media_url": "https://i.redd.it/meme_repost.jpg"} for i in range(4)
+    ]
+
+    async def _run():
+        await deduper.is_repost(original)
+        deduper.remember(original)
+        downloads.clear()
+        first = await rm._pick_fresh(candidates)
+        # the repost hash is known now, so no candidate survives screening
+        second = await rm._pick_fresh(candidates)
+        return first, second
+
+    first, second = asyncio.run(_run())
+
+    assert first in candidates  # the checked pick was a repost; the next one is returned unchecked
+    assert second is None
+    assert downloads == ["https://i.redd.it/meme_repost.jpg"]
+
+
+def test_live_fetch_of_only_reposts_is_cached_not_failed(monkeypatch):
+    from memer import reddit_meme as rm
+
+    class AlwaysRepost:
+        def known_repost(self, post):
+            return False
+
+        async def is_repost(self, post):
+            return True
+
+    class Sub:
+        display_name = "memes"
+
+        async def search(self, keyword, limit, **kwargs):
+            for i in range(2):
+                yield SimpleNamespace(
+                    id=f"p{i}",
+                    title=f"cats {i}",
+                    url=f"https://i.redd.it/p{i}.jpg",
+                    subreddit=self,
+                )
+
+    class Cache:
+        ram = {}
+        failures = 0
+
+        def get_from_ram(self, keyword, nsfw=False):
+            return None
+
+        async def get_from_disk(self, keyword, nsfw=False):
+            return None
+
+        def is_disabled(self, keyword, nsfw=False):
+            return False
+
+        def cache_to_ram(self, keyword, posts, nsfw=False):
+            self.ram[keyword] = posts
+
+        def queue_save(self, keyword, posts, nsfw=False):
+            return True
+
+        def record_failure(self, keyword, nsfw=False):
+            self.failures += 1
+
+    async def subreddit(name):
+        return Sub()
+
+    monkeypatch.setattr(rm, "get_deduper", lambda: AlwaysRepost())
+    cache = Cache()
+    result = asyncio.run(rm.fetch_meme(
+        SimpleNamespace(subreddit=subreddit),
+        ["memes"],
+        cache,
+        keyword="cats",
+        listings=(),
+        extract_fn=lambda p: {"post_id": p.id, "media_url": p.url, "subreddit": "memes"},
+    ))
+
+    assert result.post is None
+    assert result.errors == ["only reposts"]
+    assert [p["post_id"] for p in cache.ram["cats"]] == ["p0", "p1"]
+    assert cache.failures == 0
@@ -0,0 +1,84 @@
+import os
+import sys
+import asyncio
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from memer import reddit_meme as rm
+from memer.helpers.keyword_index import KeywordIndex, tokenize
+from memer.helpers import reddit_cache
+from memer.helpers.reddit_cache import RedditCacheManager
+
+
+def _post(pid, title, subreddit="memes", nsfw=False):
+    return {
+        "post_id": pid,
+        "subreddit": subreddit,
+        "title": title,
+        "url": f"https://i.redd.it/{pid}.jpg",
+        "media_url": f"https://i.redd.it/{pid}.jpg",
+        "permalink": f"/r/{subreddit}/comments/{pid}/",
+        "author": "someone",
+        "is_nsfw": nsfw,
+        "created_utc": 0,
+    }
+
+
+def test_tokenize_folds_plurals():
+    assert tokenize("Cats & Puppies, Boxes!") == {"cat", "puppy", "box"}
+    assert tokenize("glass") == {"glass"}
+
+
+def test_search_matches_all_terms_and_filters():
+    index = KeywordIndex()
+    index.add_many([
+        _post("a", "My cats doing cat things"),
+        _post("b", "Black cat"),
+        _post("c", "A black dog"),
+        _post("d", "Cat on r/other", subreddit="other"),
+        _post("e", "NSFW cat", nsfw=True),
+    ])
+
+    assert {p["post_id"] for p in index.search("cat", subreddits={"memes"})} == {"a", "b"}
+    assert [p["post_id"] for p in index.search("black cats")] == ["b"]
+    assert [p["post_id"] for p in index.search("cat", nsfw=True)] == ["e"]
+    assert index.search("giraffe") == []
+
+
+def test_eviction_keeps_postings_consistent():
+    index = KeywordIndex(max_posts=2)
+    index.add_many([_post("a", "cat"), _post("b", "dog"), _post("c", "cat dog")])
+
+    assert len(index) == 2
+    assert [p["post_id"] for p in index.search("cat")] == ["c"]
+    assert "a" not in index.posts
+
+
+def test_cache_manager_feeds_index():
+    mgr = RedditCacheManager(index=KeywordIndex())
+    mgr.cache_to_ram("__random__", [_post("a", "Cats are liquid")])
+
+    assert [p["post_id"] for p in mgr.search_index("cat")] == ["a"]
+
+
+def test_fetch_meme_serves_keyword_from_other_cache_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr(reddit_cache, "DB_PATH", str(tmp_path / "cache.db"))
+    mgr = RedditCacheManager(index=KeywordIndex())
+    rm.HASH_CACHE["https://i.redd.it/sent.jpg"] = True
+
+    async def _run():
+        await mgr.init()
+        try:
+            mgr.cache_to_ram("cats", [_post("a", "Two cats"), _post("sent", "Cat again")])
+            return await rm.fetch_meme(
+                reddit=None, subreddits=["memes"], cache_mgr=mgr, keyword="cat"
+            )
+        finally:
+            await mgr.close()
+
+    result = asyncio.run(_run())
+
+    assert result.picked_via == "cache"
+    assert result.listing == "cache_index"
+    assert result.post.id == "a"
+    # the match is now cached under the new keyword too
+    assert [p["post_id"] for p in mgr.get_from_ram("cat")] == ["a"]
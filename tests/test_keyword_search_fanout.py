@@ -0,0 +1,139 @@
+import os
+import sys
+import asyncio
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from memer.reddit_meme import fetch_meme
+
+
+class DummyCache:
+    def __init__(self):
+        self.cached = None
+
+    def get_from_ram(self, keyword, nsfw=False):
+        return None
+
+    async def get_from_disk(self, keyword, nsfw=False):
+        return None
+
+    def is_disabled(self, keyword, nsfw=False):
+        return False
+
+    def cache_to_ram(self, keyword, posts, nsfw=False):
+        self.cached = posts
+
+    async def save_to_disk(self, keyword, posts, nsfw=False):
+        pass
+
+    def record_failure(self, keyword, nsfw=False):
+        pass
+
+
+class SearchSubreddit:
+    def __init__(self, name, delay, titles, state):
+        self.display_name = name
+        self.delay = delay
+        self.titles = titles
+        self.state = state
+
+    async def search(self, keyword, limit, **kwargs):
+        self.state["started"].add(self.display_name)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.state["cancelled"].add(self.display_name)
+            raise
+        for i, title in enumerate(self.titles):
+            yield SimpleNamespace(
+                id=f"{self.display_name}{i}",
+                title=title,
+                url=f"https://i.redd.it/{self.display_name}{i}.jpg",
+                subreddit=SimpleNamespace(display_name=self.display_name),
+            )
+
+
+class SearchReddit:
+    def __init__(self, subs):
+        self.subs = subs
+
+    async def subreddit(self, name):
+        return self.subs[name]
+
+
+def _extract(p):
+    return {
+        "title": p.title,
+        "media_url": p.url,
+        "subreddit": p.subreddit.display_name,
+        "permalink": f"/r/{p.subreddit.display_name}/comments/{p.id}/",
+    }
+
+
+def _run(subs, **kwargs):
+    reddit = SearchReddit(subs)
+    cache = DummyCache()
+
+    async def _go():
+        start = time.monotonic()
+        result = await fetch_meme(
+            reddit, list(subs), cache, keyword="cat", extract_fn=_extract, **kwargs
+        )
+        return result, time.monotonic() - start
+
+    result, elapsed = asyncio.run(_go())
+    return result, elapsed, cache
+
+
+def test_searches_run_concurrently():
+    state = {"started": set(), "cancelled": set()}
+    subs = {
+        f"sub{i}": SearchSubreddit(f"sub{i}", 0.3, ["cat pic"], state)
+        for i in range(4)
+    }
+
+    result, elapsed, cache = _run(subs, enough_posts=0)
+
+    assert elapsed < 1.0
+    assert len(cache.cached) == 4
+    assert result.listing == "search"
+
+
+def test_early_exit_cancels_slow_searches():
+    state = {"started": set(), "cancelled": set()}
+    subs = {
+        "fast": SearchSubreddit("fast", 0, ["cat one", "cat two", "dog"], state),
+        "slow": SearchSubreddit("slow", 30, ["cat late"], state),
+    }
+
+    result, elapsed, cache = _run(subs, enough_posts=2)
+
+    assert elapsed < 5
+    assert result.source_subreddit == "fast"
+    assert {p["title"] for p in cache.cached} == {"cat one", "cat two"}
+    assert "slow" in state["cancelled"]
+
+
+def test_remaining_candidates_fill_cache_in_background():
+    state = {"started": set(), "cancelled": set()}
+    subs = {
+        "fast": SearchSubreddit("fast", 0, ["cat one", "cat two"], state),
+        "later": SearchSubreddit("later", 0.2, ["cat three"], state),
+    }
+    reddit = SearchReddit(subs)
+    cache = DummyCache()
+
+    async def _go():
+        result = await fetch_meme(
+            reddit, list(subs), cache, keyword="cat", extract_fn=_extract, enough_posts=2
+        )
+        first = [p["title"] for p in cache.cached]
+        await asyncio.sleep(0.5)
+        return result, first
+
+    result, first = asyncio.run(_go())
+
+    assert result.post.title in {"cat one", "cat two"}
+    assert sorted(first) == ["cat one", "cat two"]
+    assert sorted(p["title"] for p in cache.cached) == ["cat one", "cat three", "cat two"]
@@ -0,0 +1,67 @@
+import os
+import sys
+import asyncio
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from memer.helpers.meme_utils import extract_post_data, get_image_url
+from memer.helpers.post_record import PostRecord, as_record
+
+
+def _make_submission():
+    loads = []
+
+    async def load():
+        loads.append(True)
+
+    post = SimpleNamespace(
+        id="abc123",
+        url="https://reddit.com/r/test/comments/abc123/video",
+        media={"reddit_video": {"fallback_url": "https://v.redd.it/x/DASH_720.mp4"}},
+        secure_media=None,
+        preview={},
+        subreddit=SimpleNamespace(display_name="test"),
+        title="a video",
+        permalink="/r/test/comments/abc123/video/",
+        author="someone",
+        over_18=False,
+        created_utc=1700000000.0,
+        load=load,
+    )
+    return post, loads
+
+
+def test_record_resolves_media_url_once_without_load():
+    post, loads = _make_submission()
+    record = PostRecord.from_submission(post)
+
+    assert record.media_url == "https://v.redd.it/x/DASH_720.mp4"
+    assert get_image_url(record) == record.media_url
+    assert record.subreddit.display_name == "test"
+    assert not hasattr(record, "__dict__")
+    assert loads == []
+
+
+def test_extract_post_data_from_record_matches_shape():
+    post, loads = _make_submission()
+    record = as_record(post)
+    data = asyncio.run(extract_post_data(record))
+
+    assert loads == []
+    assert data == {
+        "post_id": "abc123",
+        "subreddit": "test",
+        "title": "a video",
+        "url": post.url,
+        "media_url": "https://v.redd.it/x/DASH_720.mp4",
+        "permalink": "/r/test/comments/abc123/video/",
+        "author": "someone",
+        "is_nsfw": False,
+        "created_utc": 1700000000,
+    }
+
+
+def test_as_record_skips_unusable_posts():
+    assert as_record(None) is None
+    assert as_record(SimpleNamespace(url="x")) is None
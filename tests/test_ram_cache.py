@@ -0,0 +1,168 @@
+import os
+import sys
+import asyncio
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from memer.helpers.keyword_index import KeywordIndex
+from memer.helpers.ram_cache import RamCache
+from memer.helpers.reddit_cache import RedditCacheManager
+
+
+def _posts(prefix, n):
+    return [{"post_id": f"{prefix}{i}", "title": "t"} for i in range(n)]
+
+
+def test_post_budget_evicts_least_recently_used():
+    ram = RamCache(max_posts=10, max_posts_per_key=10, ttl=900)
+    ram.put(("a", False), _posts("a", 4))
+    ram.put(("b", False), _posts("b", 4))
+    assert ram.lookup(("a", False))  # a is now most recently used
+
+    ram.put(("c", False), _posts("c", 4))
+
+    assert list(ram) == [("a", False), ("c", False)]
+    assert ram.posts == 8
+    assert ram.stats["evicted"] == 1
+
+
+def test_per_key_cap_keeps_newest_posts():
+    ram = RamCache(max_posts=100, max_posts_per_key=3, ttl=900)
+    rand = []
+    for post in _posts("r", 5):
+        rand = ram.lookup(("__random__", False)) or []
+        rand.append(post)
+        ram.put(("__random__", False), rand)
+
+    assert [p["post_id"] for p in ram.lookup(("__random__", False))] == ["r2", "r3", "r4"]
+    assert ram.posts == 3
+
+
+def test_ttl_on_read_and_sweep():
+    ram = RamCache(max_posts=100, max_posts_per_key=10, ttl=60)
+    ram.put(("old", False), _posts("o", 2), now=1000)
+    ram.put(("unread", False), _posts("u", 2), now=1000)
+    ram.put(("fresh", False), _posts("f", 2), now=1100)
+
+    assert ram.lookup(("old", False), now=1100) is None
+    assert ram.sweep(now=1100) == 1
+    assert list(ram) == [("fresh", False)]
+    assert ram.posts == 2
+    assert ram.stats["expired"] == 2
+    assert ram.stats["misses"] == 1
+
+
+def test_zero_timestamp_is_not_now():
+    ram = RamCache(max_posts=100, max_posts_per_key=10, ttl=60, soft_ttl=30)
+    ram.put(("epoch", False), _posts("e", 2), now=0)
+
+    assert ram.stale(("epoch", False), now=45)
+    assert ram.lookup(("epoch", False), now=100) is None
+    ram.put(("epoch", False), _posts("e", 2), now=0)
+    assert ram.sweep(now=100) == 1
+
+
+def test_post_count_follows_plain_dict_operations():
+    ram = RamCache(max_posts=100, max_posts_per_key=10, ttl=900)
+    for name in "abcd":
+        ram.put((name, False), _posts(name, 3))
+
+    del ram[("a", False)]
+    ram.pop(("b", False))
+    ram.popitem(last=False)
+    assert ram.posts == 3
+
+    ram[("d", False)] = {"posts": _posts("d", 5), "timestamp": time.time()}
+    assert ram.posts == 5
+    ram.clear()
+    assert ram.posts == 0
+
+
+def test_manager_sweeps_in_background(tmp_path, monkeypatch):
+    from memer.helpers import reddit_cache
+
+    monkeypatch.setattr(reddit_cache, "DB_PATH", str(tmp_path / "cache.db"))
+    mgr = RedditCacheManager(ram_ttl=0.01, ram_sweep_interval=0.02, index=KeywordIndex())
+
+    async def _run():
+        await mgr.init()
+        try:
+            mgr.cache_to_ram("cat", _posts("c", 3))
+            await asyncio.sleep(0.1)
+            return len(mgr.ram_cache), mgr.ram_cache.posts
+        finally:
+            await mgr.close()
+
+    assert asyncio.run(_run()) == (0, 0)
+
+
+def test_stale_entry_is_served_and_refreshed_once():
+    calls = []
+
+    async def refetch(keyword, nsfw):
+        calls.append(keyword)
+        await asyncio.sleep(0.01)
+        return _posts("new", 2)
+
+    mgr = RedditCacheManager(ram_ttl=60, ram_hard_ttl=600, revalidate_fn=refetch, index=KeywordIndex())
+    mgr.ram_cache.put(("cat", False), _posts("old", 2), now=time.time() - 120)
+    mgr.ram_cache.put(("__random__", False), _posts("r", 2), now=time.time() - 120)
+
+    async def _run():
+        served = [mgr.get_from_ram("cat") for _ in range(5)]
+        assert mgr.get_from_ram("__random__")
+        await asyncio.gather(*mgr._revalidating.values())
+        return served
+
+    served = asyncio.run(_run())
+
+    assert all(p[0]["post_id"] == "old0" for p in served)
+    assert calls == ["cat"]
+    assert mgr.get_from_ram("cat")[0]["post_id"] == "new0"
+    assert not mgr.ram_cache.stale(("cat", False))
+    assert mgr.ram_cache.stats["stale"] == 6
+    assert mgr.ram_cache.stats["revalidated"] == 1
+    assert mgr.write_stats["dropped"] == 2  # no DB here, so the save is counted as dropped
+
+
+def test_failed_revalidation_keeps_stale_until_hard_ttl():
+    async def refetch(keyword, nsfw):
+        return []
+
+    mgr = RedditCacheManager(ram_ttl=60, ram_hard_ttl=600, revalidate_fn=refetch, index=KeywordIndex())
+    mgr.ram_cache.put(("cat", False), _posts("old", 2), now=time.time() - 120)
+
+    async def _run():
+        assert mgr.get_from_ram("cat")
+        await asyncio.gather(*mgr._revalidating.values())
+        assert mgr.get_from_ram("cat")  # no second attempt within the soft TTL
+        assert not mgr._revalidating
+
+    asyncio.run(_run())
+    assert mgr.ram_cache.stats["revalidate_failed"] == 1
+
+    mgr.ram_cache.put(("dog", False), _posts("old", 2), now=time.time() - 601)
+    assert mgr.get_from_ram("dog") is None
+
+
+def test_revalidation_throttle_is_forgotten_with_the_entry():
+    async def refetch(keyword, nsfw):
+        return []
+
+    mgr = RedditCacheManager(
+        ram_ttl=60, ram_hard_ttl=600, max_ram_posts=4, revalidate_fn=refetch, index=KeywordIndex()
+    )
+    for name in ("cat", "dog"):
+        mgr.ram_cache.put((name, False), _posts(name, 2), now=time.time() - 120)
+
+    async def _run():
+        mgr.get_from_ram("cat")
+        mgr.get_from_ram("dog")
+        await asyncio.gather(*mgr._revalidating.values())
+
+    asyncio.run(_run())
+    assert set(mgr._revalidated_at) == {("cat", False), ("dog", False)}
+
+    mgr.cache_to_ram("fish", _posts("f", 2))  # evicts cat
+    mgr.ram_cache.sweep(now=time.time() + 600)  # expires dog and fish
+    assert mgr._revalidated_at == {}
@@ -0,0 +1,102 @@
+import os
+import sys
+import asyncio
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from memer import reddit_meme as rm
+from memer.helpers import reddit_cache
+from memer.helpers.keyword_index import KeywordIndex
+from memer.helpers.reddit_cache import RedditCacheManager
+
+
+def _post(pid):
+    return {
+        "post_id": pid,
+        "subreddit": "memes",
+        "title": pid,
+        "url": f"https://i.redd.it/{pid}.jpg",
+        "media_url": f"https://i.redd.it/{pid}.jpg",
+        "author": "someone",
+        "is_nsfw": False,
+        "created_utc": 0,
+    }
+
+
+def _run_with_db(tmp_path, monkeypatch, body):
+    monkeypatch.setattr(reddit_cache, "DB_PATH", str(tmp_path / "cache.db"))
+    mgr = RedditCacheManager(index=KeywordIndex())
+
+    async def _run():
+        await mgr.init()
+        try:
+            return await body(mgr)
+        finally:
+            await mgr.close()
+
+    return asyncio.run(_run())
+
+
+def test_sample_excludes_ids_in_sql_and_wraps(tmp_path, monkeypatch):
+    async def body(mgr):
+        await mgr.save_to_disk("__random__", [_post(f"p{i}") for i in range(20)])
+        excluded = {f"p{i}" for i in range(17)}
+        samples = [
+            await mgr.sample_from_disk("__random__", k=5, exclude_ids=excluded)
+            for _ in range(10)
+        ]
+        return samples, mgr.ram_cache
+
+    samples, ram = _run_with_db(tmp_path, monkeypatch, body)
+
+    for sample in samples:
+        # only three rows are eligible, wherever the pivot lands
+        assert sorted(p["post_id"] for p in sample) == ["p17", "p18", "p19"]
+    assert ram == {}
+
+
+def test_sample_spreads_over_the_cache(tmp_path, monkeypatch):
+    async def body(mgr):
+        await mgr.save_to_disk("__random__", [_post(f"p{i}") for i in range(50)])
+        seen = set()
+        for _ in range(60):
+            seen.update(p["post_id"] for p in await mgr.sample_from_disk("__random__", k=1))
+        return seen
+
+    assert len(_run_with_db(tmp_path, monkeypatch, body)) > 20
+
+
+def test_sample_skips_rows_past_disk_ttl(tmp_path, monkeypatch):
+    async def body(mgr):
+        await mgr.save_to_disk("__random__", [_post(f"p{i}") for i in range(6)])
+        # expired but not flushed yet
+        await mgr.conn.execute(
+            "UPDATE keyword_posts SET cached_at = ? WHERE post_id IN ('p0', 'p1', 'p2')",
+            (int(time.time()) - mgr.disk_ttl - 60,),
+        )
+        await mgr.conn.commit()
+        return await mgr.sample_from_disk("__random__", k=10)
+
+    assert sorted(p["post_id"] for p in _run_with_db(tmp_path, monkeypatch, body)) == ["p3", "p4", "p5"]
+
+
+def test_fetch_meme_random_path_skips_sent_posts(tmp_path, monkeypatch):
+    monkeypatch.setitem(rm.CONFIG, "random_sample_size", 2)
+    monkeypatch.setitem(rm.CONFIG, "random_sample_rounds", 10)
+    for i in range(9):
+        rm.HASH_CACHE[f"https://i.redd.it/p{i}.jpg"] = True
+
+    async def body(mgr):
+        await mgr.save_to_disk("__random__", [_post(f"p{i}") for i in range(12)])
+        return await rm.fetch_meme(
+            reddit=None,
+            subreddits=["memes"],
+            cache_mgr=mgr,
+            exclude_ids=["p10", "p11"],
+        )
+
+    result = _run_with_db(tmp_path, monkeypatch, body)
+
+    assert result.picked_via == "cache"
+    assert result.listing == "cache_disk"
+    assert result.post.id == "p9"
@@ -0,0 +1,143 @@
+import os
+import sys
+import asyncio
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from memer.helpers.rate_limit import (
+    RedditRateLimiter,
+    RequestScheduler,
+    INTERACTIVE,
+    BACKGROUND,
+    REFRESH,
+    WARMUP,
+)
+
+
+def test_burst_does_not_wait():
+    limiter = RedditRateLimiter(qpm=100, burst=10)
+
+    async def _run():
+        start = time.monotonic()
+        for _ in range(5):
+            await limiter.acquire(INTERACTIVE)
+        return time.monotonic() - start
+
+    assert asyncio.run(_run()) < 0.1
+    assert limiter.requests[INTERACTIVE] == 5
+
+
+def test_background_leaves_reserve_for_interactive():
+    limiter = RedditRateLimiter(qpm=100, burst=3, interactive_reserve=2)
+
+    async def _run():
+        await limiter.acquire(BACKGROUND)
+        # only two global tokens left: background must wait, interactive not
+        try:
+            await asyncio.wait_for(limiter.acquire(BACKGROUND), 0.05)
+            background_blocked = False
+        except asyncio.TimeoutError:
+            background_blocked = True
+        await asyncio.wait_for(limiter.acquire(INTERACTIVE), 0.05)
+        return background_blocked
+
+    assert asyncio.run(_run()) is True
+
+
+def test_interactive_is_only_paced_by_the_global_bucket():
+    limiter = RedditRateLimiter(qpm=6000, burst=1, background_qpm=60, interactive_reserve=0)
+
+    async def _run():
+        start = time.monotonic()
+        for _ in range(20):
+            await limiter.acquire(INTERACTIVE)
+        interactive = time.monotonic() - start
+        await limiter.acquire(BACKGROUND)
+        try:
+            # background's own bucket is empty for another second
+            await asyncio.wait_for(limiter.acquire(BACKGROUND), 0.2)
+            return interactive, False
+        except asyncio.TimeoutError:
+            return interactive, True
+
+    interactive, background_capped = asyncio.run(_run())
+
+    # 20 requests at the global 100/s, not a per-budget share of it
+    assert interactive < 0.5
+    assert background_capped
+
+
+def test_headers_cap_tokens_and_rate():
+    limiter = RedditRateLimiter(qpm=100, burst=10)
+    limiter.update_from_headers({"X-Ratelimit-Remaining": "3", "X-Ratelimit-Reset": "30"})
+
+    assert limiter.remaining == 3
+    assert limiter.global_bucket.tokens <= 3
+    assert limiter.global_bucket.rate == 3 / 30
+
+
+def test_exhausted_budget_blocks_until_reset():
+    limiter = RedditRateLimiter(qpm=100, burst=10)
+    limiter.observe(0, 0.05)
+
+    async def _run():
+        start = time.monotonic()
+        await limiter.acquire(INTERACTIVE)
+        return time.monotonic() - start
+
+    assert asyncio.run(_run()) >= 0.04
+
+
+def test_attach_wraps_asyncprawcore_update():
+    seen = []
+    core_limiter = SimpleNamespace(update=lambda *, response_headers: seen.append(response_headers))
+    reddit = SimpleNamespace(_core=SimpleNamespace(_rate_limiter=core_limiter))
+    limiter = RedditRateLimiter()
+
+    assert limiter.attach(reddit) is True
+    core_limiter.update(response_headers={"x-ratelimit-remaining": "42", "x-ratelimit-reset": "100"})
+
+    assert seen and limiter.remaining == 42
+
+
+def test_scheduler_interactive_preempts_warmup():
+    limiter = RedditRateLimiter(qpm=60, burst=1, background_qpm=30, interactive_reserve=0)
+    scheduler = RequestScheduler(limiter)
+    order = []
+
+    async def request(lane, delay=0):
+        await asyncio.sleep(delay)
+        await scheduler.acquire(lane)
+        order.append(lane)
+
+    async def _run():
+        # drain the burst so later requests have to queue
+        await scheduler.acquire(INTERACTIVE)
+        await asyncio.gather(
+            request(WARMUP),
+            request(REFRESH),
+            request(INTERACTIVE, delay=0.01),
+        )
+
+    asyncio.run(asyncio.wait_for(_run(), 10))
+
+    assert order[0] == INTERACTIVE
+    assert order.index(REFRESH) < order.index(WARMUP)
+
+
+def test_scheduler_lane_metrics():
+    scheduler = RequestScheduler(RedditRateLimiter())
+
+    async def _run():
+        await scheduler.acquire(INTERACTIVE)
+        await scheduler.acquire(WARMUP)
+
+    asyncio.run(_run())
+    stats = scheduler.get_stats()
+
+    assert stats[INTERACTIVE].requests == 1
+    assert stats[WARMUP].requests == 1
+    assert stats[REFRESH].requests == 0
+    assert all(st.depth == 0 for st in stats.values())
+    assert stats[WARMUP].max_depth == 1
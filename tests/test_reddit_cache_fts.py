@@ -0,0 +1,117 @@
+import os
+import sys
+import asyncio
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from memer import reddit_meme as rm
+from memer.helpers import reddit_cache
+from memer.helpers.keyword_index import KeywordIndex
+from memer.helpers.reddit_cache import RedditCacheManager
+
+
+def _post(pid, title, subreddit="memes", nsfw=False):
+    return {
+        "post_id": pid,
+        "subreddit": subreddit,
+        "title": title,
+        "url": f"https://i.redd.it/{pid}.jpg",
+        "media_url": f"https://i.redd.it/{pid}.jpg",
+        "author": "someone",
+        "is_nsfw": nsfw,
+        "created_utc": 0,
+    }
+
+
+def _run_with_db(tmp_path, monkeypatch, body):
+    monkeypatch.setattr(reddit_cache, "DB_PATH", str(tmp_path / "cache.db"))
+    mgr = RedditCacheManager(index=KeywordIndex())
+
+    async def _run():
+        await mgr.init()
+        try:
+            return await body(mgr)
+        finally:
+            await mgr.close()
+
+    return asyncio.run(_run())
+
+
+def test_search_disk_ranks_and_filters(tmp_path, monkeypatch):
+    async def body(mgr):
+        await mgr.save_to_disk("cats", [
+            _post("a", "Cat"),
+            _post("b", "My cat and another cat, cat overload, with some extra words"),
+            _post("c", "Dog jumping"),
+            _post("d", "Cat elsewhere", subreddit="other"),
+        ])
+        await mgr.save_to_disk("__random__", [_post("e", "Jumping cats")])
+        return (
+            [p["post_id"] for p in await mgr.search_disk("cat")],
+            [p["post_id"] for p in await mgr.search_disk("cat", subreddits={"memes"})],
+            [p["post_id"] for p in await mgr.search_disk("jumped cats")],
+            await mgr.search_disk("cat", limit=1),
+            await mgr.search_disk('"; DROP TABLE'),
+        )
+
+    every, memes_only, both_terms, limited, hostile = _run_with_db(tmp_path, monkeypatch, body)
+
+    assert set(every) == {"a", "b", "d", "e"}
+    assert set(memes_only) == {"a", "b", "e"}
+    assert both_terms == ["e"]  # porter stemming: jumped ~ jumping
+    assert len(limited) == 1
+    assert hostile == []
+
+
+def test_fts_index_follows_update_delete_and_vacuum(tmp_path, monkeypatch):
+    async def body(mgr):
+        await mgr.save_to_disk("k", [_post("a", "old title"), _post("b", "keep me")])
+        await mgr.save_to_disk("k", [_post("a", "new title")])  # upsert retitles the post
+        renamed = [p["post_id"] for p in await mgr.search_disk("new")]
+        stale = await mgr.search_disk("old")
+
+        await mgr.conn.execute(
+            "UPDATE keyword_posts SET cached_at = ? WHERE post_id = 'a'", (time.time() - 10 ** 7,)
+        )
+        await mgr.conn.commit()
+        await mgr.flush_expired_disk()
+        return renamed, stale, [p["post_id"] for p in await mgr.search_disk("keep")]
+
+    renamed, stale, kept = _run_with_db(tmp_path, monkeypatch, body)
+
+    assert renamed == ["a"]
+    assert stale == []
+    assert kept == ["b"]
+
+
+def test_search_disk_skips_posts_past_disk_ttl(tmp_path, monkeypatch):
+    async def body(mgr):
+        await mgr.save_to_disk("cats", [_post("a", "Old cat"), _post("b", "New cat")])
+        await mgr.save_to_disk("kittens", [_post("a", "Old cat")])
+        expired = int(time.time()) - mgr.disk_ttl - 60
+        await mgr.conn.execute("UPDATE keyword_posts SET cached_at = ? WHERE post_id = 'b'", (expired,))
+        await mgr.conn.commit()
+        found = [p["post_id"] for p in await mgr.search_disk("cat")]
+        mgr.fts_enabled = False
+        return found, [p["post_id"] for p in await mgr.search_disk("cat")]
+
+    fts, like = _run_with_db(tmp_path, monkeypatch, body)
+
+    # "a" is still fresh under one of its keywords
+    assert fts == ["a"]
+    assert like == ["a"]
+
+
+def test_fetch_meme_falls_back_to_disk_fulltext(tmp_path, monkeypatch):
+    rm.HASH_CACHE["https://i.redd.it/sent.jpg"] = True
+
+    async def body(mgr):
+        await mgr.save_to_disk("funny", [_post("a", "Cats being cats"), _post("sent", "Cat")])
+        mgr.index.clear()
+        mgr.ram_cache.clear()
+        return await rm.fetch_meme(reddit=None, subreddits=["memes"], cache_mgr=mgr, keyword="cat")
+
+    result = _run_with_db(tmp_path, monkeypatch, body)
+
+    assert result.listing == "cache_fts"
+    assert result.post.id == "a"
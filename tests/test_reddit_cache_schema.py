@@ -0,0 +1,126 @@
+import os
+import sys
+import asyncio
+import sqlite3
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from memer.helpers import reddit_cache
+from memer.helpers.keyword_index import KeywordIndex
+from memer.helpers.reddit_cache import RedditCacheManager
+
+
+def _post(pid, title="t", subreddit="memes"):
+    return {
+        "post_id": pid,
+        "subreddit": subreddit,
+        "title": title,
+        "url": f"https://i.redd.it/{pid}.jpg",
+        "media_url": f"https://i.redd.it/{pid}.jpg",
+        "author": "someone",
+        "is_nsfw": False,
+        "created_utc": 0,
+    }
+
+
+def _run_with_db(db_path, monkeypatch, body):
+    monkeypatch.setattr(reddit_cache, "DB_PATH", str(db_path))
+    mgr = RedditCacheManager(index=KeywordIndex())
+
+    async def _run():
+        await mgr.init()
+        try:
+            return await body(mgr)
+        finally:
+            await mgr.close()
+
+    return asyncio.run(_run())
+
+
+def _ids(posts):
+    return sorted(p["post_id"] for p in posts or ())
+
+
+def test_post_stays_cached_under_every_keyword(tmp_path, monkeypatch):
+    async def body(mgr):
+        await mgr.save_to_disk("cat", [_post("a"), _post("b")])
+        await mgr.save_to_disk("__random__", [_post("a")])
+        async with mgr.conn.execute("SELECT COUNT(*) FROM posts") as cur:
+            (stored,) = await cur.fetchone()
+        return (
+            await mgr.get_from_disk("cat"),
+            await mgr.get_from_disk("__random__"),
+            stored,
+        )
+
+    cat, random_, stored = _run_with_db(tmp_path / "cache.db", monkeypatch, body)
+
+    assert _ids(cat) == ["a", "b"]
+    assert _ids(random_) == ["a"]
+    assert {p["keyword"] for p in cat} == {"cat"}
+    assert stored == 2
+
+
+def test_expiry_drops_links_then_orphaned_posts(tmp_path, monkeypatch):
+    async def body(mgr):
+        await mgr.save_to_disk("cat", [_post("a"), _post("b")])
+        await mgr.save_to_disk("dog", [_post("a")])
+        await mgr.conn.execute(
+            "UPDATE keyword_posts SET cached_at = ? WHERE keyword = 'cat'",
+            (int(time.time()) - 10 ** 6,),
+        )
+        await mgr.conn.commit()
+        await mgr.flush_expired_disk()
+        async with mgr.conn.execute("SELECT post_id FROM posts") as cur:
+            left = sorted(r[0] for r in await cur.fetchall())
+        return await mgr.get_from_disk("cat"), await mgr.get_from_disk("dog"), left
+
+    cat, dog, left = _run_with_db(tmp_path / "cache.db", monkeypatch, body)
+
+    assert cat is None
+    assert _ids(dog) == ["a"]
+    assert left == ["a"]
+
+
+def test_legacy_meme_cache_table_is_migrated(tmp_path, monkeypatch):
+    db = tmp_path / "cache.db"
+    conn = sqlite3.connect(db)
+    conn.execute(
+        """
+        CREATE TABLE meme_cache (
+            keyword TEXT NOT NULL, subreddit TEXT NOT NULL, post_id TEXT PRIMARY KEY,
+            title TEXT, url TEXT, media_url TEXT, author TEXT, is_nsfw BOOLEAN,
+            created_utc INTEGER, cached_at INTEGER
+        )
+        """
+    )
+    now = int(time.time())
+    conn.executemany(
+        "INSERT INTO meme_cache VALUES (?, 'memes', ?, ?, 'u', ?, 'x', 0, 0, ?)",
+        [
+            ("cat", "a", "Cat pic", "https://i.redd.it/a.jpg", now),
+            ("__random__", "b", "Dog pic", "https://i.redd.it/b.jpg", now),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+    async def body(mgr):
+        async with mgr.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'meme_cache'"
+        ) as cur:
+            legacy_left = await cur.fetchone() is not None
+        return (
+            await mgr.get_from_disk("cat"),
+            await mgr.get_from_disk("__random__"),
+            await mgr.search_disk("dog"),
+            legacy_left,
+        )
+
+    cat, random_, found, legacy_left = _run_with_db(db, monkeypatch, body)
+
+    assert _ids(cat) == ["a"]
+    assert cat[0]["title"] == "Cat pic"
+    assert _ids(random_) == ["b"]
+    assert _ids(found) == ["b"]
+    assert not legacy_left
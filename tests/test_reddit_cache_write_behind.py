@@ -0,0 +1,63 @@
+import os
+import sys
+import asyncio
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from memer.helpers import reddit_cache
+from memer.helpers.reddit_cache import RedditCacheManager
+
+
+def _post(pid):
+    return {
+        "post_id": pid,
+        "subreddit": "memes",
+        "title": f"cat {pid}",
+        "url": f"https://i.redd.it/{pid}.jpg",
+        "media_url": f"https://i.redd.it/{pid}.jpg",
+        "author": "me",
+        "is_nsfw": False,
+        "created_utc": 1,
+    }
+
+
+def test_queue_save_is_persisted_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(reddit_cache, "DB_PATH", str(tmp_path / "cache.db"))
+    mgr = RedditCacheManager(write_interval=0.05)
+
+    async def _run():
+        await mgr.init()
+        assert mgr.queue_save("cat", [_post("a"), _post("b")]) is True
+        assert mgr.queue_save("cat", [_post("c")]) is True
+        # nothing hit the disk synchronously
+        assert mgr.write_stats["written"] == 0
+        await asyncio.sleep(0.2)
+        mgr.ram_cache.clear()
+        rows = await mgr.get_from_disk("cat")
+        await mgr.close()
+        return rows
+
+    rows = asyncio.run(_run())
+
+    assert {r["post_id"] for r in rows} == {"a", "b", "c"}
+    assert mgr.write_stats["written"] == 3
+    assert mgr.write_stats["batches"] == 1
+
+
+def test_full_queue_drops_and_counts(tmp_path, monkeypatch):
+    monkeypatch.setattr(reddit_cache, "DB_PATH", str(tmp_path / "cache.db"))
+    mgr = RedditCacheManager(write_queue_size=1, write_interval=60)
+
+    async def _run():
+        await mgr.init()
+        first = mgr.queue_save("cat", [_post("a")])
+        second = mgr.queue_save("cat", [_post("b"), _post("c")])
+        await mgr.close()  # flushes what was queued
+        return first, second
+
+    first, second = asyncio.run(_run())
+
+    assert first is True
+    assert second is False
+    assert mgr.write_stats["dropped"] == 2
+    assert mgr.write_stats["written"] == 1
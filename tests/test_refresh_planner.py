@@ -0,0 +1,95 @@
+import os
+import sys
+import asyncio
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from memer.helpers.meme_cache_service import MemeCacheService
+from memer.helpers.refresh_planner import RefreshPlanner
+
+
+def test_scores_decay_with_half_life():
+    planner = RefreshPlanner(half_life=100)
+    planner.record("cat", now=0)
+    planner.record("cat", now=0)
+
+    assert planner.score("cat", now=100) == 1.0
+    assert planner.score("dog", now=100) == 0.0
+
+
+def test_recent_demand_outranks_old_frequent_demand():
+    planner = RefreshPlanner(half_life=100, top_k=1)
+    for _ in range(4):
+        planner.record("old", now=0)
+    planner.record("new", now=300)
+    planner.record("new", now=300)
+
+    assert planner.plan(cost=lambda key: 1, now=300) == [("new", False)]
+
+
+def test_sentinels_and_faded_keywords_are_dropped():
+    planner = RefreshPlanner(half_life=10, min_score=0.1)
+    planner.record("__random__", now=0)
+    planner.record("typo", now=0)
+    planner.record("cat", now=100)
+
+    assert planner.plan(cost=lambda key: 1, now=100) == [("cat", False)]
+    assert ("typo", False) not in planner.scores
+
+
+def test_record_defers_pruning_to_plan():
+    planner = RefreshPlanner(max_keys=3)
+    for i in range(6):
+        planner.record(f"k{i}", now=i)
+    assert len(planner.scores) == 6  # no re-rank on every new keyword
+
+    planner.record("k6", now=6)  # past twice the cap: bounded anyway
+    assert len(planner.scores) == 3
+
+    planner.record("k7", now=7)
+    planner.plan(cost=lambda key: 1, now=7)
+    assert set(planner.scores) == {("k5", False), ("k6", False), ("k7", False)}
+
+
+def test_plan_respects_top_k_budget_and_skip():
+    planner = RefreshPlanner(top_k=3, request_budget=7)
+    for i, kw in enumerate(["a", "b", "c", "d", "e"]):
+        for _ in range(10 - i):
+            planner.record(kw, nsfw=(kw == "b"), now=0)
+
+    plan = planner.plan(
+        cost=lambda key: 5 if key[1] else 3,
+        skip=lambda key: key[0] == "c",
+        now=0,
+    )
+
+    # b (nsfw) costs 5 and doesn't fit after a; c is disabled
+    assert plan == [("a", False), ("d", False)]
+    assert planner.last_spent == 6
+    assert "refreshed 2 using 6/7 requests" in planner.summary(now=0)
+
+
+def test_refresh_loop_refreshes_only_planned_keywords():
+    refreshed = []
+
+    class CacheMgr:
+        demand = RefreshPlanner(top_k=1, request_budget=100)
+
+        def is_disabled(self, keyword, nsfw=False):
+            return False
+
+        async def refresh_keywords(self, keywords, fetch_fn):
+            refreshed.extend(keywords)
+
+    svc = MemeCacheService.__new__(MemeCacheService)
+    svc.cache_mgr = CacheMgr()
+    svc._fallback_subs = {"sfw": ["memes", "funny"], "nsfw": ["nsfwmeme"]}
+    svc._fetch_keyword_posts = SimpleNamespace()
+    svc.cache_mgr.demand.record("cat")
+    svc.cache_mgr.demand.record("cat")
+    svc.cache_mgr.demand.record("dog")
+    svc.cache_mgr.demand.record("__random__")
+
+    asyncio.run(svc.cache_refresh_loop())
+
+    assert refreshed == [("cat", False)]
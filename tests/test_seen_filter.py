@@ -0,0 +1,100 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from memer.helpers.seen_filter import RotatingBloomFilter, write_snapshot
+
+
+def test_membership_and_dict_surface():
+    flt = RotatingBloomFilter(capacity=100, ttl=60)
+    flt["https://i.redd.it/a.jpg"] = True
+    flt.add("abc123")
+
+    assert "https://i.redd.it/a.jpg" in flt
+    assert "abc123" in flt
+    assert "https://i.redd.it/b.jpg" not in flt
+    assert None not in flt
+
+    flt.clear()
+    assert "abc123" not in flt
+
+
+def test_false_positive_rate_stays_near_target():
+    flt = RotatingBloomFilter(capacity=2000, ttl=3600, fp_rate=0.01)
+    for i in range(2000):
+        flt.add(f"seen-{i}")
+
+    assert all(f"seen-{i}" in flt for i in range(2000))
+    false_hits = sum(f"fresh-{i}" in flt for i in range(5000))
+    assert false_hits / 5000 < 0.03
+
+
+def test_combined_rate_holds_with_every_generation_full():
+    flt = RotatingBloomFilter(capacity=2000, ttl=3600, fp_rate=0.01, generations=4)
+    for i in range(4 * 2000 - 1):
+        flt.add(f"seen-{i}")
+
+    assert len(flt._gens) == 4
+    false_hits = sum(f"fresh-{i}" in flt for i in range(20000))
+    assert false_hits / 20000 < 0.015
+
+
+def test_items_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    flt = RotatingBloomFilter(capacity=100, ttl=40, generations=4)
+    flt.add("old")
+
+    now[0] += 25
+    flt.add("newer")
+    assert "old" in flt
+
+    now[0] += 40
+    assert "old" not in flt
+    assert "newer" not in flt
+
+
+def test_full_generation_rotates_instead_of_evicting():
+    flt = RotatingBloomFilter(capacity=10, ttl=3600, generations=4)
+    for i in range(25):
+        flt.add(f"id-{i}")
+
+    assert flt.rotations == 2
+    assert all(f"id-{i}" in flt for i in range(25))
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "seen.bloom.json")
+    flt = RotatingBloomFilter(capacity=100, ttl=3600)
+    flt.add("abc123")
+    flt.snapshot(path)
+
+    restored = RotatingBloomFilter(capacity=100, ttl=3600)
+    assert restored.load(path) is True
+    assert "abc123" in restored
+    assert restored.memory_bytes() == flt.memory_bytes()
+
+    resized = RotatingBloomFilter(capacity=5000, ttl=3600)
+    assert resized.load(path) is False
+    assert "abc123" not in resized
+
+
+def test_load_missing_snapshot(tmp_path):
+    flt = RotatingBloomFilter()
+    assert flt.load(str(tmp_path / "missing.json")) is False
+
+
+def test_snapshot_data_is_detached_from_the_filter(tmp_path):
+    path = str(tmp_path / "seen.bloom.json")
+    flt = RotatingBloomFilter(capacity=10, ttl=3600)
+    flt.add("before")
+    data = flt.snapshot_data()
+    for i in range(30):  # rotates and mutates generations after the copy
+        flt.add(f"after-{i}")
+    write_snapshot(path, data)
+
+    restored = RotatingBloomFilter(capacity=10, ttl=3600)
+    assert restored.load(path) is True
+    assert "before" in restored
+    assert "after-0" not in restored
@@ -3,6 +3,7 @@ from types import SimpleNamespace
 
 from asyncprawcore import BadRequest
 
+from memer import reddit_meme
 from memer.reddit_meme import simple_random_meme
 
 
@@ -34,3 +35,46 @@ def test_simple_random_meme_bad_request_fallback():
         assert post.subreddit.display_name == "target"
 
     asyncio.run(run())
+
+
+def test_bad_request_marks_random_broken_and_skips_it():
+    calls = {"random": 0}
+
+    class CountingSubreddit(FakeSubreddit):
+        async def random(self):
+            calls["random"] += 1
+            return await super().random()
+
+    class CountingReddit:
+        async def subreddit(self, name):
+            return CountingSubreddit()
+
+    async def run():
+        reddit = CountingReddit()
+        await simple_random_meme(reddit, "target")
+        post = await simple_random_meme(reddit, "target")
+        assert post.id == "target1"
+
+    asyncio.run(run())
+
+    assert calls["random"] == 1
+    cap = reddit_meme.RANDOM_CAPABILITY["target"]
+    assert cap.attempts == 1 and cap.successes == 0
+    assert "1 skipped (target)" in reddit_meme.random_capability_summary()
+
+
+def test_broken_mark_expires_after_ttl(monkeypatch):
+    reddit_meme._record_random("target", False, broken=True)
+    assert reddit_meme._random_supported("target") is False
+
+    monkeypatch.setattr(reddit_meme.time, "time", lambda: 10**12)
+    assert reddit_meme._random_supported("target") is True
+
+
+def test_summary_survives_expiring_entries(monkeypatch):
+    reddit_meme._record_random("target", False, broken=True)
+    reddit_meme._record_random("other", False, broken=True)
+    monkeypatch.setattr(reddit_meme.time, "time", lambda: 10**12)
+
+    assert "0 skipped" in reddit_meme.random_capability_summary()
+    assert not reddit_meme.RANDOM_CAPABILITY
@@ -0,0 +1,175 @@
+import os
+import sys
+import asyncio
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from memer import reddit_meme as rm
+
+
+class FakeCacheManager:
+    def __init__(self, disable_after=1):
+        self.ram = {}
+        self.failures = 0
+        self.disable_after = disable_after
+
+    def get_from_ram(self, keyword, nsfw=False):
+        return self.ram.get((keyword, nsfw))
+
+    async def get_from_disk(self, keyword, nsfw=False):
+        return None
+
+    def is_disabled(self, keyword, nsfw=False):
+        return self.failures >= self.disable_after
+
+    def cache_to_ram(self, keyword, posts, nsfw=False):
+        self.ram[(keyword, nsfw)] = posts
+
+    def queue_save(self, keyword, posts, nsfw=False):
+        return True
+
+    def record_failure(self, keyword, nsfw=False):
+        self.failures += 1
+
+
+class CountingSubreddit:
+    def __init__(self, name, titles, calls, empty=0):
+        self.display_name = name
+        self.titles = titles
+        self.calls = calls
+        self.empty = empty
+
+    async def search(self, keyword, limit, **kwargs):
+        self.calls.append(self.display_name)
+        await asyncio.sleep(0.05)
+        if self.empty:
+            self.empty -= 1
+            return
+        for i, title in enumerate(self.titles):
+            yield SimpleNamespace(
+                id=f"{self.display_name}{i}",
+                title=title,
+                url=f"https://i.redd.it/{self.display_name}{i}.jpg",
+                subreddit=SimpleNamespace(display_name=self.display_name),
+            )
+
+    async def hot(self, limit=None, **kwargs):
+        if False:
+            yield None
+
+
+class Reddit:
+    def __init__(self, subs):
+        self.subs = subs
+
+    async def subreddit(self, name):
+        return self.subs[name]
+
+
+def _extract(p):
+    return {
+        "post_id": p.id,
+        "title": p.title,
+        "url": p.url,
+        "media_url": p.url,
+        "subreddit": p.subreddit.display_name,
+    }
+
+
+def _fetch_many(subs, cache, n, **kwargs):
+    reddit = Reddit(subs)
+
+    async def _go():
+        return await asyncio.gather(*(
+            rm.fetch_meme(reddit, list(subs), cache, keyword="cats", extract_fn=_extract, **kwargs)
+            for _ in range(n)
+        ))
+
+    return asyncio.run(_go())
+
+
+def test_concurrent_identical_fetches_share_one_search():
+    calls = []
+    subs = {"memes": CountingSubreddit("memes", [f"cats {i}" for i in range(5)], calls)}
+
+    results = _fetch_many(subs, FakeCacheManager(), 5, enough_posts=10)
+
+    assert calls == ["memes"]
+    assert [r.listing for r in results].count("search") == 1
+    assert [r.listing for r in results].count("coalesced") == 4
+    # everyone still gets a different post
+    assert len({r.post.id for r in results}) == 5
+    assert rm.COALESCE_STATS["fetches"] == 1
+    assert rm.COALESCE_STATS["coalesced"] == 4
+    assert "4 coalesced (80%)" in rm.coalesce_summary()
+    assert not rm._INFLIGHT
+
+
+def test_followers_fetch_again_once_shared_posts_run_out():
+    calls = []
+    subs = {"memes": CountingSubreddit("memes", ["cats 0", "cats 1"], calls)}
+
+    results = _fetch_many(subs, FakeCacheManager(), 3, enough_posts=10, listings=("hot",))
+
+    assert len(calls) == 2
+    assert [r.listing for r in results].count("coalesced") == 1
+    # the last request searched again but only found posts already sent
+    assert [r.errors for r in results].count(["no valid posts"]) == 1
+    assert rm.COALESCE_STATS["shared_hits"] == 1
+    assert rm.COALESCE_STATS["fetches"] == 2
+
+
+def test_empty_leader_hands_over_to_a_single_waiter():
+    calls = []
+    subs = {"memes": CountingSubreddit("memes", [f"cats {i}" for i in range(5)], calls, empty=1)}
+
+    results = _fetch_many(subs, FakeCacheManager(disable_after=3), 5, enough_posts=10, listings=())
+
+    # one waiter takes over the empty search; the rest wait on it again
+    assert len(calls) == 2
+    assert rm.COALESCE_STATS["fetches"] == 2
+    assert [r.errors for r in results].count(["no valid posts"]) == 1
+    assert [r.listing for r in results].count("search") == 1
+    assert [r.listing for r in results].count("coalesced") == 3
+    assert not rm._INFLIGHT
+
+
+def test_keyword_case_does_not_split_the_flight():
+    calls = []
+    subs = {"memes": CountingSubreddit("memes", [f"Cats {i}" for i in range(5)], calls)}
+    reddit = Reddit(subs)
+    cache = FakeCacheManager()
+
+    async def _go():
+        return await asyncio.gather(*(
+            rm.fetch_meme(reddit, ["memes"], cache, keyword=kw, extract_fn=_extract, enough_posts=10)
+            for kw in ("Cats", "cats", "CATS")
+        ))
+
+    results = asyncio.run(_go())
+
+    assert calls == ["memes"]
+    assert [r.listing for r in results].count("coalesced") == 2
+    assert dict(rm.COALESCE_STATS) == {"fetches": 1, "coalesced": 2, "shared_hits": 2}
+    assert list(cache.ram) == [("cats", False)]
+
+
+def test_different_subreddit_sets_do_not_coalesce():
+    calls = []
+    subs = {
+        "memes": CountingSubreddit("memes", ["cats a"], calls),
+        "other": CountingSubreddit("other", ["cats b"], calls),
+    }
+    reddit = Reddit(subs)
+    cache = FakeCacheManager()
+
+    async def _go():
+        return await asyncio.gather(
+            rm.fetch_meme(reddit, ["memes"], cache, keyword="cats", extract_fn=_extract),
+            rm.fetch_meme(reddit, ["other"], cache, keyword="cats", extract_fn=_extract),
+        )
+
+    asyncio.run(_go())
+
+    assert sorted(calls) == ["memes", "other"]
+    assert rm.COALESCE_STATS["coalesced"] == 0
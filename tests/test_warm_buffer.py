@@ -0,0 +1,120 @@
+import os
+import sys
+import asyncio
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from memer import reddit_meme as rm
+from memer.helpers.post_record import PostRecord
+from memer.helpers.warm_buffer import WarmBuffer
+
+
+def _record(pid):
+    return PostRecord(
+        id=pid,
+        subreddit_name="memes",
+        title=pid,
+        url=f"https://i.redd.it/{pid}.jpg",
+        media_url=f"https://i.redd.it/{pid}.jpg",
+        permalink=f"/r/memes/comments/{pid}/",
+    )
+
+
+class DummyCache:
+    def get_from_ram(self, keyword, nsfw=False):
+        return None
+
+    async def get_from_disk(self, keyword, nsfw=False):
+        return None
+
+    def cache_to_ram(self, keyword, posts, nsfw=False):
+        pass
+
+    def queue_save(self, keyword, posts, nsfw=False):
+        return True
+
+
+def test_channels_read_independently():
+    buf = WarmBuffer([_record("new"), _record("old")], maxlen=10)
+
+    assert buf.take(1).id == "old"
+    assert buf.take(1).id == "new"
+    assert buf.take(1) is None
+    assert buf.take(2).id == "old"
+    assert len(buf) == 2
+
+
+def test_rerank_keeps_channel_progress():
+    rm.WARM_SUBREDDITS["memes"] = "memes"
+    rm.WARM_CACHE["memes_hot"] = WarmBuffer([_record("b"), _record("a")], maxlen=10)
+    buf = rm.WARM_CACHE["memes_hot"]
+    assert buf.take(1).id == "a"
+
+    rm._merge_into_buffer(
+        "memes_hot", [SimpleNamespace(id="a"), SimpleNamespace(id="b")], 10, rerank=True
+    )
+
+    assert rm.WARM_CACHE["memes_hot"] is buf
+    assert [r.id for r in buf.unread(1)] == ["b"]
+
+
+def test_consumed_ids_are_pruned_to_the_buffer():
+    buf = WarmBuffer(maxlen=2)
+    for i in range(6):
+        buf.appendleft(_record(str(i)))
+        buf.take(1)
+
+    # ids that rotated out are dropped once the set outgrows 2 * maxlen
+    assert buf._consumed[1] == {"3", "4", "5"}
+
+
+def test_fetch_meme_warm_path_does_not_drain_buffer():
+    rm.WARM_CACHE["memes_hot"] = WarmBuffer([_record("fresh"), _record("sent")], maxlen=10)
+    # "fresh" went out in another guild: the shared buffer still serves it here
+    rm.HASH_CACHE["https://i.redd.it/fresh.jpg"] = True
+    rm.ID_CACHE["fresh"] = True
+
+    result = asyncio.run(
+        rm.fetch_meme(
+            reddit=None,
+            subreddits=["memes"],
+            cache_mgr=DummyCache(),
+            listings=("hot",),
+            extract_fn=lambda p: p.to_dict(),
+            exclude_ids=["sent"],
+            channel_id=42,
+        )
+    )
+
+    assert result.picked_via == "warm"
+    assert result.post.id == "fresh"
+    # the post this channel already saw is skipped for it but not thrown away
+    assert [r.id for r in rm.WARM_CACHE["memes_hot"]] == ["fresh", "sent"]
+    assert rm.WARM_CACHE["memes_hot"].unread(42) == []
+
+
+def test_cog_warm_fallback_skips_posts_sent_in_the_channel(monkeypatch):
+    import memer.cogs.meme as meme_mod
+    from memer.cogs.meme import Meme
+
+    rm.WARM_CACHE["memes_hot"] = WarmBuffer([_record("fresh"), _record("sent")], maxlen=10)
+    # sent in another guild only
+    rm.ID_CACHE["fresh"] = True
+    rm.HASH_CACHE["https://i.redd.it/fresh.jpg"] = True
+    monkeypatch.setattr(meme_mod, "get_guild_subreddits", lambda guild_id, kind: ["memes"])
+
+    async def has_post_been_sent(channel_id, post_id):
+        return (channel_id, post_id) == (3, "sent")
+
+    monkeypatch.setattr(meme_mod, "has_post_been_sent", has_post_been_sent)
+    sent = []
+
+    async def fake_send_cached(ctx, data, keyword, via, nsfw):
+        sent.append(data["post_id"])
+
+    cog = Meme.__new__(Meme)
+    cog._send_cached = fake_send_cached
+    ctx = SimpleNamespace(guild=SimpleNamespace(id=1), channel=SimpleNamespace(id=3))
+
+    assert asyncio.run(cog._try_cache_or_local(ctx, nsfw=False, keyword=None))
+    assert sent == ["fresh"]
@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from memer import reddit_meme as rm
+from memer.helpers.post_record import PostRecord
+
+
+def _record(pid):
+    return PostRecord(
+        id=pid,
+        subreddit_name="memes",
+        title=f"title {pid}",
+        url=f"https://i.redd.it/{pid}.jpg",
+        media_url=f"https://i.redd.it/{pid}.jpg",
+        permalink=f"/r/memes/comments/{pid}/",
+        created_utc=1700000000,
+    )
+
+
+def test_snapshot_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setitem(rm.CONFIG, "snapshot_dir", str(tmp_path))
+    rm.WARM_CACHE["memes_hot"] = deque([_record("a"), _record("b")], maxlen=75)
+    rm.save_warm_snapshot()
+    rm.WARM_CACHE.clear()
+    rm.HASH_CACHE["https://i.redd.it/b.jpg"] = True
+
+    assert rm.load_warm_snapshot() == 1
+    buf = rm.WARM_CACHE["memes_hot"]
+    assert buf.maxlen == 75
+    assert [r.id for r in buf] == ["a"]
+    assert buf[0].to_dict() == _record("a").to_dict()
+
+
+def test_stale_snapshot_is_ignored(tmp_path, monkeypatch):
+    monkeypatch.setitem(rm.CONFIG, "snapshot_dir", str(tmp_path))
+    monkeypatch.setitem(rm.CONFIG, "warm_snapshot_max_age", 60)
+    rm.WARM_CACHE["memes_hot"] = deque([_record("a")], maxlen=75)
+    payload = rm.warm_snapshot_payload()
+    payload["saved_at"] = time.time() - 120
+    rm.save_warm_snapshot(payload)
+    rm.WARM_CACHE.clear()
+
+    assert rm.load_warm_snapshot() == 0
+    assert "memes_hot" not in rm.WARM_CACHE
+
+
+def test_live_buffers_win_over_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setitem(rm.CONFIG, "snapshot_dir", str(tmp_path))
+    rm.WARM_CACHE["memes_hot"] = deque([_record("a")], maxlen=75)
+    rm.save_warm_snapshot()
+    rm.WARM_CACHE["memes_hot"] = deque([_record("fresh")], maxlen=75)
+
+    assert rm.load_warm_snapshot() == 0
+    assert [r.id for r in rm.WARM_CACHE["memes_hot"]] == ["fresh"]
+
+
+def test_missing_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setitem(rm.CONFIG, "snapshot_dir", str(tmp_path))
+    assert rm.load_warm_snapshot() == 0
@@ -0,0 +1,117 @@
+import os
+import sys
+import asyncio
+from collections import deque
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from memer import reddit_meme as rm
+
+
+def _post(pid):
+    return SimpleNamespace(
+        id=pid,
+        fullname=f"t3_{pid}",
+        title=pid,
+        url=f"https://i.redd.it/{pid}.jpg",
+        permalink=f"/r/memes/comments/{pid}/",
+        subreddit=SimpleNamespace(display_name="memes"),
+        author="someone",
+        over_18=False,
+        created_utc=0,
+    )
+
+
+class FakeSub:
+    display_name = "memes"
+
+    def __init__(self, new, hot):
+        self.listings = {"new": new, "hot": hot}
+        self.calls = []
+
+    def _listing(self, name, limit, params=None):
+        self.calls.append((name, params))
+        posts = self.listings[name]
+        if params and "before" in params:
+            cursor = params["before"]
+            ids = [p.fullname for p in posts]
+            posts = posts[: ids.index(cursor)] if cursor in ids else []
+
+        async def gen():
+            for p in posts[:limit]:
+                yield p
+
+        return gen()
+
+    def new(self, limit, params=None):
+        return self._listing("new", limit, params)
+
+    def hot(self, limit, params=None):
+        return self._listing("hot", limit, params)
+
+
+@pytest.fixture(autouse=True)
+def _no_throttle(monkeypatch):
+    async def _throttle(lane=None):
+        return None
+
+    monkeypatch.setattr(rm, "throttle", _throttle)
+    rm.WARM_SUBREDDITS["memes"] = "memes"
+
+
+def _refresh(sub, full=False):
+    return asyncio.run(rm._refresh_subreddit(sub, ("hot", "new"), 75, full))
+
+
+def test_quiet_subreddit_only_polls_new_with_cursor():
+    sub = FakeSub(new=[_post("n2"), _post("n1")], hot=[_post("h1"), _post("n1")])
+    assert _refresh(sub, full=True) == 4
+    assert rm.WARM_CURSORS["memes_new"] == "t3_n2"
+
+    sub.calls.clear()
+    assert _refresh(sub) == 0
+
+    assert sub.calls == [("new", {"before": "t3_n2"})]
+
+
+def test_new_posts_are_merged_not_replaced():
+    sub = FakeSub(new=[_post("n2"), _post("n1")], hot=[_post("h1")])
+    _refresh(sub, full=True)
+    rm.WARM_CACHE["memes_new"].pop()  # n1 rotated out of the buffer
+    old_n2 = rm.WARM_CACHE["memes_new"][0]
+
+    sub.listings["new"] = [_post("n3")] + sub.listings["new"]
+    sub.listings["hot"] = [_post("n3"), _post("h1")]
+    sub.calls.clear()
+    assert _refresh(sub) == 2
+
+    assert [r.id for r in rm.WARM_CACHE["memes_new"]] == ["n3", "n2"]
+    assert rm.WARM_CACHE["memes_new"][1] is old_n2
+    assert [r.id for r in rm.WARM_CACHE["memes_hot"]] == ["n3", "h1"]
+    assert sub.calls == [("new", {"before": "t3_n2"}), ("hot", None)]
+
+
+def test_rerank_keeps_top_of_listing_when_full():
+    rm.WARM_CACHE["memes_hot"] = deque([rm.as_record(_post("old"))], maxlen=2)
+    rm._merge_into_buffer("memes_hot", [_post("a"), _post("b")], 2, rerank=True)
+
+    assert [r.id for r in rm.WARM_CACHE["memes_hot"]] == ["a", "b"]
+
+
+def test_subreddit_removed_mid_refresh_is_not_rewarmed():
+    sub = FakeSub(new=[_post("n1")], hot=[_post("h1")])
+    sub.display_name = "funny"
+    rm.WARM_SUBREDDITS["funny"] = "funny"
+    listing = sub._listing
+
+    def _listing(name, limit, params=None):
+        rm.remove_warm_subreddit("funny")  # dropped while the fetch is in flight
+        return listing(name, limit, params)
+
+    sub._listing = _listing
+
+    assert _refresh(sub, full=True) == 0
+    assert not rm.WARM_CACHE
+    assert not rm.WARM_CURSORS
@@ -0,0 +1,74 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from memer.helpers import warmup_schedule
+from memer.helpers.warmup_schedule import WarmupSchedule
+
+
+@pytest.fixture(autouse=True)
+def _config(monkeypatch):
+    monkeypatch.setattr(
+        warmup_schedule,
+        "CONFIG",
+        {
+            "warmup_interval": 300,
+            "warmup_min_interval": 60,
+            "warmup_max_interval": 3600,
+            "warmup_target_posts": 10,
+            "warmup_demand_weight": 1.0,
+        },
+    )
+
+
+def _refresh_twice(schedule, name, added, drained=0):
+    schedule.record_refresh(name, 75, now=1000)
+    schedule.record_drain(name, drained)
+    return schedule.record_refresh(name, added, now=1300)
+
+
+def test_first_refresh_uses_base_interval():
+    schedule = WarmupSchedule()
+    assert schedule.due(["memes"], now=0) == ["memes"]
+    assert schedule.record_refresh("memes", 75, now=0) == 300
+    assert schedule.due(["memes"], now=10) == []
+    assert schedule.next_due(["memes"]) == 300
+
+
+def test_quiet_unused_sub_backs_off():
+    schedule = WarmupSchedule()
+    assert _refresh_twice(schedule, "deadsub", added=0) == 3600
+
+
+def test_busy_sub_refreshes_faster():
+    schedule = WarmupSchedule()
+    busy = _refresh_twice(schedule, "memes", added=40)
+    normal = _refresh_twice(schedule, "wholesomememes", added=10)
+
+    assert normal == pytest.approx(600)  # EWMA halfway to the target rate
+    assert 60 <= busy < normal
+
+
+def test_drain_and_demand_shorten_period():
+    schedule = WarmupSchedule()
+    schedule.set_demand({"Memes": 100, "niche": 1})
+
+    drained = _refresh_twice(schedule, "drained", added=0, drained=20)
+    popular = _refresh_twice(schedule, "memes", added=0)
+    niche = _refresh_twice(schedule, "niche", added=0)
+
+    assert drained < 3600
+    assert popular == 300
+    assert niche == 3600
+
+
+def test_full_refresh_every_nth():
+    schedule = WarmupSchedule()
+    fulls = []
+    for i in range(7):
+        fulls.append(schedule.is_full_refresh("memes", 3))
+        schedule.record_refresh("memes", 0, now=i * 100)
+
+    assert fulls == [True, False, False, True, False, False, True]